@@ -1,3 +1,10 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import GeocodeCache
+
+
+@admin.register(GeocodeCache)
+class GeocodeCacheAdmin(admin.ModelAdmin):
+    list_display = ("address", "latitude", "longitude", "status", "geocoded_at")
+    list_filter = ("status",)
+    search_fields = ("address",)
@@ -0,0 +1,97 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.snapshot import parse_events_csv
+from events.utils import (
+    RateLimiter,
+    cache_entries,
+    events_csv_path,
+    geocode_address,
+    needs_geocoding,
+    normalize_address,
+    store_geocodes,
+)
+
+# Results are saved every this-many addresses, so an interrupted run keeps what it has done
+SAVE_EVERY = 100
+
+# Attempts per address when Google answers OVER_QUERY_LIMIT (waiting 1s, 2s, 4s ... in between)
+QUOTA_ATTEMPTS = 4
+
+
+class Command(BaseCommand):
+    help = "Geocode the addresses of scraped events that have no coordinates into the geocode cache the map reads"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--csv", help="Events CSV to read (default: the one the map page uses)")
+        parser.add_argument("--workers", type=int, default=4, help="Concurrent requests to Google")
+        parser.add_argument("--rate", type=float, default=10.0, help="Most requests per second, across all workers")
+        parser.add_argument("--limit", type=int, help="Geocode at most this many addresses")
+        parser.add_argument(
+            "--retry-failed",
+            action="store_true",
+            help="Look up again addresses Google couldn't place, even if that answer is still cached",
+        )
+
+    def handle(self, *args, **options):
+        if not getattr(settings, "GOOGLE_MAPS_API_KEY", None):
+            raise CommandError("GOOGLE_MAPS_API_KEY is not set")
+
+        path = options["csv"] or events_csv_path()
+        wanted = set()
+
+        def collect(addresses):
+            wanted.update(addresses)
+            return {}
+
+        try:
+            parse_events_csv(path, geocode=collect)
+        except FileNotFoundError:
+            raise CommandError(f"No events CSV at {path}")
+
+        # one request per cache key, not per spelling of the address
+        by_key = {}
+        for address in sorted(wanted):
+            by_key.setdefault(normalize_address(address), address)
+        cached = cache_entries(by_key.values())
+        todo = [
+            address for key, address in by_key.items()
+            if (options["retry_failed"] and not (key in cached and cached[key].found))
+            or needs_geocoding(cached.get(key))
+        ]
+        if options["limit"] is not None:
+            todo = todo[:options["limit"]]
+
+        self.stdout.write(f"{len(by_key)} addresses without coordinates, {len(todo)} to geocode")
+        if not todo:
+            return
+
+        limiter = RateLimiter(options["rate"])
+
+        def lookup(address):
+            for attempt in range(QUOTA_ATTEMPTS):
+                limiter.wait()
+                lat, lng, status = geocode_address(address)
+                if status != "OVER_QUERY_LIMIT":
+                    break
+                time.sleep(2 ** attempt)
+            return address, lat, lng, status
+
+        found = 0
+        pending = []
+        with ThreadPoolExecutor(max_workers=max(options["workers"], 1)) as pool:
+            futures = [pool.submit(lookup, address) for address in todo]
+            # results are written from this thread only (SQLite doesn't like concurrent writers)
+            for future in as_completed(futures):
+                result = future.result()
+                found += result[3] == "OK"
+                pending.append(result)
+                if len(pending) >= SAVE_EVERY:
+                    store_geocodes(pending)
+                    pending = []
+        store_geocodes(pending)
+
+        self.stdout.write(self.style.SUCCESS(f"Geocoded {found} of {len(todo)} addresses"))
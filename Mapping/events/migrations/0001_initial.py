@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-17 20:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="GeocodeCache",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("address", models.CharField(max_length=500, unique=True)),
+                ("latitude", models.FloatField(blank=True, null=True)),
+                ("longitude", models.FloatField(blank=True, null=True)),
+                ("status", models.CharField(max_length=32)),
+                ("geocoded_at", models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
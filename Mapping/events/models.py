@@ -1,3 +1,30 @@
 from django.db import models
 
-# Create your models here.
+
+class GeocodeCache(models.Model):
+    """
+    Result of geocoding one address, so each address costs one Google Geocoding call
+    (see events/utils.py and the `geocode_events` command).
+
+    Failures are cached too (latitude/longitude null + the API status), so an address Google
+    can't place isn't looked up again on every run. Permanent failures are retried after
+    GEOCODE_NEGATIVE_TTL, temporary ones (quota, network errors) on the next run.
+    """
+
+    # Lookup key: the address as normalize_address() returns it
+    address = models.CharField(max_length=500, unique=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    # Google's status ("OK", "ZERO_RESULTS", "OVER_QUERY_LIMIT" ...) or "ERROR" for a failed request
+    status = models.CharField(max_length=32)
+    # Indexed: the map view checks the latest one to know when the cache changed
+    geocoded_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        if self.latitude is None:
+            return f"{self.address} ({self.status})"
+        return f"{self.address} ({self.latitude}, {self.longitude})"
+
+    @property
+    def found(self):
+        return self.latitude is not None and self.longitude is not None
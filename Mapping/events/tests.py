@@ -1,3 +1,117 @@
-from django.test import TestCase
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.staticfiles import finders
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import GeocodeCache
+from .utils import cached_coordinates, get_coordinates, needs_geocoding, normalize_address, store_geocodes
+
+
+def google(lat=None, lng=None, status="OK"):
+    """A fake requests.get response from the Geocoding API."""
+    response = mock.Mock()
+    results = [{"geometry": {"location": {"lat": lat, "lng": lng}}}] if lat is not None else []
+    response.json.return_value = {"status": status, "results": results}
+    return response
+
+
+@override_settings(GOOGLE_MAPS_API_KEY="test-key")
+class GeocodeCacheTests(TestCase):
+    HEADER = "event_title,address,venue_name,city,start_local,latitude,longitude\n"
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.csv = os.path.join(tmp.name, "events_out.csv")
+        with open(self.csv, "w", encoding="utf-8") as f:
+            f.write(self.HEADER)
+            f.write("Jazz,1 Soho Sq,,London,2025-11-21 20:00,51.5136,-0.1365\n")
+            f.write("Gig,Union Chapel  Islington,,London,2025-11-22 19:30,,\n")
+            f.write("Rave,Nowhere Lane,,London,2025-11-22 22:00,,\n")
+
+    def test_normalize_address(self):
+        self.assertEqual(normalize_address("  Union Chapel\nISLINGTON "), "union chapel islington")
+
+    def test_get_coordinates_asks_google_once(self):
+        with mock.patch("events.utils.requests.get", return_value=google(51.54, -0.1)) as get:
+            self.assertEqual(get_coordinates("Union Chapel, Islington"), (51.54, -0.1))
+            self.assertEqual(get_coordinates("union chapel,  islington"), (51.54, -0.1))
+        self.assertEqual(get.call_count, 1)
+
+    def test_failures_are_cached(self):
+        with mock.patch("events.utils.requests.get", return_value=google(status="ZERO_RESULTS")) as get:
+            self.assertEqual(get_coordinates("Nowhere Lane"), (None, None))
+            self.assertEqual(get_coordinates("Nowhere Lane"), (None, None))
+        self.assertEqual(get.call_count, 1)
+
+        entry = GeocodeCache.objects.get()
+        self.assertFalse(needs_geocoding(entry))
+        self.assertTrue(needs_geocoding(entry, now=timezone.now() + timedelta(days=365)))
+        entry.status = "OVER_QUERY_LIMIT"
+        self.assertTrue(needs_geocoding(entry)) # temporary failure: retried next time
+
+    def test_cached_coordinates_never_calls_google(self):
+        store_geocodes([("Union Chapel Islington", 51.54, -0.1, "OK"), ("Nowhere Lane", None, None, "ZERO_RESULTS")])
+        with mock.patch("events.utils.requests.get", side_effect=AssertionError("called Google")):
+            found = cached_coordinates(["union chapel islington", "Nowhere Lane", "Not cached"])
+        self.assertEqual(found, {"union chapel islington": (51.54, -0.1)})
+
+    def test_map_reads_only_the_cache(self):
+        # past MAX_CLUSTER_ZOOM the cluster endpoint sends every event as it is
+        url = reverse("event_clusters") + "?zoom=17&bbox=51.4,-0.2,51.6,0.0"
+        with mock.patch("events.views.events_csv_path", return_value=self.csv), \
+                mock.patch("events.utils.requests.get", side_effect=AssertionError("called Google")):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()["points"]["name"], ["Jazz"])
+
+            # filling the cache shows the event on the next load, under a new ETag
+            store_geocodes([("Union Chapel Islington", 51.54, -0.1, "OK")])
+            refreshed = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+            self.assertEqual(refreshed.status_code, 200)
+            self.assertEqual(sorted(refreshed.json()["points"]["name"]), ["Gig", "Jazz"])
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=refreshed["ETag"]).status_code, 304)
+
+    def test_map_page_has_no_events(self):
+        response = self.client.get(reverse("index"), {"lat": "51.5", "lng": "-0.1"})
+        self.assertContains(response, 'id="map-center-data"')
+        self.assertContains(response, reverse("event_clusters"))
+        # the map script is the one shared with the accounts project, found through STATICFILES_DIRS
+        self.assertContains(response, "api/event_map.js")
+        self.assertTrue(finders.find("api/event_map.js"))
+
+    def test_clusters_endpoint(self):
+        store_geocodes([("Union Chapel Islington", 51.54, -0.1, "OK")])
+        with mock.patch("events.views.events_csv_path", return_value=self.csv):
+            far = self.client.get(reverse("event_clusters"), {"zoom": 3, "bbox": "51.4,-0.2,51.6,0.0"}).json()
+            near = self.client.get(reverse("event_clusters"), {"zoom": 15, "bbox": "51.4,-0.2,51.6,0.0"}).json()
+        self.assertEqual((far["clusters"]["size"], far["points"]["count"]), ([2], 0))
+        self.assertEqual((near["clusters"]["count"], sorted(near["points"]["name"])), (0, ["Gig", "Jazz"]))
+
+    def test_geocode_events_command(self):
+        answers = {"Union Chapel  Islington": google(51.54, -0.1), "Nowhere Lane": google(status="ZERO_RESULTS")}
+
+        def get(url, params, timeout):
+            return answers[params["address"]]
+
+        out = StringIO()
+        with mock.patch("events.utils.requests.get", side_effect=get) as fake:
+            call_command("geocode_events", csv=self.csv, rate=0, stdout=out)
+            self.assertEqual(fake.call_count, 2) # the row with coordinates isn't looked up
+            self.assertIn("Geocoded 1 of 2", out.getvalue())
+
+            # both answers are cached, including the failure
+            call_command("geocode_events", csv=self.csv, rate=0, stdout=out)
+            self.assertEqual(fake.call_count, 2)
+
+            call_command("geocode_events", csv=self.csv, rate=0, retry_failed=True, stdout=out)
+            self.assertEqual(fake.call_count, 3)
+
+        self.assertEqual(cached_coordinates(["Union Chapel Islington"]), {"Union Chapel Islington": (51.54, -0.1)})
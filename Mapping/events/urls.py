@@ -3,4 +3,5 @@ from . import views
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('api/clusters/', views.event_clusters, name='event_clusters'),
 ]
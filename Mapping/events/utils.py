@@ -1,32 +1,157 @@
 # events/utils.py
+import logging
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+
 import requests
 from django.conf import settings
+from django.db.models import Max
+from django.utils import timezone
 
-def get_coordinates(address: str):
+from .models import GeocodeCache
+
+logger = logging.getLogger("events.geocoding")
+
+GEOCODE_URL = "https://maps.googleapis.com/maps/api/geocode/json"
+
+# Statuses worth asking Google about again on the next run; anything else that isn't "OK"
+# (ZERO_RESULTS, INVALID_REQUEST ...) is cached until GEOCODE_NEGATIVE_TTL has passed.
+RETRY_STATUSES = {"ERROR", "OVER_QUERY_LIMIT", "UNKNOWN_ERROR", "REQUEST_DENIED", "NO_API_KEY"}
+
+GEOCODE_NEGATIVE_TTL = timedelta(days=getattr(settings, "GEOCODE_NEGATIVE_TTL_DAYS", 30))
+
+# Addresses per query when reading the cache (stays under SQLite's parameter limit)
+CACHE_LOOKUP_BATCH = 500
+
+
+def events_csv_path():
+    """Where the scraped events CSV is read from (the map view and the geocode_events command)."""
+    return Path(settings.BASE_DIR) / "data_scripts" / "event_scraping" / "events_out.csv"
+
+
+def normalize_address(address: str) -> str:
+    """The cache key for an address: whitespace collapsed, case folded."""
+    return " ".join((address or "").split()).casefold()[:500]
+
+
+def geocode_address(address: str):
     """
-    Returns (lat, lng) for a given address using Google Geocoding API,
-    or (None, None) if it can't be geocoded.
+    Asks the Google Geocoding API for an address.
+    Returns (lat, lng, status); lat/lng are None unless status is "OK".
+    Never raises: a failed request comes back as status "ERROR".
     """
-    if not address:
-        return None, None
-
     gmaps_key = getattr(settings, 'GOOGLE_MAPS_API_KEY', None)
     if not gmaps_key:
         # No API key configured — can't geocode
-        return None, None
+        return None, None, "NO_API_KEY"
 
     params = {"address": address, "key": gmaps_key}
-    response = requests.get(
-        "https://maps.googleapis.com/maps/api/geocode/json",
-        params=params,
-        timeout=10,
-    )
-    data = response.json()
+    try:
+        response = requests.get(GEOCODE_URL, params=params, timeout=10)
+        data = response.json()
+    except (requests.RequestException, ValueError) as e:
+        logger.warning("Geocoding request failed for %r: %s", address, e)
+        return None, None, "ERROR"
 
-    if data.get("status") == "OK" and data.get("results"):
+    status = data.get("status") or "ERROR"
+    if status == "OK" and data.get("results"):
         location = data["results"][0]["geometry"]["location"]
-        return location["lat"], location["lng"]
+        return location["lat"], location["lng"], "OK"
+
+    logger.info("Geocoding error: %s for %r", status, address)
+    return None, None, "ZERO_RESULTS" if status == "OK" else status
+
+
+def needs_geocoding(entry, now=None) -> bool:
+    """True if a cache entry (or None for an address never tried) should be looked up again."""
+    if entry is None:
+        return True
+    if entry.found:
+        return False
+    if entry.status in RETRY_STATUSES:
+        return True
+    return entry.geocoded_at < (now or timezone.now()) - GEOCODE_NEGATIVE_TTL
+
+
+def cache_entries(addresses):
+    """{normalized address: GeocodeCache} for the addresses that are in the cache."""
+    keys = sorted({normalize_address(a) for a in addresses if a})
+    found = {}
+    for i in range(0, len(keys), CACHE_LOOKUP_BATCH):
+        for entry in GeocodeCache.objects.filter(address__in=keys[i:i + CACHE_LOOKUP_BATCH]):
+            found[entry.address] = entry
+    return found
+
+
+def cached_coordinates(addresses):
+    """
+    {address: (lat, lng)} for the addresses the cache has coordinates for, read from the cache only
+    (never calls Google). Addresses that aren't cached yet or couldn't be geocoded are left out.
+    """
+    entries = cache_entries(addresses)
+    located = {}
+    for address in addresses:
+        entry = entries.get(normalize_address(address))
+        if entry is not None and entry.found:
+            located[address] = (entry.latitude, entry.longitude)
+    return located
+
+
+def cache_version():
+    """When the geocode cache was last written to (None if it's empty). One indexed query."""
+    return GeocodeCache.objects.aggregate(latest=Max("geocoded_at"))["latest"]
+
+
+def store_geocodes(results):
+    """Saves [(address, lat, lng, status)] to the cache, replacing earlier results for the same addresses."""
+    now = timezone.now()
+    entries = {}
+    for address, lat, lng, status in results:
+        key = normalize_address(address)
+        if key:
+            entries[key] = GeocodeCache(address=key, latitude=lat, longitude=lng, status=status, geocoded_at=now)
+    GeocodeCache.objects.bulk_create(
+        list(entries.values()),
+        batch_size=500,
+        update_conflicts=True,
+        unique_fields=["address"],
+        update_fields=["latitude", "longitude", "status", "geocoded_at"],
+    )
+    return len(entries)
+
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart, across threads."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.next_at = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            at = max(now, self.next_at)
+            self.next_at = at + self.interval
+        if at > now:
+            time.sleep(at - now)
+
+
+def get_coordinates(address: str):
+    """
+    Returns (lat, lng) for a given address, or (None, None) if it can't be geocoded.
+    Reads the cache first; only an address that needs (re)geocoding costs a Google call,
+    and the answer is cached. Pages should use cached_coordinates() instead, which never blocks on Google.
+    """
+    if not address:
+        return None, None
+
+    entry = cache_entries([address]).get(normalize_address(address))
+    if not needs_geocoding(entry):
+        return (entry.latitude, entry.longitude) if entry.found else (None, None)
 
-    # You might want to log this
-    print("Geocoding error:", data.get("status"), "for", address)
-    return None, None
+    lat, lng, status = geocode_address(address)
+    store_geocodes([(address, lat, lng, status)])
+    return lat, lng
@@ -1,59 +1,35 @@
 # events/views.py
-from pathlib import Path
-import csv
-
-from django.conf import settings
 from django.shortcuts import render
+from django.views.decorators.http import require_GET
 
-from .utils import get_coordinates  # keep for fallback, or remove if not needed
+from .utils import cache_version, cached_coordinates, events_csv_path
+from api.clusters import cluster_response
+from api.snapshot import load_event_snapshot
 
 
 def index(request):
-    events = []
-
-    # Adjust if your CSV is in a different folder
-    csv_path = Path(settings.BASE_DIR) / "data_scripts" / "event_scraping" / "events_out.csv"
-
-    with csv_path.open(newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-
-        for row in reader:
-            # Core fields from your header
-            name = row.get("event_title") or "Untitled event"
-            address = row.get("address") or ""
-            date = row.get("start_local") or ""
-            city = row.get("city") or ""
-
-            # Try to use latitude/longitude from CSV first
-            lat = row.get("latitude")
-            lng = row.get("longitude")
-
-            try:
-                lat = float(lat) if lat not in (None, "", "NaN") else None
-                lng = float(lng) if lng not in (None, "", "NaN") else None
-            except ValueError:
-                lat, lng = None, None
-
-            # Optional: only show London events
-            # if city and city.lower() != "london":
-            #     continue
-
-            # Fallback: geocode if coords are missing but we have an address
-            if (lat is None or lng is None) and address:
-                lat, lng = get_coordinates(address)
-
-            # If we still don't have coords, skip this event (can't map it)
-            if lat is None or lng is None:
-                continue
-
-            events.append(
-                {
-                    "name": name,
-                    "address": address or f"{row.get('venue_name', '')}, {city}",
-                    "date": date,
-                    "lat": lat,
-                    "lng": lng,
-                }
-            )
-
-    return render(request, "events/map.html", {"events": events})
+    # The page doesn't carry the events: the map fetches the clusters and events in its viewport
+    # from event_clusters. ?lat=&lng= centres the map there.
+    try:
+        center = {"lat": float(request.GET["lat"]), "lng": float(request.GET["lng"])}
+    except (KeyError, ValueError):
+        center = None
+
+    return render(request, "events/map.html", {"map_center": center})
+
+
+def events_snapshot():
+    # Parsed once per version of the file (mtime + size), not on every request.
+    # Rows with an address but no coordinates get them from the geocode cache, never from Google
+    # (fill the cache with `manage.py geocode_events`). The snapshot is re-parsed when the cache changes.
+    # Rows that still have no coordinates are skipped (they can't be mapped).
+    return load_event_snapshot(events_csv_path(), geocode=cached_coordinates, version=cache_version())
+
+
+@require_GET
+def event_clusters(request):
+    """
+    The map at one zoom: ?zoom=Z&bbox=south,west,north,east.
+    Clusters (with event counts) and single events, precomputed per zoom (see api/clusters.py).
+    """
+    return cluster_response(request, events_snapshot(), cache_control="public, no-cache")
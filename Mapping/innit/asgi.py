@@ -8,9 +8,14 @@ https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
 
 import os
+import sys
+from pathlib import Path
 
 from django.core.asgi import get_asgi_application
 
+# The shared map helpers in api/ live at the repository root (see manage.py)
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'innit.settings')
 
 application = get_asgi_application()
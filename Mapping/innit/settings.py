@@ -123,6 +123,9 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# The map's script is shared with the accounts project: api/static/api/event_map.js at the repository root
+STATICFILES_DIRS = [BASE_DIR.parent / 'api' / 'static']
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -6,6 +6,9 @@ import sys
 
 def main():
     """Run administrative tasks."""
+    # The shared map helpers (api.snapshot, api.viewport, api.clusters ...) live at the repository root.
+    # Appended after this directory so Mapping's own events app still wins over the root one
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'innit.settings')
     try:
         from django.core.management import execute_from_command_line
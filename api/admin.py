@@ -3,7 +3,7 @@ from .models import Event
 
 @admin.register(Event)
 class EventAdmin(admin.ModelAdmin):
-    list_display = ("id", "title", "location", "date_start", "ai_score", "show_ai_tags")
+    list_display = ("id", "title", "location", "starts_at", "ai_score", "show_ai_tags")
 
     def show_ai_tags(self, obj):
         return ", ".join(obj.ai_tags or [])
@@ -1,6 +1,22 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def repair_search_index(sender, using="default", **kwargs):
+    "Puts back search triggers dropped when a migration rebuilt api_event or ingestion_rawpost, and refills the index."
+    from django.db import connections
+
+    from api.search import install_search_index, missing_search_triggers
+
+    if missing_search_triggers(connections[using]):
+        install_search_index(connections[using])
 
 
 class ApiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "api"
+
+    def ready(self):
+        import api.signals
+
+        post_migrate.connect(repair_search_index, sender = self)
@@ -0,0 +1,237 @@
+import math
+import threading
+
+try:
+    import numpy as np
+except ImportError: #optional: the pure-Python build gives the same clusters, just slower
+    np = None
+
+from django.http import HttpResponseBadRequest
+
+from api.geo import in_bbox, sample_in_cells
+from api.viewport import (
+    COORD_SCALE, MAX_VIEWPORT_EVENTS, PAYLOAD_VERSION, cached_json_response, delta_encode, encode_points, request_bbox,
+)
+
+#Marker clusters for an EventSnapshot (api/snapshot.py), precomputed for every zoom level.
+#Events are projected to Web Mercator (what Google Maps draws) and grouped into square cells
+#CLUSTER_CELL_PX screen pixels wide at each zoom. A cell at zoom z is exactly four cells at z + 1, so the
+#levels nest and each is built from the one below it: a cluster is the union of its child clusters, the
+#same hierarchy supercluster builds, but on a grid so every level is one vectorized grouping pass.
+#A cluster sits at the mean position of its events. Above MAX_CLUSTER_ZOOM events are sent as they are.
+#
+#The index hangs off the snapshot, so it is rebuilt exactly when the snapshot is (CSV or geocode cache changed).
+#A response has at most one cluster or event per cell on screen, so its size follows the viewport, not the data.
+
+MIN_ZOOM = 0
+MAX_CLUSTER_ZOOM = 16
+
+CLUSTER_CELL_PX = 64
+TILE_PX = 256
+
+#cells per side of the world at MAX_CLUSTER_ZOOM
+_GRID = TILE_PX * 2 ** MAX_CLUSTER_ZOOM // CLUSTER_CELL_PX
+
+_MAX_MERCATOR_LAT = 85.05112878
+
+_lock = threading.Lock()
+
+
+def mercator(lat, lng):
+    "(x, y) in [0, 1] Web Mercator units (y grows southwards), for floats or NumPy arrays."
+    if np is not None and isinstance(lat, np.ndarray):
+        sinLat = np.sin(np.radians(np.clip(lat, -_MAX_MERCATOR_LAT, _MAX_MERCATOR_LAT)))
+        return (lng + 180.0) / 360.0, 0.5 - np.log((1 + sinLat) / (1 - sinLat)) / (4 * math.pi)
+    sinLat = math.sin(math.radians(min(max(lat, -_MAX_MERCATOR_LAT), _MAX_MERCATOR_LAT)))
+    return (lng + 180.0) / 360.0, 0.5 - math.log((1 + sinLat) / (1 - sinLat)) / (4 * math.pi)
+
+
+def unmercator(x, y):
+    "(lat, lng) for Web Mercator (x, y), for floats or NumPy arrays."
+    if np is not None and isinstance(y, np.ndarray):
+        return np.degrees(np.arctan(np.sinh(math.pi * (1 - 2 * y)))), x * 360.0 - 180.0
+    return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y)))), x * 360.0 - 180.0
+
+
+class ClusterLevel:
+    """The clusters at one zoom, as parallel columns: position, size (events), an event in the cluster
+    (the event itself when size is 1) and the zoom at which the cluster splits into several."""
+
+    def __init__(self, lats, lngs, sizes, firsts, expands):
+        self.lats = lats
+        self.lngs = lngs
+        self.sizes = sizes
+        self.firsts = firsts
+        self.expands = expands
+
+    def __len__(self):
+        return len(self.sizes)
+
+
+class ClusterIndex:
+    "ClusterLevel for every zoom from MIN_ZOOM to MAX_CLUSTER_ZOOM."
+
+    def __init__(self, levels):
+        self.levels = levels
+
+    def level(self, zoom):
+        return self.levels[zoom - MIN_ZOOM]
+
+
+def _build_numpy(snapshot):
+    lats = np.asarray(snapshot.lats, dtype = float)
+    x, y = mercator(lats, np.asarray(snapshot.lngs, dtype = float))
+
+    #level MAX_CLUSTER_ZOOM from the events; every level after that from the one before it
+    cellX = np.clip((x * _GRID).astype(np.int64), 0, _GRID - 1)
+    cellY = np.clip((y * _GRID).astype(np.int64), 0, _GRID - 1)
+    sumX, sumY = x, y
+    sizes = np.ones(len(x), dtype = np.int64)
+    firsts = np.arange(len(x))
+    expands = np.full(len(x), MAX_CLUSTER_ZOOM + 1)
+
+    levels = []
+    for zoom in range(MAX_CLUSTER_ZOOM, MIN_ZOOM - 1, -1):
+        if zoom < MAX_CLUSTER_ZOOM:
+            cellX, cellY = cellX >> 1, cellY >> 1
+        _, first, inverse, children = np.unique(
+            cellX * _GRID + cellY, return_index = True, return_inverse = True, return_counts = True
+        )
+        sumX = np.bincount(inverse, weights = sumX)
+        sumY = np.bincount(inverse, weights = sumY)
+        sizes = np.bincount(inverse, weights = sizes).astype(np.int64)
+        #a cluster made of one child splits when that child does; otherwise one zoom in
+        expands = np.where(children > 1, zoom + 1, expands[first])
+        firsts = firsts[first]
+        cellX, cellY = cellX[first], cellY[first]
+
+        clusterLats, clusterLngs = unmercator(sumX / sizes, sumY / sizes)
+        #single events keep their exact coordinates
+        single = sizes == 1
+        clusterLats[single] = lats[firsts[single]]
+        clusterLngs[single] = np.asarray(snapshot.lngs, dtype = float)[firsts[single]]
+        levels.append(ClusterLevel(clusterLats, clusterLngs, sizes, firsts, expands))
+
+    return ClusterIndex(levels[::-1])
+
+
+def _build_python(snapshot):
+    #cell -> [(sum x, sum y, size, first event, expand zoom)] for the events (then child clusters) in it
+    cells = {}
+    for i, (lat, lng) in enumerate(zip(snapshot.lats, snapshot.lngs)):
+        x, y = mercator(lat, lng)
+        cell = (min(max(int(x * _GRID), 0), _GRID - 1), min(max(int(y * _GRID), 0), _GRID - 1))
+        cells.setdefault(cell, []).append((x, y, 1, i, MAX_CLUSTER_ZOOM + 1))
+
+    levels = []
+    for zoom in range(MAX_CLUSTER_ZOOM, MIN_ZOOM - 1, -1):
+        if zoom < MAX_CLUSTER_ZOOM:
+            parents = {}
+            for (cx, cy), members in cells.items():
+                parents.setdefault((cx >> 1, cy >> 1), []).append(members)
+            cells = parents
+        else:
+            cells = {cell: [members] for cell, members in cells.items()}
+
+        merged = {}
+        clusterLats, clusterLngs, sizes, firsts, expands = [], [], [], [], []
+        for cell in sorted(cells):
+            children = [c for group in cells[cell] for c in group]
+            sumX = sum(c[0] for c in children)
+            sumY = sum(c[1] for c in children)
+            size = sum(c[2] for c in children)
+            first = children[0][3]
+            expand = zoom + 1 if len(children) > 1 else children[0][4]
+            merged[cell] = [(sumX, sumY, size, first, expand)]
+
+            if size == 1:
+                lat, lng = snapshot.lats[first], snapshot.lngs[first]
+            else:
+                lat, lng = unmercator(sumX / size, sumY / size)
+            clusterLats.append(lat)
+            clusterLngs.append(lng)
+            sizes.append(size)
+            firsts.append(first)
+            expands.append(expand)
+        cells = merged
+        levels.append(ClusterLevel(clusterLats, clusterLngs, sizes, firsts, expands))
+
+    return ClusterIndex(levels[::-1])
+
+
+def build_cluster_index(snapshot):
+    "Clusters of every zoom level for the snapshot's events."
+    return _build_numpy(snapshot) if np is not None else _build_python(snapshot)
+
+
+def cluster_index(snapshot):
+    "The snapshot's ClusterIndex, built on first use."
+    if snapshot.clusters is None:
+        with _lock:
+            if snapshot.clusters is None:
+                snapshot.clusters = build_cluster_index(snapshot)
+    return snapshot.clusters
+
+
+def encode_clusters(snapshot, zoom, bbox, limit=MAX_VIEWPORT_EVENTS):
+    """The payload for a map at zoom showing bbox: "clusters" (position, size, expand zoom) and "points"
+    (single events, same columns as api/viewport.py), both sorted by latitude with delta-encoded coordinates.
+    At most limit clusters and points together."""
+
+    clusters, points, total, truncated = [], [], 0, False
+    if snapshot is not None and len(snapshot):
+        if zoom > MAX_CLUSTER_ZOOM:
+            points = [int(i) for i in in_bbox(snapshot.lats, snapshot.lngs, *bbox)]
+            total = len(points)
+            if total > limit:
+                points = sample_in_cells(snapshot.lats, snapshot.lngs, points, *bbox, limit)
+                truncated = True
+        else:
+            level = cluster_index(snapshot).level(zoom)
+            inside = [int(i) for i in in_bbox(level.lats, level.lngs, *bbox)]
+            total = sum(int(level.sizes[i]) for i in inside)
+            if len(inside) > limit:
+                #a box far bigger than the screen at this zoom: the first cluster of each cell of a coarser grid
+                inside = sample_in_cells(level.lats, level.lngs, inside, *bbox, limit)
+                truncated = True
+            for i in inside:
+                size = int(level.sizes[i])
+                if size == 1:
+                    points.append(int(level.firsts[i]))
+                else:
+                    clusters.append((
+                        round(level.lats[i] * COORD_SCALE), round(level.lngs[i] * COORD_SCALE), size, int(level.expands[i]),
+                    ))
+
+    clusters.sort()
+    return {
+        "v": PAYLOAD_VERSION,
+        "zoom": zoom,
+        "bbox": list(bbox),
+        "total": total,
+        "truncated": truncated,
+        "scale": COORD_SCALE,
+        "clusters": {
+            "count": len(clusters),
+            "lat": delta_encode([c[0] for c in clusters]),
+            "lng": delta_encode([c[1] for c in clusters]),
+            "size": [c[2] for c in clusters],
+            "expand": [c[3] for c in clusters],
+        },
+        "points": encode_points(snapshot, points),
+    }
+
+
+def cluster_response(request, snapshot, cache_control="private, no-cache"):
+    """Answers GET ?zoom=Z&bbox=south,west,north,east with the snapshot's clusters and single events for
+    that map view (snapshot may be None: nothing). ETag, 304 and gzip as api/viewport.py."""
+
+    try:
+        bbox = request_bbox(request)
+        zoom = min(max(int(request.GET.get("zoom", "")), MIN_ZOOM), MAX_CLUSTER_ZOOM + 1)
+    except ValueError:
+        return HttpResponseBadRequest("Invalid zoom or bbox: expected zoom=Z&bbox=south,west,north,east")
+
+    return cached_json_response(
+        request, snapshot, ("clusters", zoom, bbox), lambda: encode_clusters(snapshot, zoom, bbox), cache_control,
+    )
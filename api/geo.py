@@ -0,0 +1,157 @@
+import heapq
+import math
+
+try:
+    import numpy as np
+except ImportError: #optional: everything below has a pure-Python path with the same results
+    np = None
+
+#Distance, bearing and nearest-K over many points at once.
+#With NumPy the maths runs over whole coordinate arrays and the K nearest are picked with argpartition
+#(no full sort); without it the same functions loop in Python. No Django imports, so the Mapping
+#project and scripts can use it too.
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def has_numpy():
+    return np is not None
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    "Great-circle distance in km between two lat/lon points."
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = math.radians(lat2 - lat1)
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2.0) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2.0) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0)))
+
+
+def bearing_deg(lat1, lon1, lat2, lon2):
+    "Initial compass bearing in degrees from one point to another."
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dlambda = math.radians(lon2 - lon1)
+    y = math.sin(dlambda) * math.cos(phi2)
+    x = math.cos(phi1) * math.sin(phi2) - math.sin(phi1) * math.cos(phi2) * math.cos(dlambda)
+    return math.degrees(math.atan2(y, x)) % 360.0
+
+
+def as_array(values):
+    "Coordinates as a float array (no copy for a float64 ndarray or array('d')), or a list without NumPy."
+    if np is None:
+        return [float(v) for v in values]
+    return np.asarray(values, dtype = float)
+
+
+def distances_km(lat, lon, lats, lons):
+    "Great-circle distance in km from (lat, lon) to every (lats[i], lons[i])."
+
+    if np is None:
+        return [haversine_km(lat, lon, la, lo) for la, lo in zip(lats, lons)]
+
+    phi1 = math.radians(lat)
+    phi2 = np.radians(as_array(lats))
+    dphi = phi2 - phi1
+    dlambda = np.radians(as_array(lons)) - math.radians(lon)
+    a = np.sin(dphi / 2.0) ** 2 + math.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2.0) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def bearings_deg(lat, lon, lats, lons):
+    "Initial compass bearing in degrees (0 = north, 90 = east) from (lat, lon) to every point."
+
+    if np is None:
+        return [bearing_deg(lat, lon, la, lo) for la, lo in zip(lats, lons)]
+
+    phi1 = math.radians(lat)
+    phi2 = np.radians(as_array(lats))
+    dlambda = np.radians(as_array(lons)) - math.radians(lon)
+    y = np.sin(dlambda) * np.cos(phi2)
+    x = math.cos(phi1) * np.sin(phi2) - math.sin(phi1) * np.cos(phi2) * np.cos(dlambda)
+    return np.degrees(np.arctan2(y, x)) % 360.0
+
+
+def nearest(lat, lon, lats, lons, k=None, max_km=None):
+    """[(index, distance km)] of the k points nearest to (lat, lon), nearest first (ties by index).
+    k=None keeps every point; max_km drops points farther than that."""
+
+    d = distances_km(lat, lon, lats, lons)
+
+    if np is None:
+        pairs = [(km, i) for i, km in enumerate(d) if max_km is None or km <= max_km]
+        pairs = sorted(pairs) if k is None else heapq.nsmallest(k, pairs)
+        return [(i, km) for km, i in pairs]
+
+    idx = np.arange(len(d)) if max_km is None else np.flatnonzero(d <= max_km)
+    if k is not None and k < len(idx):
+        if k <= 0:
+            return []
+        #the k smallest distances, unordered, in O(n); only those k get sorted.
+        #Points tied with the k-th distance may be cut arbitrarily, so take every point up to it and trim after sorting
+        kth = d[idx[np.argpartition(d[idx], k - 1)[k - 1]]]
+        idx = idx[d[idx] <= kth]
+    order = idx[np.lexsort((idx, d[idx]))][:k]
+    return [(int(i), float(d[i])) for i in order]
+
+
+def nearest_items(items, lat, lon, k=None, max_km=None, latKey="lat", lonKey="lng"):
+    """The k map items (dicts with latKey/lonKey) nearest to (lat, lon), nearest first, as copies with
+    distance_km and bearing added. Items without coordinates are left out."""
+
+    located = [item for item in items if item.get(latKey) is not None and item.get(lonKey) is not None]
+    if not located:
+        return []
+    lats = as_array([item[latKey] for item in located])
+    lons = as_array([item[lonKey] for item in located])
+
+    found = nearest(lat, lon, lats, lons, k, max_km)
+    picked = [i for i, _ in found]
+    #bearings only for the items that are kept
+    bearings = bearings_deg(lat, lon, [lats[i] for i in picked], [lons[i] for i in picked])
+    return [
+        dict(located[i], distance_km = round(km, 3), bearing = round(float(b), 1))
+        for (i, km), b in zip(found, bearings)
+    ]
+
+
+def in_bbox(lats, lons, south, west, north, east):
+    "Indices of the points inside the box (edges included), in order (an int array with NumPy)."
+
+    if np is None:
+        return [
+            i for i, (la, lo) in enumerate(zip(lats, lons))
+            if south <= la <= north and west <= lo <= east
+        ]
+
+    lats = as_array(lats)
+    lons = as_array(lons)
+    inside = (lats >= south) & (lats <= north) & (lons >= west) & (lons <= east)
+    return np.flatnonzero(inside)
+
+
+def sample_in_cells(lats, lons, indices, south, west, north, east, limit):
+    """At most limit of indices (points inside the box), spread over the box: it is cut into a grid of at most
+    limit cells and the first point (lowest index) of each cell is kept. The same box always gives the same
+    sample, in index order."""
+
+    if limit <= 0:
+        return []
+    side = max(math.isqrt(limit), 1)
+    latSpan, lonSpan = (north - south) or 1.0, (east - west) or 1.0
+
+    if np is None:
+        first = {}
+        for i in sorted(indices):
+            row = min(int((lats[i] - south) * side / latSpan), side - 1)
+            col = min(int((lons[i] - west) * side / lonSpan), side - 1)
+            first.setdefault((row, col), i)
+        return sorted(first.values())
+
+    indices = np.sort(np.asarray(indices, dtype = int))
+    rows = np.minimum(((as_array(lats)[indices] - south) * side / latSpan).astype(int), side - 1)
+    cols = np.minimum(((as_array(lons)[indices] - west) * side / lonSpan).astype(int), side - 1)
+    #np.unique gives where each cell first occurs; indices are sorted, so that's its lowest index
+    _, firsts = np.unique(rows * side + cols, return_index = True)
+    return [int(i) for i in np.sort(indices[firsts])]
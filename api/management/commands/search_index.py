@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from api.search import install_search_index, optimize_search_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild or optimize the full-text search index over Events and RawPost captions"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Recreate missing tables/triggers and refill the index from the Event and RawPost tables",
+        )
+        parser.add_argument(
+            "--optimize",
+            action="store_true",
+            help="Merge the SQLite index segments (worth running after a large import)",
+        )
+
+    def handle(self, *args, **options):
+        if not options["rebuild"] and not options["optimize"]:
+            self.stdout.write("Nothing to do: pass --rebuild and/or --optimize")
+            return
+
+        if options["rebuild"]:
+            install_search_index()
+            self.stdout.write(self.style.SUCCESS("Rebuilt the search index"))
+        if options["optimize"]:
+            optimize_search_index()
+            self.stdout.write(self.style.SUCCESS("Optimized the search index"))
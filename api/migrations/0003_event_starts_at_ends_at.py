@@ -0,0 +1,73 @@
+# Generated by Django 5.2.7 on 2026-10-17 20:03
+
+from datetime import datetime
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+BATCH_SIZE = 1000
+
+
+def parse(value):
+    # Same rules as api.models.parse_event_datetime, copied so this migration never changes
+    if not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+    if settings.USE_TZ and timezone.is_naive(dt):
+        dt = timezone.make_aware(dt)
+    return dt
+
+
+def backfill_event_times(apps, schema_editor):
+    """Fills starts_at/ends_at from the date_start/date_end strings, BATCH_SIZE events at a time
+    (keyset on id, so memory and each UPDATE stay small however many events there are).
+    """
+    Event = apps.get_model("api", "Event")
+    last_id = 0
+    while True:
+        batch = list(
+            Event.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .only("id", "date_start", "date_end")[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        changed = []
+        for event in batch:
+            event.starts_at = parse(event.date_start)
+            event.ends_at = parse(event.date_end)
+            if event.starts_at or event.ends_at:
+                changed.append(event)
+        Event.objects.bulk_update(changed, ["starts_at", "ends_at"])
+        last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0002_event_ai_tags"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="event",
+            name="ends_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="event",
+            name="starts_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                fields=["starts_at", "ends_at"], name="event_window_idx"
+            ),
+        ),
+        migrations.RunPython(backfill_event_times, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,108 @@
+# Generated by Django 5.2.7 on 2026-10-17 20:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def backfill_event_tags(apps, schema_editor):
+    """Builds the EventTag index from Event.ai_tags, BATCH_SIZE events at a time.
+    Names are normalized and length-checked the same way as api.services.event_tag_names (copied so this migration never changes).
+    """
+    Event = apps.get_model("api", "Event")
+    Tag = apps.get_model("api", "Tag")
+    EventTag = apps.get_model("api", "EventTag")
+
+    last_id = 0
+    while True:
+        batch = list(
+            Event.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .values_list("id", "ai_tags")[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        last_id = batch[-1][0]
+
+        names_by_event = {}
+        for event_id, tags in batch:
+            names = (str(t).strip().lower() for t in (tags or []) if t is not None)
+            names_by_event[event_id] = list(dict.fromkeys(n for n in names if n and len(n) <= 64))
+
+        all_names = {n for names in names_by_event.values() for n in names}
+        if not all_names:
+            continue
+        Tag.objects.bulk_create([Tag(name=n) for n in all_names], ignore_conflicts=True)
+        tag_ids = dict(Tag.objects.filter(name__in=all_names).values_list("name", "id"))
+        EventTag.objects.bulk_create(
+            [
+                EventTag(event_id=event_id, tag_id=tag_ids[n])
+                for event_id, names in names_by_event.items()
+                for n in names
+            ],
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0003_event_starts_at_ends_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Tag",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=64, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="EventTag",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "event",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="tag_links",
+                        to="api.event",
+                    ),
+                ),
+                (
+                    "tag",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="event_links",
+                        to="api.tag",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("tag", "event"), name="eventtag_tag_event_uniq"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_event_tags, migrations.RunPython.noop),
+    ]
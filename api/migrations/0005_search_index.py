@@ -0,0 +1,26 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    "FTS5 tables + triggers on SQLite, GIN indexes on Postgres (see api/search.py), filled from the existing rows."
+    from api.search import install_search_index
+
+    install_search_index(schema_editor.connection)
+
+
+def drop_search_index(apps, schema_editor):
+    from api.search import drop_search_index
+
+    drop_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0004_tag_eventtag"),
+        ("ingestion", "0002_rawpost_processed_id_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,101 @@
+# Generated by Django 5.2.7 on 2026-10-17 20:10
+
+import json
+import math
+
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+# Copies of api.spatial.GRID_CELL_DEGREES / geocell / coordinates_from_raw_json, so this migration never changes
+GRID_CELL_DEGREES = 0.01
+GRID_COLUMNS = round(360 / GRID_CELL_DEGREES)
+
+
+def _geocell(lat, lon):
+    row = int(math.floor((lat + 90) / GRID_CELL_DEGREES))
+    column = min(int(math.floor((lon + 180) / GRID_CELL_DEGREES)), GRID_COLUMNS - 1)
+    return row * GRID_COLUMNS + column
+
+
+def _coordinates(raw_json):
+    if isinstance(raw_json, str):
+        try:
+            raw_json = json.loads(raw_json)
+        except ValueError:
+            return None
+    if not isinstance(raw_json, dict):
+        return None
+    lat = raw_json.get("latitude", raw_json.get("lat"))
+    lon = raw_json.get("longitude", raw_json.get("lng", raw_json.get("lon")))
+    try:
+        lat, lon = float(lat), float(lon)
+    except (TypeError, ValueError):
+        return None
+    if math.isnan(lat) or math.isnan(lon) or (lat, lon) == (0.0, 0.0):
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None
+    return lat, lon
+
+
+def backfill_event_locations(apps, schema_editor):
+    """Copies coordinates onto existing Events from the scraped row (RawPost.raw_json) of a candidate
+    promoted to them, BATCH_SIZE candidates at a time."""
+    EventCandidate = apps.get_model("classification", "EventCandidate")
+    Event = apps.get_model("api", "Event")
+
+    last_id = 0
+    while True:
+        batch = list(
+            EventCandidate.objects.filter(id__gt=last_id, promoted_event__isnull=False)
+            .order_by("id")
+            .values_list("id", "promoted_event_id", "raw_post__raw_json")[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        last_id = batch[-1][0]
+
+        located = {}
+        for _, event_id, raw_json in batch:
+            coords = _coordinates(raw_json)
+            if coords and event_id not in located:
+                located[event_id] = coords
+
+        for event_id, (lat, lon) in located.items():
+            Event.objects.filter(id=event_id, latitude__isnull=True).update(
+                latitude=lat, longitude=lon, geocell=_geocell(lat, lon)
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0005_search_index"),
+        ("classification", "0007_eventcandidate_candidate_review_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="event",
+            name="geocell",
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="event",
+            name="latitude",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="event",
+            name="longitude",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                fields=["geocell", "latitude", "longitude"], name="event_geocell_idx"
+            ),
+        ),
+        migrations.RunPython(backfill_event_locations, migrations.RunPython.noop),
+    ]
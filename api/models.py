@@ -1,4 +1,26 @@
+from datetime import datetime
+
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
+
+
+def parse_event_datetime(value):
+    """Turns an ISO string from the extractors (naive, local time) into a datetime for starts_at/ends_at.
+    Returns None if value is empty or not a date."""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        dt = value
+    else:
+        try:
+            dt = datetime.fromisoformat(str(value))
+        except ValueError:
+            return None
+    if settings.USE_TZ and timezone.is_naive(dt):
+        dt = timezone.make_aware(dt)
+    return dt
+
 
 # Create your models here.
 class Event(models.Model):
@@ -6,6 +28,9 @@ class Event(models.Model):
     description = models.TextField(blank = True)
     date_start = models.CharField(max_length = 32, blank = True, null = True)
     date_end = models.CharField(max_length = 32, blank = True, null = True)
+    #Typed copies of date_start/date_end, so time-window queries are index range scans (see api/selectors.py)
+    starts_at = models.DateTimeField(blank = True, null = True)
+    ends_at = models.DateTimeField(blank = True, null = True)
     location = models.CharField(max_length = 120, blank = True, null = True)
     price_min = models.FloatField(blank = True, null = True)
     price_max = models.FloatField(blank = True, null = True)
@@ -13,4 +38,38 @@ class Event(models.Model):
     ai_score = models.FloatField(default=0.0)
     created_at = models.DateTimeField(auto_now_add = True)
     ai_tags = models.JSONField(default=list, blank=True, null=True)
+    latitude = models.FloatField(blank = True, null = True)
+    longitude = models.FloatField(blank = True, null = True)
+    #grid cell of (latitude, longitude), set on save (see api/spatial.py)
+    geocell = models.IntegerField(blank = True, null = True)
+
+    class Meta:
+        indexes = [
+            #window queries range over starts_at and check ends_at from the same index
+            models.Index(fields = ["starts_at", "ends_at"], name = "event_window_idx"),
+            #radius queries range over geocell and read the coordinates from the same index
+            models.Index(fields = ["geocell", "latitude", "longitude"], name = "event_geocell_idx"),
+        ]
+
+
+class Tag(models.Model):
+    #Dictionary of tag names (the strings in Event.ai_tags), so events can be looked up by integer tag id
+    name = models.CharField(max_length = 64, unique = True)
+
+    def __str__(self):
+        return self.name
+
+
+class EventTag(models.Model):
+    #Inverted index: one row per (tag, event), kept in step with Event.ai_tags (see api/services.py)
+    tag = models.ForeignKey(Tag, on_delete = models.CASCADE, related_name = "event_links")
+    event = models.ForeignKey(Event, on_delete = models.CASCADE, related_name = "tag_links")
+
+    class Meta:
+        constraints = [
+            #also the index tag filters scan: all events for a tag id, without touching the table
+            models.UniqueConstraint(fields = ["tag", "event"], name = "eventtag_tag_event_uniq"),
+        ]
 
+    def __str__(self):
+        return f"{self.tag_id} -> Event {self.event_id}"
@@ -0,0 +1,212 @@
+import re
+
+from django.db import connection
+
+from api.models import Event
+
+#Full-text search over Event.title/description and RawPost.caption.
+#On SQLite the text lives in FTS5 tables that point at the real rows (content=...), kept in step by
+#triggers, so bulk_create, raw UPDATEs and deletes are all covered without signals.
+#On Postgres the same job is done by GIN indexes over to_tsvector(); queries must use the exact
+#expressions below or the planner won't pick the index.
+#Either way a search is an index lookup plus ranking of the matching rows, not a scan of every caption.
+
+SEARCH_LIMIT = 20
+
+_SQLITE_TABLES = {
+    #fts table: (content table, indexed columns)
+    "api_event_fts": ("api_event", ("title", "description")),
+    "ingestion_rawpost_fts": ("ingestion_rawpost", ("caption",)),
+}
+
+_POSTGRES_VECTORS = {
+    "api_event": "to_tsvector('english', coalesce(title, '') || ' ' || coalesce(description, ''))",
+    "ingestion_rawpost": "to_tsvector('english', coalesce(caption, ''))",
+}
+
+#bm25 column weights for api_event_fts: a word in the title counts more than one in the description
+_EVENT_WEIGHTS = (10.0, 1.0)
+
+_WORD_RX = re.compile(r"\w+", re.UNICODE)
+
+
+def _sqlite_triggers(fts, table, columns):
+    cols = ", ".join(columns)
+    new = ", ".join(f"new.{c}" for c in columns)
+    old = ", ".join(f"old.{c}" for c in columns)
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); END",
+        #only when the text changes, so updates to prices, times etc. don't touch the index
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END",
+    ]
+
+
+_fts5_by_alias = {}
+
+
+def fts5_available(conn=None):
+    "True if this SQLite build has FTS5 (checked once per database alias)."
+    conn = conn or connection
+    if conn.vendor != "sqlite":
+        return False
+    if conn.alias not in _fts5_by_alias:
+        with conn.cursor() as db:
+            db.execute("PRAGMA compile_options")
+            _fts5_by_alias[conn.alias] = "ENABLE_FTS5" in {row[0] for row in db.fetchall()}
+    return _fts5_by_alias[conn.alias]
+
+
+def install_search_index(conn=None, rebuild=True):
+    """Creates the full-text tables/indexes and their triggers if they are missing.
+    With rebuild=True the SQLite tables are refilled from the content tables (needed after creating them,
+    or after a migration rebuilt api_event/ingestion_rawpost and dropped the triggers with the old table)."""
+
+    conn = conn or connection
+    with conn.cursor() as db:
+        if conn.vendor == "postgresql":
+            for table, vector in _POSTGRES_VECTORS.items():
+                db.execute(f"CREATE INDEX IF NOT EXISTS {table}_search_idx ON {table} USING GIN ({vector})")
+            return
+
+        if not fts5_available(conn):
+            return
+
+        for fts, (table, columns) in _SQLITE_TABLES.items():
+            db.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+                #prefix='2 3': extra index entries for 2- and 3-letter prefixes, so search-as-you-type stays cheap
+                f"{', '.join(columns)}, content='{table}', content_rowid='id', "
+                f"tokenize='porter unicode61 remove_diacritics 2', prefix='2 3')"
+            )
+            for sql in _sqlite_triggers(fts, table, columns):
+                db.execute(sql)
+            if rebuild:
+                db.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def drop_search_index(conn=None):
+    conn = conn or connection
+    with conn.cursor() as db:
+        if conn.vendor == "postgresql":
+            for table in _POSTGRES_VECTORS:
+                db.execute(f"DROP INDEX IF EXISTS {table}_search_idx")
+        elif conn.vendor == "sqlite":
+            for fts in _SQLITE_TABLES:
+                for suffix in ("ai", "ad", "au"):
+                    db.execute(f"DROP TRIGGER IF EXISTS {fts}_{suffix}")
+                db.execute(f"DROP TABLE IF EXISTS {fts}")
+
+
+def missing_search_triggers(conn=None):
+    """Names of the triggers of existing SQLite search tables that are gone.
+    Django rebuilds a SQLite table for some schema changes (copy, drop, rename), and dropping the old table drops its triggers."""
+    conn = conn or connection
+    if not fts5_available(conn):
+        return []
+    with conn.cursor() as db:
+        db.execute("SELECT type, name FROM sqlite_master WHERE type IN ('table', 'trigger')")
+        present = {(kind, name) for kind, name in db.fetchall()}
+    return sorted(
+        f"{fts}_{suffix}"
+        for fts in _SQLITE_TABLES if ("table", fts) in present
+        for suffix in ("ai", "ad", "au") if ("trigger", f"{fts}_{suffix}") not in present
+    )
+
+
+def optimize_search_index(conn=None):
+    "Merges the FTS5 b-trees into one, which keeps lookups fast after many small inserts."
+    conn = conn or connection
+    if fts5_available(conn):
+        with conn.cursor() as db:
+            for fts in _SQLITE_TABLES:
+                db.execute(f"INSERT INTO {fts}({fts}) VALUES ('optimize')")
+
+
+def fts_query(text):
+    """Turns what a user typed into a safe FTS5 query: every word must match, the last one as a prefix
+    ('jazz quart' -> '"jazz" "quart"*'). A single letter is never a prefix (it would match most of the index).
+    Returns '' if there are no words."""
+    words = _WORD_RX.findall((text or "").lower())
+    if not words:
+        return ""
+    terms = [f'"{w}"' for w in words]
+    if len(words[-1]) > 1:
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+def _search_sqlite(fts, query, limit, weights=(), snippet_column=None):
+    snippet = f", snippet({fts}, {snippet_column}, '[', ']', '…', 12)" if snippet_column is not None else ""
+    #every match is ranked; ORDER BY the built-in rank column lets FTS5 keep only the best limit rows
+    #instead of sorting all of them. "rank MATCH" picks the bm25 weights for this query alone.
+    sql = f"SELECT rowid, rank{snippet} FROM {fts} WHERE {fts} MATCH %s AND rank MATCH %s ORDER BY rank LIMIT %s"
+    with connection.cursor() as db:
+        db.execute(sql, [query, f"bm25({', '.join(str(w) for w in weights)})", limit])
+        return db.fetchall()
+
+
+def _search_postgres(table, text, limit, headline_column=None):
+    vector = _POSTGRES_VECTORS[table]
+    headline = (
+        f", ts_headline('english', {headline_column}, q, 'StartSel=[, StopSel=], MaxWords=12')"
+        if headline_column else ""
+    )
+    sql = (
+        f"SELECT id, ts_rank({vector}, q) AS rank{headline} "
+        f"FROM {table}, websearch_to_tsquery('english', %s) q "
+        f"WHERE {vector} @@ q ORDER BY rank DESC LIMIT %s"
+    )
+    with connection.cursor() as db:
+        db.execute(sql, [text, limit])
+        return db.fetchall()
+
+
+def search_events(text, limit=SEARCH_LIMIT):
+    """[(Event, rank)] for events whose title or description matches text, best match first.
+    Lower rank is better on SQLite (bm25), higher is better on Postgres (ts_rank); the order is what counts."""
+
+    query = fts_query(text)
+    if not query:
+        return []
+
+    if connection.vendor == "postgresql":
+        rows = _search_postgres("api_event", text, limit)
+    elif fts5_available():
+        rows = _search_sqlite("api_event_fts", query, limit, weights = _EVENT_WEIGHTS)
+    else:
+        #no full-text index on this database: slow scan, same result shape
+        events = Event.objects.filter(title__icontains = text) | Event.objects.filter(description__icontains = text)
+        return [(ev, 0.0) for ev in events.order_by("id")[:limit]]
+
+    byID = Event.objects.in_bulk([row[0] for row in rows])
+    return [(byID[row[0]], row[1]) for row in rows if row[0] in byID]
+
+
+def search_captions(text, limit=SEARCH_LIMIT):
+    """[{"id", "source", "rank", "snippet"}] for RawPosts whose caption matches text, best match first.
+    The snippet is the matching part of the caption with the hits in [brackets]."""
+
+    from ingestion.models import RawPost
+
+    query = fts_query(text)
+    if not query:
+        return []
+
+    if connection.vendor == "postgresql":
+        rows = _search_postgres("ingestion_rawpost", text, limit, headline_column = "caption")
+    elif fts5_available():
+        rows = _search_sqlite("ingestion_rawpost_fts", query, limit, snippet_column = 0)
+    else:
+        posts = RawPost.objects.filter(caption__icontains = text).order_by("id")[:limit]
+        rows = [(p.id, 0.0, p.caption[:120]) for p in posts]
+
+    sources = dict(RawPost.objects.filter(id__in = [row[0] for row in rows]).values_list("id", "source"))
+    return [
+        {"id": postID, "source": sources.get(postID), "rank": rank, "snippet": snippet}
+        for postID, rank, snippet in rows
+    ]
@@ -0,0 +1,80 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from api.models import Event, EventTag
+from api.services import get_tag_ids, normalize_tag
+
+#Read-side queries for Events.
+
+#Longest event the window queries expect. Overlap is checked as a range scan on starts_at from
+#(window start - this) to the window end; an event running longer than this is only found by windows it starts in.
+MAX_EVENT_DURATION = timedelta(hours = getattr(settings, "EVENT_MAX_DURATION_HOURS", 72))
+
+
+def events_overlapping(start, end, queryset=None):
+    """Events whose [starts_at, ends_at) overlaps the window [start, end), earliest first.
+    An event without ends_at counts as happening at its start time. Events without starts_at are never included."""
+
+    events = Event.objects.all() if queryset is None else queryset
+    return (
+        events.filter(starts_at__gte = start - MAX_EVENT_DURATION, starts_at__lt = end)
+        .filter(Q(ends_at__gt = start) | Q(ends_at__isnull = True, starts_at__gte = start))
+        .order_by("starts_at", "id")
+    )
+
+
+def upcoming_events(now=None, days=7, queryset=None):
+    "Events happening between now and days from now (including ones already under way)."
+    now = now or timezone.now()
+    return events_overlapping(now, now + timedelta(days = days), queryset)
+
+
+def _tag_ids(tags):
+    "Tag ids for the given names (unknown names have no id)."
+    return list(get_tag_ids({normalize_tag(t) for t in tags if t}).values())
+
+
+def events_with_any_tag(tags, queryset=None):
+    "Events tagged with at least one of tags, found through the (tag, event) index instead of decoding ai_tags."
+    events = Event.objects.all() if queryset is None else queryset
+    tagIDs = _tag_ids(tags)
+    if not tagIDs:
+        return events.none()
+    return events.filter(id__in = EventTag.objects.filter(tag_id__in = tagIDs).values("event_id"))
+
+
+def events_with_all_tags(tags, queryset=None):
+    "Events tagged with every one of tags."
+    events = Event.objects.all() if queryset is None else queryset
+    names = {normalize_tag(t) for t in tags if t}
+    tagIDs = _tag_ids(names)
+    if not names or len(tagIDs) < len(names): #a tag nobody has means nothing can match
+        return events.none()
+
+    matching = (
+        EventTag.objects.filter(tag_id__in = tagIDs)
+        .values("event_id")
+        .annotate(matched = Count("tag_id"))
+        .filter(matched = len(tagIDs))
+        .values("event_id")
+    )
+    return events.filter(id__in = matching)
+
+
+def tag_facets(queryset=None, limit=50):
+    """[(tag name, number of events)] for the events in queryset (default: all events), most common first.
+    Counted from the link table, so no ai_tags JSON is read."""
+
+    links = EventTag.objects.all()
+    if queryset is not None:
+        links = links.filter(event_id__in = queryset.values("id"))
+
+    return list(
+        links.values("tag__name")
+        .annotate(events = Count("event_id"))
+        .order_by("-events", "tag__name")
+        .values_list("tag__name", "events")[:limit]
+    )
@@ -0,0 +1,68 @@
+from django.db import transaction
+
+from api.models import EventTag, Tag
+
+#Keeps the EventTag inverted index in step with Event.ai_tags.
+
+
+def normalize_tag(name):
+    "Tag names are stored stripped and lowercased ('Drum-and-Bass ' -> 'drum-and-bass')."
+    return str(name).strip().lower()
+
+
+#Longest name a Tag can hold; longer ai_tags entries aren't indexed (Postgres would reject the insert)
+MAX_TAG_LENGTH = Tag._meta.get_field("name").max_length
+
+
+def event_tag_names(event):
+    "The normalized, de-duplicated tag names of an event, in order (names too long for Tag.name are skipped)."
+    names = (normalize_tag(t) for t in (event.ai_tags or []) if t is not None)
+    return list(dict.fromkeys(n for n in names if n and len(n) <= MAX_TAG_LENGTH))
+
+
+def get_tag_ids(names, create=False):
+    """Returns {name: tag id} for the given (normalized) names.
+    With create=True missing tags are added first; otherwise unknown names are left out."""
+
+    names = set(names)
+    if not names:
+        return {}
+
+    if create:
+        #ignore_conflicts: another process may add the same tag at the same time
+        Tag.objects.bulk_create([Tag(name = n) for n in names], ignore_conflicts = True)
+
+    return dict(Tag.objects.filter(name__in = names).values_list("name", "id"))
+
+
+def sync_event_tags(events):
+    """Makes the EventTag rows of events match their ai_tags: adds missing links and removes stale ones.
+    Works on any number of saved events with a fixed number of queries, so bulk_create paths can call it too.
+    Returns the ids of the events whose links changed."""
+
+    events = [ev for ev in events if ev.id is not None]
+    if not events:
+        return set()
+
+    namesByEvent = {ev.id: event_tag_names(ev) for ev in events}
+
+    with transaction.atomic():
+        tagIDs = get_tag_ids({n for names in namesByEvent.values() for n in names}, create = True)
+        wanted = {(eventID, tagIDs[n]) for eventID, names in namesByEvent.items() for n in names}
+        linkIDs = {
+            (eventID, tagID): linkID
+            for linkID, eventID, tagID in EventTag.objects.filter(event_id__in = namesByEvent).values_list("id", "event_id", "tag_id")
+        }
+        existing = set(linkIDs)
+
+        #one delete for the stale links of every event
+        stale = [linkIDs[pair] for pair in existing - wanted]
+        if stale:
+            EventTag.objects.filter(id__in = stale).delete()
+
+        EventTag.objects.bulk_create(
+            [EventTag(event_id = eventID, tag_id = tagID) for eventID, tagID in wanted - existing],
+            ignore_conflicts = True,
+        )
+
+    return {eventID for eventID, _ in existing ^ wanted}
@@ -0,0 +1,57 @@
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from api.models import Event, parse_event_datetime
+from api.services import sync_event_tags
+from api.spatial import geocell
+
+#Sent with events=[...] once new Events exist, whether saved one by one or bulk-created
+#(promote_candidates sends it itself). Other apps hang work for new events off this (e.g. user feeds).
+events_created = Signal()
+
+#Sent with events=[...] when saving existing Events changed their tags (the EventTag links), so work
+#derived from the tags can be redone (e.g. user feeds).
+events_retagged = Signal()
+
+
+#Keeps the tag index in step with Event.ai_tags (deletes cascade to it).
+#Paths that use bulk_create (promote_candidates) call sync_event_tags themselves.
+@receiver(post_save, sender=Event)
+
+def sync_tags_on_event_save(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    if raw: #loaddata
+        return
+    if update_fields is not None and "ai_tags" not in update_fields:
+        return
+    if sync_event_tags([instance]) and not created:
+        events_retagged.send(sender = Event, events = [instance])
+
+
+#The grid cell always follows the coordinates (bulk_create callers set it themselves, see candidate_event_fields).
+#A save(update_fields=...) that changes the coordinates has to list geocell as well.
+@receiver(pre_save, sender=Event)
+
+def set_event_geocell(sender, instance, **kwargs):
+    instance.geocell = geocell(instance.latitude, instance.longitude)
+
+
+#starts_at/ends_at follow date_start/date_end whenever those are set, however the event is saved
+#(bulk_create callers set them themselves, see candidate_event_fields). Events saved with only the
+#typed fields keep them. As with geocell, save(update_fields=...) has to list the typed fields too.
+@receiver(pre_save, sender=Event)
+
+def set_event_times(sender, instance, raw=False, **kwargs):
+    if raw: #loaddata
+        return
+    if instance.date_start:
+        instance.starts_at = parse_event_datetime(instance.date_start)
+    if instance.date_end:
+        instance.ends_at = parse_event_datetime(instance.date_end)
+
+
+
+@receiver(post_save, sender=Event)
+
+def announce_created_event(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        events_created.send(sender = Event, events = [instance])
@@ -0,0 +1,165 @@
+import csv
+import json
+import os
+import threading
+from array import array
+
+from api.geo import bearings_deg, nearest
+
+#In-memory snapshot of the scraped events CSV (data_scripts/event_scraping/events_out.csv) for the map pages.
+#The file is parsed once and kept per process; each request only stats it, and the snapshot is rebuilt
+#when the file's mtime or size (or the caller's version) changes. Only rows that can go on a map are kept.
+#Text columns are plain lists and coordinates are array('d') columns, which api.geo reads without copying.
+#No Django imports, so the Mapping project can use it too.
+
+_MISSING = (None, "", "NaN", "nan")
+
+#Same escapes as django.utils.html.json_script, so events_json() can be put inside a <script> tag
+_JSON_SCRIPT_ESCAPES = {ord(">"): "\\u003E", ord("<"): "\\u003C", ord("&"): "\\u0026"}
+
+
+def script_json(data):
+    "data as JSON that is safe inside <script type=\"application/json\"> (what json_script would output inside the tag)."
+    return json.dumps(data).translate(_JSON_SCRIPT_ESCAPES)
+
+
+def _coordinate(value):
+    if value in _MISSING:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+class EventSnapshot:
+    "The mappable events of one version of the CSV (columns of names, addresses, dates and coordinates)."
+
+    def __init__(self, path, mtime_ns, size, version=None):
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.version = version
+        self.names = []
+        self.addresses = []
+        self.dates = []
+        self.lats = array("d")
+        self.lngs = array("d")
+        self.skipped = 0 #rows without usable coordinates
+        self._events = None
+        self._json = None
+        self.payloads = {} #encoded viewport responses, see api/viewport.py
+        self.clusters = None #ClusterIndex, built on first use by api/clusters.py
+
+    @property
+    def stamp(self):
+        "What load_event_snapshot compares to decide whether this snapshot is still current."
+        return (self.mtime_ns, self.size, self.version)
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, name, address, date, lat, lng):
+        self.names.append(name)
+        self.addresses.append(address)
+        self.dates.append(date)
+        self.lats.append(lat)
+        self.lngs.append(lng)
+
+    def event(self, i):
+        return {
+            "name": self.names[i],
+            "address": self.addresses[i],
+            "date": self.dates[i],
+            "lat": self.lats[i],
+            "lng": self.lngs[i],
+        }
+
+    def events(self):
+        "Every mappable event as {name, address, date, lat, lng}. Built once and shared: don't modify it."
+        if self._events is None:
+            self._events = [self.event(i) for i in range(len(self))]
+        return self._events
+
+    def events_json(self):
+        "events() as JSON that is safe inside <script type=\"application/json\">, serialized once."
+        if self._json is None:
+            self._json = script_json(self.events())
+        return self._json
+
+    def nearest(self, lat, lng, k=None, max_km=None):
+        "The k events nearest to (lat, lng), nearest first, as new dicts with distance_km and bearing."
+        found = nearest(lat, lng, self.lats, self.lngs, k, max_km)
+        picked = [i for i, _ in found]
+        bearings = bearings_deg(lat, lng, [self.lats[i] for i in picked], [self.lngs[i] for i in picked])
+        return [
+            dict(self.event(i), distance_km = round(km, 3), bearing = round(float(b), 1))
+            for (i, km), b in zip(found, bearings)
+        ]
+
+
+def parse_events_csv(path, mtime_ns=0, size=0, geocode=None, version=None):
+    """Reads the scraped events CSV into an EventSnapshot.
+    geocode(addresses) -> {address: (lat, lng)} is called once, with the addresses of the rows that have
+    no coordinates; rows whose address it leaves out are skipped."""
+
+    snapshot = EventSnapshot(path, mtime_ns, size, version)
+    rows = []
+    with open(path, newline = "", encoding = "utf-8") as f:
+        for row in csv.DictReader(f):
+            lat = _coordinate(row.get("latitude"))
+            lng = _coordinate(row.get("longitude"))
+            rows.append((row, row.get("address") or "", lat, lng))
+
+    located = {}
+    if geocode is not None:
+        wanted = {address for _, address, lat, lng in rows if address and (lat is None or lng is None)}
+        if wanted:
+            located = geocode(wanted)
+
+    for row, address, lat, lng in rows:
+        if lat is None or lng is None:
+            lat, lng = located.get(address, (None, None))
+
+        if lat is None or lng is None:
+            snapshot.skipped += 1
+            continue
+
+        snapshot.add(
+            row.get("event_title") or "Untitled event",
+            address or f"{row.get('venue_name', '')}, {row.get('city') or ''}",
+            row.get("start_local") or "",
+            lat,
+            lng,
+        )
+    return snapshot
+
+
+_snapshots = {}
+_lock = threading.Lock()
+
+
+def load_event_snapshot(path, geocode=None, version=None):
+    """The EventSnapshot for the CSV at path, re-parsed only when its mtime or size has changed.
+    version is anything that changes when geocode's answers may have (e.g. when the geocode cache was last
+    written); a new version also re-parses. Returns None if the file doesn't exist."""
+
+    path = os.fspath(path)
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+
+    key = (path, geocode)
+    current = (st.st_mtime_ns, st.st_size, version)
+    snapshot = _snapshots.get(key)
+    if snapshot is not None and snapshot.stamp == current:
+        return snapshot
+
+    with _lock:
+        #another thread may have parsed it while this one waited
+        snapshot = _snapshots.get(key)
+        if snapshot is None or snapshot.stamp != current:
+            snapshot = parse_events_csv(path, st.st_mtime_ns, st.st_size, geocode, version)
+            _snapshots[key] = snapshot
+    return snapshot
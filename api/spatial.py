@@ -0,0 +1,127 @@
+import json
+import math
+
+from django.db.models import Q
+
+from api.geo import EARTH_RADIUS_KM, haversine_km, nearest
+from api.models import Event
+
+#Grid index for event coordinates.
+#The world is cut into GRID_CELL_DEGREES x GRID_CELL_DEGREES cells, numbered row by row (south to north,
+#west to east inside a row), and every Event stores the number of its cell in Event.geocell.
+#A circle then covers a few rows of cells, and inside one row the cells are consecutive numbers,
+#so a radius query is one indexed range per row instead of a haversine for every event.
+#Changing GRID_CELL_DEGREES changes every cell number: existing events must be re-saved (see migration 0006).
+
+GRID_CELL_DEGREES = 0.01 #~1.1km north-south, ~0.7km east-west in London
+GRID_COLUMNS = round(360 / GRID_CELL_DEGREES)
+
+KM_PER_DEGREE_LAT = math.pi * EARTH_RADIUS_KM / 180
+
+#nearest_events widens its search circle from this, doubling, up to MAX_NEAREST_RADIUS_KM
+NEAREST_START_RADIUS_KM = 1.0
+MAX_NEAREST_RADIUS_KM = 50.0
+
+
+def valid_coordinates(lat, lon):
+    "True for a real (lat, lon) pair; (0, 0) is treated as missing, scrapers use it for 'unknown'."
+    if lat is None or lon is None:
+        return False
+    if math.isnan(lat) or math.isnan(lon):
+        return False
+    return -90 <= lat <= 90 and -180 <= lon <= 180 and (lat, lon) != (0.0, 0.0)
+
+
+def _row(lat):
+    return int(math.floor((lat + 90) / GRID_CELL_DEGREES))
+
+
+def _column(lon):
+    return min(int(math.floor((lon + 180) / GRID_CELL_DEGREES)), GRID_COLUMNS - 1)
+
+
+def geocell(lat, lon):
+    "Number of the grid cell containing (lat, lon), or None without valid coordinates."
+    if not valid_coordinates(lat, lon):
+        return None
+    return _row(lat) * GRID_COLUMNS + _column(lon)
+
+
+def cell_ranges(lat, lon, radius_km):
+    """[(first cell, last cell)] for each row of cells that the circle around (lat, lon) touches.
+    The ranges cover the circle's bounding box; circles crossing the 180th meridian are cut at it."""
+
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    #a degree of longitude is shortest at the edge of the box nearest the pole, so size the box there
+    cosLat = math.cos(math.radians(min(abs(lat) + dlat, 89.9)))
+    dlon = min(radius_km / (KM_PER_DEGREE_LAT * cosLat), 180.0)
+
+    firstCol = _column(max(lon - dlon, -180.0))
+    lastCol = _column(min(lon + dlon, 180.0))
+    return [
+        (row * GRID_COLUMNS + firstCol, row * GRID_COLUMNS + lastCol)
+        for row in range(_row(max(lat - dlat, -90.0)), _row(min(lat + dlat, 90.0)) + 1)
+    ]
+
+
+def _within(lat, lon, radius_km, queryset, limit=None):
+    "[(distance km, event id)] for the (limit) nearest events inside the circle, nearest first, reading only the index."
+    cells = Q()
+    for lo, hi in cell_ranges(lat, lon, radius_km):
+        cells |= Q(geocell__range = (lo, hi))
+
+    #(geocell, latitude, longitude) is a covering index, so this never touches the event rows
+    rows = list(queryset.filter(cells).values_list("id", "latitude", "longitude"))
+    if not rows:
+        return []
+    eventIDs, lats, lons = zip(*rows)
+    #distances for all the rows in one go, then only the nearest `limit` are sorted (api/geo.py)
+    return [(km, eventIDs[i]) for i, km in nearest(lat, lon, lats, lons, k = limit, max_km = radius_km)]
+
+
+def _load(found, queryset):
+    byID = queryset.in_bulk([eventID for _, eventID in found])
+    return [(byID[eventID], km) for km, eventID in found if eventID in byID]
+
+
+def events_within(lat, lon, radius_km, queryset=None, limit=None):
+    "[(Event, distance km)] for events within radius_km of (lat, lon), nearest first."
+    events = Event.objects.all() if queryset is None else queryset
+    return _load(_within(lat, lon, radius_km, events, limit), events)
+
+
+def nearest_events(lat, lon, k, queryset=None, max_radius_km=MAX_NEAREST_RADIUS_KM):
+    """[(Event, distance km)] for the k events nearest to (lat, lon), nearest first (fewer if there aren't k
+    within max_radius_km). The circle starts small and doubles until it holds k events: anything outside
+    a circle is farther than everything inside it, so those k are the true nearest."""
+
+    events = Event.objects.all() if queryset is None else queryset
+    radius = min(NEAREST_START_RADIUS_KM, max_radius_km)
+    while True:
+        found = _within(lat, lon, radius, events, k)
+        if len(found) >= k or radius >= max_radius_km:
+            return _load(found, events)
+        radius = min(radius * 2, max_radius_km)
+
+
+def coordinates_from_raw_json(rawJSON):
+    """(lat, lon) from a scraped row stored in RawPost.raw_json, or (None, None).
+    The importer stores the CSV row as a JSON string, so both strings and dicts are accepted."""
+
+    if isinstance(rawJSON, str):
+        try:
+            rawJSON = json.loads(rawJSON)
+        except ValueError:
+            return None, None
+    if not isinstance(rawJSON, dict):
+        return None, None
+
+    lat = rawJSON.get("latitude", rawJSON.get("lat"))
+    lon = rawJSON.get("longitude", rawJSON.get("lng", rawJSON.get("lon")))
+    try:
+        lat, lon = float(lat), float(lon)
+    except (TypeError, ValueError):
+        return None, None
+    if not valid_coordinates(lat, lon):
+        return None, None
+    return lat, lon
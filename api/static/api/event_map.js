@@ -0,0 +1,121 @@
+// Event markers for a Google map, fetched from a cluster endpoint (api/clusters.py) for the visible part
+// of the map. Used by the home page (innit_project) and the Mapping app's map.
+
+// Same snapping as api/viewport.py snap_bbox: small pans ask for the same URL,
+// so the browser revalidates it and mostly gets 304 Not Modified.
+function snapBox(south, west, north, east) {
+    const span = Math.max(north - south, east - west);
+    const step = Math.max(Math.pow(2, Math.ceil(Math.log2(span / 2))), Math.pow(2, -10));
+    return [
+        Math.max(Math.floor(south / step) * step, -90),
+        Math.max(Math.floor(west / step) * step, -180),
+        Math.min(Math.ceil(north / step) * step, 90),
+        Math.min(Math.ceil(east / step) * step, 180),
+    ];
+}
+
+// The map's bounds as snapped [south, west, north, east] boxes. The server only takes west < east,
+// so a view across the 180th meridian (west > east) is split into a box on each side of it.
+function snapBounds(bounds) {
+    const sw = bounds.getSouthWest(), ne = bounds.getNorthEast();
+    const south = sw.lat(), west = sw.lng(), north = ne.lat(), east = ne.lng();
+    if (west < east) {
+        return [snapBox(south, west, north, east)];
+    }
+    if (west === east) {
+        // the view wraps all the way round
+        return [snapBox(south, -180, north, 180)];
+    }
+    const boxes = [];
+    if (west < 180) boxes.push(snapBox(south, west, north, 180));
+    if (east > -180) boxes.push(snapBox(south, -180, north, east));
+    return boxes;
+}
+
+// Columns with delta-encoded fixed-point coordinates -> [{lat, lng, ...the other columns}]
+function decodeColumns(c, scale, fields) {
+    const rows = [];
+    let lat = 0, lng = 0;
+    for (let i = 0; i < c.count; i++) {
+        lat += c.lat[i];
+        lng += c.lng[i];
+        const row = { lat: lat / scale, lng: lng / scale };
+        fields.forEach(f => { row[f] = c[f][i]; });
+        rows.push(row);
+    }
+    return rows;
+}
+
+// Keeps the map showing the clusters and events of clustersUrl for its current view.
+// Only what the last responses had is on the map: their size is bounded by the screen (api/clusters.py)
+function showEventClusters(map, clustersUrl, fetchOptions) {
+    let markers = [];
+    let lastKey = null;
+
+    function eventMarker(event) {
+        const marker = new google.maps.Marker({
+            position: { lat: event.lat, lng: event.lng },
+            map: map,
+            title: event.name
+        });
+
+        const infowindow = new google.maps.InfoWindow({
+            content: `
+                <div style="font-family:Arial,sans-serif;">
+                    <h3 style="margin:0;">${event.name}</h3>
+                    <p style="margin:0;"><b>Address:</b> ${event.address}</p>
+                    <p style="margin:0;"><b>Date:</b> ${event.date}</p>
+                </div>
+            `
+        });
+
+        marker.addListener("click", () => {
+            infowindow.open(map, marker);
+        });
+        return marker;
+    }
+
+    function clusterMarker(cluster) {
+        const marker = new google.maps.Marker({
+            position: { lat: cluster.lat, lng: cluster.lng },
+            map: map,
+            title: `${cluster.size} events`,
+            label: { text: String(cluster.size), color: "white", fontSize: "12px" },
+            icon: {
+                path: google.maps.SymbolPath.CIRCLE,
+                scale: 12 + 4 * Math.log10(cluster.size),
+                fillColor: "#d6336c",
+                fillOpacity: 0.85,
+                strokeColor: "white",
+                strokeWeight: 2,
+            },
+        });
+
+        // zoom straight to where the cluster breaks up
+        marker.addListener("click", () => {
+            map.setCenter(marker.getPosition());
+            map.setZoom(cluster.expand);
+        });
+        return marker;
+    }
+
+    map.addListener("idle", () => {
+        const bounds = map.getBounds();
+        if (!bounds) return;
+        const urls = snapBounds(bounds).map(box => `${clustersUrl}?zoom=${map.getZoom()}&bbox=${box.join(",")}`);
+        const key = urls.join(" ");
+        if (key === lastKey) return;
+        lastKey = key;
+        Promise.all(urls.map(url => fetch(url, fetchOptions).then(response => response.ok ? response.json() : null)))
+            .then(payloads => {
+                // a newer view was asked for meanwhile, or a request failed
+                if (key !== lastKey || payloads.some(payload => !payload)) return;
+                markers.forEach(m => m.setMap(null));
+                markers = payloads.flatMap(payload => [
+                    ...decodeColumns(payload.clusters, payload.scale, ["size", "expand"]).map(clusterMarker),
+                    ...decodeColumns(payload.points, payload.scale, ["name", "address", "date"]).map(eventMarker),
+                ]);
+            })
+            .catch(() => {});
+    });
+}
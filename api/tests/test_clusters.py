@@ -0,0 +1,67 @@
+import json
+from unittest import mock
+
+from django.test import RequestFactory, SimpleTestCase
+
+from api import clusters, geo, viewport
+from api.snapshot import EventSnapshot
+
+
+class ClusterTests(SimpleTestCase):
+    BBOX = "51.25,-0.5,51.75,0.25"
+
+    def setUp(self):
+        import random
+        rng = random.Random(7)
+        self.snapshot = EventSnapshot("events.csv", 1, 1)
+        for i in range(2000):
+            self.snapshot.add(f"Event {i}", "", "", 51.3 + rng.random() * 0.4, -0.45 + rng.random() * 0.6)
+        self.snapshot.add("Lone", "Far away", "", 51.74, 0.24)
+
+    def get(self, zoom, **headers):
+        request = RequestFactory().get("/", {"zoom": zoom, "bbox": self.BBOX}, headers=headers)
+        return clusters.cluster_response(request, self.snapshot)
+
+    def test_levels_nest_and_keep_every_event(self):
+        index = clusters.cluster_index(self.snapshot)
+        self.assertIs(clusters.cluster_index(self.snapshot), index) # built once per snapshot
+        sizes = [len(index.level(z)) for z in range(clusters.MIN_ZOOM, clusters.MAX_CLUSTER_ZOOM + 1)]
+        self.assertEqual(sizes, sorted(sizes)) # fewer clusters the further out
+        for z in (0, 10, clusters.MAX_CLUSTER_ZOOM):
+            self.assertEqual(sum(int(n) for n in index.level(z).sizes), len(self.snapshot))
+
+    @mock.patch.object(clusters, "np", None)
+    def test_python_build_matches_numpy(self):
+        slow = clusters.build_cluster_index(self.snapshot)
+        with mock.patch.object(clusters, "np", geo.np):
+            if geo.np is None:
+                self.skipTest("NumPy not installed")
+            fast = clusters.build_cluster_index(self.snapshot)
+        for z in (3, 11, 15):
+            self.assertEqual(list(fast.level(z).sizes), slow.level(z).sizes)
+            self.assertEqual(list(fast.level(z).expands), slow.level(z).expands)
+            for a, b in zip(fast.level(z).lats, slow.level(z).lats):
+                self.assertAlmostEqual(a, b, places=9)
+
+    def test_payload_is_bounded_by_the_view(self):
+        payload = json.loads(self.get(11).content)
+        self.assertEqual(payload["total"], len(self.snapshot))
+        self.assertEqual(sum(payload["clusters"]["size"]) + payload["points"]["count"], len(self.snapshot))
+        self.assertLess(payload["clusters"]["count"] + payload["points"]["count"], 400)
+        self.assertIn("Lone", payload["points"]["name"])
+        self.assertTrue(all(e > 11 for e in payload["clusters"]["expand"]))
+
+        # past MAX_CLUSTER_ZOOM events come as they are (a sample, for a box this big)
+        payload = json.loads(self.get(clusters.MAX_CLUSTER_ZOOM + 3).content)
+        self.assertEqual((payload["zoom"], payload["clusters"]["count"]), (clusters.MAX_CLUSTER_ZOOM + 1, 0))
+        self.assertEqual((payload["total"], payload["truncated"]), (len(self.snapshot), True))
+        self.assertLessEqual(payload["points"]["count"], viewport.MAX_VIEWPORT_EVENTS)
+        # sampled per grid cell, so the lone event in its corner stays and the sample is the same every time
+        self.assertIn("Lone", payload["points"]["name"])
+        self.assertEqual(clusters.encode_clusters(self.snapshot, 17, tuple(payload["bbox"])), payload)
+
+    def test_etag_and_bad_zoom(self):
+        first = self.get(11)
+        self.assertEqual(self.get(11, if_none_match=first["ETag"]).status_code, 304)
+        self.assertEqual(self.get(12, if_none_match=first["ETag"]).status_code, 200)
+        self.assertEqual(self.get("x").status_code, 400)
@@ -0,0 +1,84 @@
+import importlib
+from datetime import datetime
+
+from django.apps import apps
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from api.models import Event, parse_event_datetime
+from api.selectors import events_overlapping, upcoming_events
+
+
+def at(day, hour=0):
+    return timezone.make_aware(datetime(2025, 11, day, hour))
+
+
+class EventWindowTests(TestCase):
+    def setUp(self):
+        self.friday_rave = Event.objects.create(title="Rave", starts_at=at(21, 22), ends_at=at(22, 6))
+        self.saturday_gig = Event.objects.create(title="Gig", starts_at=at(22, 20), ends_at=at(22, 23))
+        self.sunday_talk = Event.objects.create(title="Talk", starts_at=at(23, 14)) # no end time
+        self.next_week = Event.objects.create(title="Later", starts_at=at(28, 20), ends_at=at(28, 23))
+        Event.objects.create(title="Undated")
+
+    def titles(self, events):
+        return [ev.title for ev in events]
+
+    def test_overlap(self):
+        # the rave started before the window but is still on
+        self.assertEqual(self.titles(events_overlapping(at(22, 2), at(24))), ["Rave", "Gig", "Talk"])
+        self.assertEqual(self.titles(events_overlapping(at(22, 6), at(23, 14))), ["Gig"])
+        self.assertEqual(self.titles(upcoming_events(at(23), days=7)), ["Talk", "Later"])
+
+    def test_window_query_uses_index(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("checks the SQLite query plan")
+        sql, params = events_overlapping(at(22), at(24)).query.sql_with_params()
+        with connection.cursor() as db:
+            db.execute("EXPLAIN QUERY PLAN " + sql, params)
+            plan = " ".join(str(row) for row in db.fetchall())
+        self.assertIn("event_window_idx", plan)
+
+    def test_endpoint(self):
+        response = self.client.get("/api/events/", {"from": "2025-11-22T00:00:00", "to": "2025-11-23T00:00:00"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([ev["title"] for ev in response.json()["events"]], ["Rave", "Gig"])
+        self.assertEqual(self.client.get("/api/events/", {"from": "soon"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/events/", {"from": "2025-11-23", "to": "2025-11-22"}).status_code, 400)
+
+    def test_parse_event_datetime(self):
+        self.assertEqual(parse_event_datetime("2025-11-21T22:00:00"), at(21, 22))
+        self.assertIsNone(parse_event_datetime("next friday"))
+        self.assertIsNone(parse_event_datetime(None))
+
+
+class EventTimesOnSaveTests(TestCase):
+    def test_typed_times_follow_the_strings(self):
+        ev = Event.objects.create(title="Rave", date_start="2025-11-21T22:00:00", date_end="2025-11-22T04:00:00")
+        self.assertEqual((ev.starts_at, ev.ends_at), (at(21, 22), at(22, 4)))
+
+        ev.date_start = "2025-11-28T22:00:00"
+        ev.date_end = "tbc"
+        ev.save()
+        ev.refresh_from_db()
+        self.assertEqual((ev.starts_at, ev.ends_at), (at(28, 22), None))
+
+    def test_typed_times_alone_are_kept(self):
+        ev = Event.objects.create(title="Talk", starts_at=at(23, 14))
+        ev.refresh_from_db()
+        self.assertEqual((ev.starts_at, ev.ends_at), (at(23, 14), None))
+
+
+class BackfillEventTimesTests(TestCase):
+    def test_backfill_parses_strings(self):
+        migration = importlib.import_module("api.migrations.0003_event_starts_at_ends_at")
+        ev = Event.objects.create(title="Old", date_start="2025-11-21T22:00:00", date_end="2025-11-22T04:00:00")
+        bad = Event.objects.create(title="Odd", date_start="tbc")
+
+        migration.backfill_event_times(apps, None)
+
+        ev.refresh_from_db()
+        bad.refresh_from_db()
+        self.assertEqual((ev.starts_at, ev.ends_at), (at(21, 22), at(22, 4)))
+        self.assertIsNone(bad.starts_at)
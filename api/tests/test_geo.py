@@ -0,0 +1,60 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from api import geo
+from api.spatial import haversine_km
+
+
+class GeoTests(SimpleTestCase):
+    CENTRE = (51.5074, -0.1278)
+    LATS = [51.5136, 51.5265, 51.4613, 51.3762, 51.5074, 51.5136]
+    LONS = [-0.1365, -0.0780, -0.1156, -0.0982, -0.1278, -0.1365]
+
+    def both(self, func, *args, **kwargs):
+        "Result with NumPy and with the pure-Python fallback."
+        with_numpy = func(*args, **kwargs)
+        with mock.patch.object(geo, "np", None):
+            without = func(*args, **kwargs)
+        return with_numpy, without
+
+    def test_distances_match_scalar_haversine(self):
+        fast, slow = self.both(geo.distances_km, *self.CENTRE, self.LATS, self.LONS)
+        expected = [haversine_km(*self.CENTRE, la, lo) for la, lo in zip(self.LATS, self.LONS)]
+        for got in (list(fast), slow):
+            for a, b in zip(got, expected):
+                self.assertAlmostEqual(a, b, places=9)
+
+    def test_bearings(self):
+        fast, slow = self.both(geo.bearings_deg, 51.5, 0.0, [52.5, 51.5, 50.5, 51.5], [0.0, 1.0, 0.0, -1.0])
+        for got in (list(fast), slow):
+            self.assertEqual([round(b) for b in got], [0, 90, 180, 270])
+
+    def test_nearest_k_and_ties(self):
+        fast, slow = self.both(geo.nearest, *self.CENTRE, self.LATS, self.LONS, k=3)
+        self.assertEqual([i for i, _ in fast], [i for i, _ in slow])
+        for (_, a), (_, b) in zip(fast, slow):
+            self.assertAlmostEqual(a, b, places=9)
+        self.assertEqual([i for i, _ in fast], [4, 0, 5]) # 0 and 5 are the same point: ties by index
+        self.assertEqual(self.both(geo.nearest, *self.CENTRE, self.LATS, self.LONS, max_km=2)[0][-1][0], 5)
+        self.assertEqual(geo.nearest(*self.CENTRE, [], [], k=3), [])
+
+    def test_sample_in_cells_spreads_over_the_box(self):
+        # a crowd in the south-west corner and one point in each other corner of the box
+        lats = [51.0 + i * 0.001 for i in range(100)] + [51.9, 51.9, 51.1]
+        lons = [-1.0 + i * 0.001 for i in range(100)] + [-0.9, 0.9, 0.9]
+        indices = list(range(103))[::-1]
+        fast, slow = self.both(geo.sample_in_cells, lats, lons, indices, 51.0, -1.0, 52.0, 1.0, 4)
+        self.assertEqual(fast, slow)
+        # the first point of each quarter, not every 26th point of the crowd
+        self.assertEqual(fast, [0, 100, 101, 102])
+        self.assertEqual(geo.sample_in_cells(lats, lons, indices, 51.0, -1.0, 52.0, 1.0, 0), [])
+
+    def test_nearest_items(self):
+        items = [{"name": "Soho", "lat": 51.5136, "lng": -0.1365}, {"name": "Croydon", "lat": 51.3762, "lng": -0.0982},
+                 {"name": "Nowhere", "lat": None, "lng": None}]
+        fast, slow = self.both(geo.nearest_items, items, *self.CENTRE, k=1)
+        self.assertEqual(fast, slow)
+        self.assertEqual(fast[0]["name"], "Soho")
+        self.assertIn("distance_km", fast[0])
+        self.assertNotIn("distance_km", items[0]) # input untouched
@@ -0,0 +1,78 @@
+from django.db import connection
+from django.test import TestCase
+
+from api.models import Event
+from api.search import fts5_available, fts_query, install_search_index, missing_search_triggers, search_captions, search_events
+from ingestion.models import RawPost
+
+
+class FullTextSearchTests(TestCase):
+    def setUp(self):
+        if not fts5_available():
+            self.skipTest("needs SQLite with FTS5")
+        self.quartet = Event.objects.create(title="Jazz quartet", description="Late show in the basement bar")
+        self.screening = Event.objects.create(title="Film night", description="Screenings of jazz documentaries")
+        Event.objects.create(title="Techno all-nighter", description="Warehouse rave")
+
+    def titles(self, results):
+        return [ev.title for ev, _ in results]
+
+    def test_fts_query_quotes_words(self):
+        self.assertEqual(fts_query('Jazz quart'), '"jazz" "quart"*')
+        self.assertEqual(fts_query('"; DROP TABLE api_event; --'), '"drop" "table" "api_event"*')
+        self.assertEqual(fts_query("!!"), "")
+        self.assertEqual(fts_query("jazz a"), '"jazz" "a"')
+
+    def test_ranked_search(self):
+        # a title match ranks above a description match
+        self.assertEqual(self.titles(search_events("jazz")), ["Jazz quartet", "Film night"])
+        self.assertEqual(self.titles(search_events("jazz quar")), ["Jazz quartet"])
+        # stemming: "documentary" finds "documentaries"
+        self.assertEqual(self.titles(search_events("documentary")), ["Film night"])
+        self.assertEqual(search_events("   "), [])
+
+    def test_old_best_match_beats_many_newer_ones(self):
+        # every match is ranked, not just the most recently added ones
+        Event.objects.bulk_create([Event(title="Film night", description=f"jazz documentary {i}") for i in range(1500)])
+        self.assertEqual(self.titles(search_events("jazz", limit=1)), ["Jazz quartet"])
+
+    def test_index_follows_updates_deletes_and_bulk_create(self):
+        self.quartet.title = "Jazz trio"
+        self.quartet.save()
+        self.assertEqual(self.titles(search_events("quartet")), [])
+        self.assertEqual(self.titles(search_events("trio")), ["Jazz trio"])
+
+        self.screening.delete()
+        self.assertEqual(self.titles(search_events("documentary")), [])
+
+        Event.objects.bulk_create([Event(title="Opera gala")])
+        self.assertEqual(self.titles(search_events("opera")), ["Opera gala"])
+
+    def test_caption_search_and_snippet(self):
+        RawPost.objects.create(source="instagram", caption="Free entry tonight: supper club with live jazz from 8pm")
+        RawPost.objects.create(source="tiktok", caption="Flea market on Sunday")
+        results = search_captions("supper club")
+        self.assertEqual([r["source"] for r in results], ["instagram"])
+        self.assertIn("[supper] [club]", results[0]["snippet"])
+
+    def test_search_uses_fts_index(self):
+        with connection.cursor() as db:
+            db.execute("EXPLAIN QUERY PLAN SELECT rowid FROM api_event_fts WHERE api_event_fts MATCH %s", ['"jazz"'])
+            plan = " ".join(str(row) for row in db.fetchall())
+        self.assertIn("VIRTUAL TABLE INDEX", plan)
+
+    def test_repair_after_triggers_are_dropped(self):
+        with connection.cursor() as db:
+            db.execute("DROP TRIGGER api_event_fts_ai")
+        self.assertEqual(missing_search_triggers(), ["api_event_fts_ai"])
+        Event.objects.create(title="Lost gig")
+        install_search_index()
+        self.assertEqual(missing_search_triggers(), [])
+        self.assertEqual(self.titles(search_events("lost")), ["Lost gig"])
+
+    def test_endpoint(self):
+        response = self.client.get("/api/search/", {"q": "jazz"}).json()
+        self.assertEqual([r["title"] for r in response["results"]], ["Jazz quartet", "Film night"])
+        self.assertEqual(self.client.get("/api/search/").status_code, 400)
+        self.assertEqual(self.client.get("/api/search/", {"q": "jazz", "in": "users"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/search/", {"q": "jazz", "in": "captions"}).json()["results"], [])
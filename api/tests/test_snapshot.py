@@ -0,0 +1,64 @@
+import os
+import tempfile
+
+from django.test import SimpleTestCase
+
+from api.snapshot import load_event_snapshot, script_json
+
+
+class EventSnapshotTests(SimpleTestCase):
+    HEADER = "event_title,address,venue_name,city,start_local,latitude,longitude\n"
+
+    def write(self, rows):
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(self.HEADER + "".join(rows))
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "events_out.csv")
+        self.write([
+            "Jazz <night>,1 Soho Sq,,London,2025-11-21 20:00,51.5136,-0.1365\n",
+            "No coords,,Union Chapel,London,2025-11-22 19:30,,\n",
+            "Rave,2 Mare St,,London,2025-11-22 22:00,51.5450,-0.0553\n",
+            "Bad coords,3 High St,,London,,NaN,abc\n",
+        ])
+
+    def test_parses_only_mappable_rows_once(self):
+        snapshot = load_event_snapshot(self.path)
+        self.assertEqual([e["name"] for e in snapshot.events()], ["Jazz <night>", "Rave"])
+        self.assertEqual(snapshot.skipped, 2)
+        self.assertEqual(snapshot.lats.typecode, "d")
+        self.assertIs(load_event_snapshot(self.path), snapshot)
+
+    def test_reloads_when_the_file_changes(self):
+        first = load_event_snapshot(self.path)
+        self.write(["Gig,4 Brixton Rd,,London,,51.4613,-0.1156\n"])
+        second = load_event_snapshot(self.path)
+        self.assertIsNot(second, first)
+        self.assertEqual([e["name"] for e in second.events()], ["Gig"])
+        self.assertIsNone(load_event_snapshot(self.path + ".missing"))
+
+    def test_geocode_runs_at_parse_time_only(self):
+        calls = []
+        def geocode(addresses):
+            calls.append(sorted(addresses))
+            return {"3 High St": (51.5, -0.1)}
+        snapshot = load_event_snapshot(self.path, geocode=geocode)
+        load_event_snapshot(self.path, geocode=geocode)
+        self.assertEqual(calls, [["3 High St"]])
+        self.assertEqual(len(snapshot), 3)
+
+        # a new version (e.g. the geocode cache was written to) re-parses
+        self.assertIsNot(load_event_snapshot(self.path, geocode=geocode, version=2), snapshot)
+        self.assertEqual(len(calls), 2)
+
+    def test_json_matches_json_script(self):
+        from django.utils.html import json_script
+        snapshot = load_event_snapshot(self.path)
+        self.assertIn(snapshot.events_json(), json_script(snapshot.events(), "x"))
+        self.assertNotIn("<night>", script_json(snapshot.events()))
+
+    def test_nearest(self):
+        found = load_event_snapshot(self.path).nearest(51.5450, -0.0553, k=1)
+        self.assertEqual((found[0]["name"], found[0]["distance_km"]), ("Rave", 0.0))
@@ -0,0 +1,68 @@
+from django.db import connection
+from django.test import TestCase
+
+from api.models import Event
+from api.spatial import cell_ranges, coordinates_from_raw_json, events_within, geocell, haversine_km, nearest_events
+
+
+class SpatialIndexTests(TestCase):
+    CENTRE = (51.5074, -0.1278) # Charing Cross
+
+    def setUp(self):
+        self.soho = Event.objects.create(title="Soho", latitude=51.5136, longitude=-0.1365)
+        self.shoreditch = Event.objects.create(title="Shoreditch", latitude=51.5265, longitude=-0.0780)
+        self.brixton = Event.objects.create(title="Brixton", latitude=51.4613, longitude=-0.1156)
+        self.croydon = Event.objects.create(title="Croydon", latitude=51.3762, longitude=-0.0982)
+        Event.objects.create(title="No location")
+
+    def titles(self, found):
+        return [ev.title for ev, _ in found]
+
+    def brute_force(self, radius_km):
+        lat, lon = self.CENTRE
+        events = Event.objects.exclude(latitude=None)
+        found = sorted((haversine_km(lat, lon, ev.latitude, ev.longitude), ev.title) for ev in events)
+        return [title for km, title in found if km <= radius_km]
+
+    def test_geocell_set_on_save(self):
+        self.assertEqual(self.soho.geocell, geocell(51.5136, -0.1365))
+        self.soho.latitude, self.soho.longitude = 51.4613, -0.1156
+        self.soho.save()
+        self.assertEqual(Event.objects.get(pk=self.soho.pk).geocell, self.brixton.geocell)
+        self.assertIsNone(Event.objects.get(title="No location").geocell)
+        self.assertIsNone(geocell(0.0, 0.0))
+
+    def test_radius_matches_brute_force(self):
+        for radius in (0.5, 1, 3, 6, 20):
+            self.assertEqual(self.titles(events_within(*self.CENTRE, radius)), self.brute_force(radius), radius)
+
+    def test_nearest(self):
+        self.assertEqual(self.titles(nearest_events(*self.CENTRE, 2)), ["Soho", "Shoreditch"])
+        self.assertEqual(self.titles(nearest_events(*self.CENTRE, 10)), self.brute_force(50))
+        self.assertEqual(self.titles(nearest_events(*self.CENTRE, 10, max_radius_km=5)), self.brute_force(5))
+
+    def test_cell_ranges_cover_the_circle(self):
+        ranges = cell_ranges(*self.CENTRE, 3)
+        self.assertLessEqual(len(ranges), 7) # 6km north-south is about 6 rows of 0.01 degrees
+        for lat, lon in [(51.5344, -0.1278), (51.5074, -0.0845), (51.4804, -0.1711)]: # ~3km N, E, SW
+            cell = geocell(lat, lon)
+            self.assertTrue(any(lo <= cell <= hi for lo, hi in ranges))
+
+    def test_radius_query_uses_index(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("checks the SQLite query plan")
+        from django.db.models import Q
+        cells = Q()
+        for lo, hi in cell_ranges(*self.CENTRE, 3):
+            cells |= Q(geocell__range=(lo, hi))
+        sql, params = Event.objects.filter(cells).values_list("id", "latitude", "longitude").query.sql_with_params()
+        with connection.cursor() as db:
+            db.execute("EXPLAIN QUERY PLAN " + sql, params)
+            plan = " ".join(str(row) for row in db.fetchall())
+        self.assertIn("COVERING INDEX event_geocell_idx", plan)
+
+    def test_coordinates_from_raw_json(self):
+        self.assertEqual(coordinates_from_raw_json('{"latitude": "51.5", "longitude": "-0.12"}'), (51.5, -0.12))
+        self.assertEqual(coordinates_from_raw_json({"lat": 51.5, "lng": -0.12}), (51.5, -0.12))
+        self.assertEqual(coordinates_from_raw_json({"latitude": "", "longitude": ""}), (None, None))
+        self.assertEqual(coordinates_from_raw_json("not json"), (None, None))
@@ -0,0 +1,105 @@
+import importlib
+from datetime import datetime
+
+from django.apps import apps
+from django.test import TestCase
+from django.utils import timezone
+
+from api.models import Event, EventTag, Tag
+from api.selectors import events_overlapping, events_with_all_tags, events_with_any_tag, tag_facets
+from api.services import sync_event_tags
+from api.signals import events_retagged
+
+
+def at(day, hour=0):
+    return timezone.make_aware(datetime(2025, 11, day, hour))
+
+
+class TagIndexTests(TestCase):
+    def setUp(self):
+        self.rave = Event.objects.create(title="Rave", ai_tags=["techno", "Warehouse", "techno"], starts_at=at(21, 22))
+        self.jazz = Event.objects.create(title="Jazz", ai_tags=["jazz", "live-music"], starts_at=at(22, 20))
+        self.both = Event.objects.create(title="Jazz techno", ai_tags=["jazz", "techno"], starts_at=at(30, 20))
+
+    def titles(self, events):
+        return sorted(ev.title for ev in events)
+
+    def test_save_keeps_links_in_sync(self):
+        self.assertEqual(
+            set(EventTag.objects.filter(event=self.rave).values_list("tag__name", flat=True)), {"techno", "warehouse"}
+        )
+        self.rave.ai_tags = ["techno", "all-nighter"]
+        self.rave.save()
+        self.assertEqual(
+            set(EventTag.objects.filter(event=self.rave).values_list("tag__name", flat=True)), {"techno", "all-nighter"}
+        )
+        self.assertEqual(Tag.objects.filter(name="techno").count(), 1)
+
+    def test_retagged_signal_only_when_links_change(self):
+        received = []
+
+        def receiver(sender, events, **kwargs):
+            received.append([ev.title for ev in events])
+
+        events_retagged.connect(receiver)
+        self.addCleanup(events_retagged.disconnect, receiver)
+
+        Event.objects.create(title="New", ai_tags=["jazz"])
+        self.rave.ai_tags = ["Techno", "warehouse"]
+        self.rave.save()
+        self.assertEqual(received, [])
+
+        self.rave.ai_tags = ["techno"]
+        self.rave.save(update_fields=["ai_tags"])
+        self.assertEqual(received, [["Rave"]])
+        self.assertEqual(sync_event_tags([self.rave, self.jazz]), set())
+
+    def test_names_too_long_for_a_tag_are_skipped(self):
+        long_name = "x" * 65
+        ev = Event.objects.create(title="Odd", ai_tags=["jazz", long_name, "y" * 64])
+        self.assertEqual(
+            set(EventTag.objects.filter(event=ev).values_list("tag__name", flat=True)), {"jazz", "y" * 64}
+        )
+        self.assertFalse(Tag.objects.filter(name__startswith="xxx").exists())
+        self.assertEqual(self.titles(events_with_any_tag([long_name])), [])
+
+    def test_any_and_all(self):
+        self.assertEqual(self.titles(events_with_any_tag(["techno", "Live-Music"])), ["Jazz", "Jazz techno", "Rave"])
+        self.assertEqual(self.titles(events_with_all_tags(["jazz", "techno"])), ["Jazz techno"])
+        self.assertEqual(self.titles(events_with_all_tags(["jazz", "opera"])), [])
+        self.assertEqual(self.titles(events_with_any_tag(["opera"])), [])
+        # composes with the time window
+        self.assertEqual(self.titles(events_with_any_tag(["jazz"], events_overlapping(at(22), at(23)))), ["Jazz"])
+
+    def test_facets(self):
+        self.assertEqual(tag_facets()[:2], [("jazz", 2), ("techno", 2)])
+        self.assertEqual(dict(tag_facets(Event.objects.filter(pk=self.jazz.pk))), {"jazz": 1, "live-music": 1})
+
+    def test_migration_backfill(self):
+        EventTag.objects.all().delete()
+        importlib.import_module("api.migrations.0004_tag_eventtag").backfill_event_tags(apps, None)
+        self.assertEqual(self.titles(events_with_all_tags(["jazz", "techno"])), ["Jazz techno"])
+        self.assertEqual(EventTag.objects.count(), 6)
+
+    def test_bulk_created_events_are_synced_explicitly(self):
+        events = Event.objects.bulk_create([Event(title="Bulk", ai_tags=["opera"])])
+        self.assertEqual(self.titles(events_with_any_tag(["opera"])), [])
+        sync_event_tags(events)
+        self.assertEqual(self.titles(events_with_any_tag(["opera"])), ["Bulk"])
+
+    def test_sync_uses_a_fixed_number_of_queries(self):
+        events = [self.rave, self.jazz, self.both]
+        for ev in events:
+            ev.ai_tags = ["opera"]
+        # savepoint, tag insert + select, link select, one delete for all stale links, link insert, release
+        with self.assertNumQueries(7):
+            sync_event_tags(events)
+        self.assertEqual(self.titles(events_with_any_tag(["opera"])), ["Jazz", "Jazz techno", "Rave"])
+        self.assertEqual(self.titles(events_with_any_tag(["jazz", "techno"])), [])
+
+    def test_endpoint_tag_filter_and_facets(self):
+        response = self.client.get(
+            "/api/events/", {"from": "2025-11-21T00:00:00", "to": "2025-12-01T00:00:00", "tags": "jazz,techno", "match": "all", "facets": "1"}
+        ).json()
+        self.assertEqual([ev["title"] for ev in response["events"]], ["Jazz techno"])
+        self.assertEqual(response["facets"], {"jazz": 1, "techno": 1})
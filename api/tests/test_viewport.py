@@ -0,0 +1,90 @@
+import gzip
+import json
+
+from django.test import RequestFactory, SimpleTestCase
+
+from api import viewport
+from api.geo import in_bbox
+from api.snapshot import EventSnapshot
+
+
+class ViewportTests(SimpleTestCase):
+    BBOX = "51.45,-0.2,51.55,0.0"
+
+    def setUp(self):
+        self.snapshot = EventSnapshot("events.csv", 1, 1)
+        for i in range(300):
+            self.snapshot.add(f"Event {i}", f"{i} High St", "2025-11-21 20:00", 51.46 + i * 0.0003, -0.19 + i * 0.0006)
+        self.snapshot.add("Paris", "Rue", "", 48.8566, 2.3522)
+
+    def get(self, snapshot=None, **headers):
+        # the events in the box as one cached response, the way api/clusters.py sends its payloads
+        snapshot = self.snapshot if snapshot is None else snapshot
+        request = RequestFactory().get("/", {"bbox": self.BBOX}, headers=headers)
+        bbox = viewport.request_bbox(request)
+        inside = [int(i) for i in in_bbox(snapshot.lats, snapshot.lngs, *bbox)]
+        return viewport.cached_json_response(request, snapshot, ("points", bbox), lambda: viewport.encode_points(snapshot, inside))
+
+    def decode(self, payload):
+        lat = lng = 0
+        found = []
+        for i in range(payload["count"]):
+            lat += payload["lat"][i]
+            lng += payload["lng"][i]
+            found.append((payload["name"][i], lat / viewport.COORD_SCALE, lng / viewport.COORD_SCALE))
+        return found
+
+    def test_snap_bbox(self):
+        box = viewport.snap_bbox(*viewport.parse_bbox(self.BBOX))
+        self.assertTrue(box[0] <= 51.45 and box[1] <= -0.2 and box[2] >= 51.55 and box[3] >= 0.0)
+        # a small pan lands on the same box
+        self.assertEqual(viewport.snap_bbox(51.46, -0.19, 51.56, -0.01), box)
+        for bad in ("", "1,2,3", "51.5,0,51.4,1", "a,b,c,d", "0,0,nan,1"):
+            with self.assertRaises(ValueError):
+                viewport.parse_bbox(bad)
+
+    def test_columnar_payload_round_trips(self):
+        payload = json.loads(self.get().content)
+        found = self.decode(payload)
+        self.assertEqual(payload["count"], 300) # Paris is outside the box
+        self.assertEqual(len({name for name, _, _ in found}), 300)
+        for name, lat, lng in found:
+            i = int(name.split()[1])
+            self.assertAlmostEqual(lat, 51.46 + i * 0.0003, places=5)
+            self.assertAlmostEqual(lng, -0.19 + i * 0.0006, places=5)
+        self.assertTrue(all(d >= 0 for d in payload["lat"][1:])) # sorted by latitude
+
+    def test_etag_and_not_modified(self):
+        first = self.get()
+        self.assertEqual(first.status_code, 200)
+        self.assertIn("Accept-Encoding", first["Vary"])
+
+        again = self.get(if_none_match=first["ETag"])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again["ETag"], first["ETag"])
+        self.assertEqual(self.get(if_none_match="W/" + first["ETag"]).status_code, 304)
+
+        # a new version of the snapshot changes the ETag
+        newer = EventSnapshot("events.csv", 2, 1)
+        self.assertEqual(self.get(newer, if_none_match=first["ETag"]).status_code, 200)
+
+    def test_gzip(self):
+        plain = self.get()
+        zipped = self.get(accept_encoding="gzip, deflate")
+        self.assertEqual(zipped["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(zipped.content), plain.content)
+        self.assertNotEqual(zipped["ETag"], plain["ETag"])
+        self.assertEqual(self.get(accept_encoding="gzip", if_none_match=zipped["ETag"]).status_code, 304)
+        # refused with a zero q-value
+        self.assertNotIn("Content-Encoding", self.get(accept_encoding="gzip;q=0, deflate"))
+
+    def test_accepts_gzip(self):
+        for header in ("gzip", "deflate, GZIP", "gzip;q=0.5", "*", "br;q=1.0, *;q=0.1", "gzip; q=1, identity"):
+            self.assertTrue(viewport.accepts_gzip(header), header)
+        for header in (None, "", "identity", "gzip;q=0", "gzip;q=0.000, deflate", "*;q=0", "gzip;q=0, *", "x-gzipped"):
+            self.assertFalse(viewport.accepts_gzip(header), header)
+
+    def test_bad_bbox(self):
+        for bad in ({}, {"bbox": "x"}):
+            with self.assertRaises(ValueError):
+                viewport.request_bbox(RequestFactory().get("/", bad))
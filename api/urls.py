@@ -3,5 +3,7 @@ from . import views
 
 urlpatterns = [
     path("classify/preview/", views.classify_preview, name="classify_preview"),
+    path("events/", views.events_window, name="events_window"),
+    path("search/", views.search, name="search"),
 
 ]
\ No newline at end of file
@@ -0,0 +1,161 @@
+import hashlib
+import json
+import math
+
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+from django.utils.text import compress_string
+
+#Encoding and HTTP caching for map payloads built from an EventSnapshot (api/snapshot.py), shared by the
+#cluster endpoints (api/clusters.py).
+#
+#Events are sent columnar: one array per field instead of one object per event, and coordinates are
+#fixed-point integers (degrees * COORD_SCALE), sorted by latitude and delta-encoded, so most of them are
+#a few digits. Decoding, in JS:
+#    let lat = 0, lng = 0;
+#    for (let i = 0; i < p.count; i++) { lat += p.lat[i]; lng += p.lng[i]; ... lat / p.scale, lng / p.scale }
+#
+#The requested box is snapped outwards to a grid (snap_bbox, mirrored in api/static/api/event_map.js), so small
+#pans ask for the same URL. The ETag is a hash of the snapshot version and the snapped box: the browser
+#revalidates with If-None-Match and gets a 304 without the payload even being built.
+
+PAYLOAD_VERSION = 1
+
+COORD_SCALE = 100000 #1e-5 degrees, about a metre
+
+#Most clusters and events in one response; busier boxes get a sample of them and "truncated": true
+MAX_VIEWPORT_EVENTS = 2000
+
+#Snapped boxes are never finer than this many degrees (~110 m)
+MIN_SNAP_DEGREES = 2 ** -10
+
+#Responses smaller than this aren't worth gzipping
+GZIP_MIN_BYTES = 200
+
+#Encoded responses kept per snapshot (cleared when full)
+PAYLOAD_CACHE_SIZE = 256
+
+
+def parse_bbox(value):
+    "'south,west,north,east' in degrees -> floats. Raises ValueError if it isn't a valid box."
+    south, west, north, east = (float(v) for v in (value or "").split(","))
+    if not all(math.isfinite(v) for v in (south, west, north, east)):
+        raise ValueError("bbox must be finite")
+    if not (-90 <= south < north <= 90 and -180 <= west < east <= 180):
+        raise ValueError("bbox must be south,west,north,east with south < north and west < east")
+    return south, west, north, east
+
+
+def snap_bbox(south, west, north, east):
+    """The box grown outwards to a grid whose step is a power of two between a half and all of the box's
+    larger side, so every box that fits in the same grid cells gives the same result."""
+    span = max(north - south, east - west)
+    step = max(2.0 ** math.ceil(math.log2(span / 2)), MIN_SNAP_DEGREES)
+    return (
+        max(math.floor(south / step) * step, -90.0),
+        max(math.floor(west / step) * step, -180.0),
+        min(math.ceil(north / step) * step, 90.0),
+        min(math.ceil(east / step) * step, 180.0),
+    )
+
+
+def accepts_gzip(acceptEncoding):
+    """True if an Accept-Encoding header allows gzip: listed, or covered by '*', with a q-value above 0.
+    'gzip;q=0' refuses it (Django's GZipMiddleware only looks for the word)."""
+
+    qualities = {}
+    for part in (acceptEncoding or "").split(","):
+        coding, *params = part.split(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+
+    return qualities.get("gzip", qualities.get("*", 0.0)) > 0
+
+
+def viewport_etag(snapshot, *key):
+    "Strong ETag for the identity-encoded payload: changes with the snapshot (file and version) and the key (box ...)."
+    key = repr((PAYLOAD_VERSION, COORD_SCALE, None if snapshot is None else (snapshot.path, snapshot.stamp)) + key)
+    return '"%s"' % hashlib.blake2b(key.encode(), digest_size = 16).hexdigest()
+
+
+def _gzip_etag(etag):
+    #the gzipped bytes are a different representation, so they get their own strong ETag
+    return etag[:-1] + '-gzip"'
+
+
+def encode_points(snapshot, indices):
+    "Columns for the snapshot's events at indices: sorted by latitude, coordinates as fixed-point deltas."
+
+    rows = sorted(
+        (round(snapshot.lats[i] * COORD_SCALE), round(snapshot.lngs[i] * COORD_SCALE), i) for i in indices
+    )
+    lats, lngs = delta_encode([lat for lat, _, _ in rows]), delta_encode([lng for _, lng, _ in rows])
+    return {
+        "count": len(rows),
+        "lat": lats,
+        "lng": lngs,
+        "name": [snapshot.names[i] for _, _, i in rows],
+        "address": [snapshot.addresses[i] for _, _, i in rows],
+        "date": [snapshot.dates[i] for _, _, i in rows],
+    }
+
+
+def delta_encode(values):
+    "[a, b, c] -> [a, b - a, c - b]"
+    return [v - prev for prev, v in zip([0] + values, values)]
+
+
+def _encoded(snapshot, key, build):
+    "(json bytes, gzipped bytes) of build(), built once per snapshot and key."
+    cache = snapshot.payloads if snapshot is not None else {}
+    if key not in cache:
+        body = json.dumps(build(), separators = (",", ":")).encode()
+        if len(cache) >= PAYLOAD_CACHE_SIZE:
+            cache.clear()
+        cache[key] = (body, compress_string(body) if len(body) >= GZIP_MIN_BYTES else None)
+    return cache[key]
+
+
+def request_bbox(request):
+    "The snapped ?bbox= of a request. Raises ValueError if it's missing or invalid."
+    return snap_bbox(*parse_bbox(request.GET.get("bbox")))
+
+
+def cached_json_response(request, snapshot, key, build, cache_control="private, no-cache"):
+    """JSON response for build() (a payload derived from snapshot and key only, e.g. ("clusters", zoom, bbox)),
+    with a strong ETag from (snapshot version, key). Sends 304 when If-None-Match has the current ETag, and gzip when the client
+    accepts it; the encoded bytes are kept on the snapshot."""
+
+    etag = viewport_etag(snapshot, *key)
+    useGzip = accepts_gzip(request.headers.get("Accept-Encoding"))
+
+    #If-None-Match uses the weak comparison, so W/ tags (e.g. from a proxy) match too
+    sent = {tag.removeprefix("W/") for tag in parse_etags(request.headers.get("If-None-Match", ""))}
+    if "*" in sent or etag in sent or _gzip_etag(etag) in sent:
+        response = HttpResponseNotModified()
+        response["ETag"] = _gzip_etag(etag) if useGzip and _gzip_etag(etag) in sent else etag
+    else:
+        body, gzipped = _encoded(snapshot, key, build)
+        if useGzip and gzipped is not None:
+            response = HttpResponse(gzipped, content_type = "application/json")
+            response["Content-Encoding"] = "gzip"
+            response["ETag"] = _gzip_etag(etag)
+        else:
+            response = HttpResponse(body, content_type = "application/json")
+            response["ETag"] = etag
+
+    response["Cache-Control"] = cache_control
+    patch_vary_headers(response, ("Accept-Encoding",))
+    return response
+
@@ -1,15 +1,21 @@
 from django.shortcuts import render
 import json
+from datetime import timedelta
 from django.http import JsonResponse, HttpResponseBadRequest
+from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET
 
 # Create your views here.
 
 #import services
-from classification.services import (
-    suggest_tags, extract_price_and_age, extract_datetime, 
-    extract_venue, score_candidate_quality
-)
+from classification.services import run_extractors
+from api.models import parse_event_datetime
+from api.search import SEARCH_LIMIT, search_captions, search_events
+from api.selectors import events_overlapping, events_with_all_tags, events_with_any_tag, tag_facets
+
+MAX_WINDOW_EVENTS = 500
+MAX_SEARCH_RESULTS = 100
 
 @csrf_exempt
 def classify_preview(request):
@@ -29,38 +35,104 @@ def classify_preview(request):
     if text =="":
         return HttpResponseBadRequest("Missing 'text'")
     
-    tag_pairs = suggest_tags(text)
-    tag_scores = dict(tag_pairs)
-    tags = [t for t, _ in tag_pairs]
+    #Same extractor chain as build_event_candidate (one tokenization pass shared by every extractor)
+    extractions, score, _ = run_extractors(text)
+
+    payload = dict(extractions)
+    payload["score"] = score
+
+    return JsonResponse(payload, status=200)
+
+
+def event_summary(ev):
+    "The fields of an Event the map and feed need."
+    return {
+        "id": ev.id,
+        "title": ev.title,
+        "location": ev.location,
+        "starts_at": ev.starts_at.isoformat() if ev.starts_at else None,
+        "ends_at": ev.ends_at.isoformat() if ev.ends_at else None,
+        "price_min": ev.price_min,
+        "price_max": ev.price_max,
+        "tags": ev.ai_tags or [],
+    }
+
 
-    pa = extract_price_and_age(text)
-    dt = extract_datetime(text)
-    venue = extract_venue(text)
+@require_GET
+def events_window(request):
+    """
+        GET ?from=ISO&to=ISO&limit=N --> JSON list of events overlapping [from, to)
+        (default: from now, for 7 days), earliest first
+        Optional: tags=techno,jazz (any of them, or all of them with match=all) and facets=1 for tag counts
+    """
 
-    startISO = dt[0].isoformat() if dt else None
-    endISO = dt[1].isoformat() if dt else None
+    start = timezone.now()
+    if request.GET.get("from"):
+        start = parse_event_datetime(request.GET["from"])
+        if start is None:
+            return HttpResponseBadRequest("'from' must be an ISO date/time")
+
+    end = start + timedelta(days = 7)
+    if request.GET.get("to"):
+        end = parse_event_datetime(request.GET["to"])
+        if end is None:
+            return HttpResponseBadRequest("'to' must be an ISO date/time")
+
+    if end <= start:
+        return HttpResponseBadRequest("'to' must be after 'from'")
+
+    try:
+        limit = min(int(request.GET.get("limit", 100)), MAX_WINDOW_EVENTS)
+    except ValueError:
+        return HttpResponseBadRequest("'limit' must be a number")
+
+    window = events_overlapping(start, end)
+
+    tags = [t for t in request.GET.get("tags", "").split(",") if t.strip()]
+    if tags:
+        if request.GET.get("match") == "all":
+            window = events_with_all_tags(tags, window)
+        else:
+            window = events_with_any_tag(tags, window)
+
+    events = window.only(
+        "id", "title", "location", "starts_at", "ends_at", "price_min", "price_max", "ai_tags"
+    )[:max(limit, 1)]
 
     payload = {
-        "tags": tags,
-        "tag_scores": tag_scores,
-        "price_min": pa.get("price_min"),
-        "price_max": pa.get("price_max"),
-        "age": pa.get("age"),
-        "start": startISO,
-        "end": endISO,
-        "venue": venue,
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "events": [event_summary(ev) for ev in events],
     }
+    if request.GET.get("facets"):
+        payload["facets"] = dict(tag_facets(window))
 
-    score = score_candidate_quality({
-        "tag_scores": tag_scores,
-        "price_min": pa.get("price_min"),
-        "price_max": pa.get("price_max"),
-        "age": pa.get("age"),
-        "start": startISO,
-        "end": endISO,
-        "venue": venue,
-    })
+    return JsonResponse(payload)
 
-    payload["score"] = score
 
-    return JsonResponse(payload, status=200)
+@require_GET
+def search(request):
+    """
+        GET ?q=words&in=events|captions&limit=N --> JSON list of the best matches, best first
+        Every word has to match; the last one can be the start of a word (search as you type)
+    """
+
+    text = (request.GET.get("q") or "").strip()
+    if text == "":
+        return HttpResponseBadRequest("Missing 'q'")
+
+    try:
+        limit = min(int(request.GET.get("limit", SEARCH_LIMIT)), MAX_SEARCH_RESULTS)
+    except ValueError:
+        return HttpResponseBadRequest("'limit' must be a number")
+    limit = max(limit, 1)
+
+    target = request.GET.get("in", "events")
+    if target == "events":
+        results = [dict(event_summary(ev), rank = rank) for ev, rank in search_events(text, limit)]
+    elif target == "captions":
+        results = search_captions(text, limit)
+    else:
+        return HttpResponseBadRequest("'in' must be 'events' or 'captions'")
+
+    return JsonResponse({"q": text, "in": target, "results": results})
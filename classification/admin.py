@@ -1,6 +1,6 @@
 from django.contrib import admin
-from .models import EventCandidate
-from .services import promote_candidate_to_event
+from .models import EventCandidate, ClassificationJob
+from .services import promote_candidates
 
 #When creating a class, Djano creates a web interface where one can 
 #add, edit, delete and search RawPost rows
@@ -12,19 +12,27 @@ from .services import promote_candidate_to_event
 @admin.register(EventCandidate)
 
 class EventCandidateModule(admin.ModelAdmin):
-    list_display = ("id", "raw_post", "score", "needs_review", "created_at")
+    list_display = ("id", "raw_post", "score", "needs_review", "promoted_event", "created_at")
     list_filter = ("needs_review",)
-    search_fields = ("raw_post_caption",)
+    list_select_related = ("raw_post", "promoted_event")
+    #same order as the review queue, served by the (needs_review, score, id) index
+    ordering = ("-needs_review", "score", "id")
+    search_fields = ("raw_post__caption",)
+    raw_id_fields = ("raw_post", "promoted_event")
     actions = ["promote_to_event"]
 
     def promote_to_event(self, request, queryset):
-        created = 0
-        for cand in queryset:
-            try:
-                promote_candidate_to_event(cand.id)
-            except Exception:
-                pass
-        
-        self.message_user(request, f"Promoted {created} candidate(s) to Event.")
+        created, matched, skipped = promote_candidates(queryset)
+        self.message_user(
+            request,
+            f"Promoted {created + matched} candidate(s) to Event: {created} new, "
+            f"{matched} matched an existing event, {skipped} skipped (already promoted).",
+        )
     promote_to_event.short_description = "Promote to Event"
 
+
+@admin.register(ClassificationJob)
+
+class ClassificationJobModule(admin.ModelAdmin):
+    list_display = ("id", "raw_post_id", "status", "attempts", "run_after", "locked_by", "updated_at")
+    list_filter = ("status",)
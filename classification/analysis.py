@@ -0,0 +1,161 @@
+import re
+from functools import cached_property
+
+#An AnalyzedCaption is a caption that has been split and lowercased once.
+#suggest_tags, extract_price_and_age, extract_datetime and extract_venue all read from the same object
+#instead of each one re-splitting, re-lowercasing and re-searching the caption.
+#Everything past the split is worked out the first time an extractor asks for it and then kept.
+
+#Date and time patterns used by the datetime extractors, compiled once at import
+
+#Finds a date like '12 Oct' or '12 October'
+#Group 1 = day, Group 2 = month name/abbrev
+MONTH_DATE_RX = re.compile(
+    r"\b(\d{1,2})\s*"
+    r"(jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec|"
+    r"january|february|march|april|may|june|july|august|september|october|november|december)\b",
+    flags=re.IGNORECASE,
+)
+
+#Finds a date in numeric format like '12/10', '12/10/24' or '12-10-24'
+#Numbers next to ':' or followed by am/pm are times ('7:30-10:30pm', '7-9pm'), so they never match.
+#Without a year only '/' is a date: '9-5' is opening hours (see AnalyzedCaption.numeric_date)
+NUMERIC_DATE_RX = re.compile(
+    r"(?<![\d:.])\b(?P<day>\d{1,2})(?P<sep>[/-])(?P<month>\d{1,2})(?:(?P=sep)(?P<year>\d{2,4}))?\b"
+    r"(?!:|\s*(?:am|pm)\b)"
+)
+
+#Finds '10pm-4am' or '22:00-04:00'
+TIME_RANGE_RX = re.compile(
+    r"(\d{1,2}(?::\d{2})?\s*(?:am|pm)?)\s*[-–]\s*(\d{1,2}(?::\d{2})?\s*(?:am|pm)?)",
+    flags=re.IGNORECASE,
+)
+
+#Finds a single time like '10pm' or '22:30'
+SINGLE_TIME_RX = re.compile(r"\b(\d{1,2}(?::\d{2})?\s*(?:am|pm)?)\b", flags=re.IGNORECASE)
+
+#Splits a time like '10:30pm' into hour, minutes and am/pm
+TIME_FRAGMENT_RX = re.compile(r"(\d{1,2})(?::(\d{2}))?\s*(am|pm)?$")
+
+#Same split as str.split(), but keeps where each word starts and ends
+_TOKEN_RX = re.compile(r"\S+")
+
+LONDON_AREAS = ["dalston", "peckham", "brixton", "shoreditch",
+                "camden", "deptford", "hackney", "soho", "islington",
+                "clapham", "stratford", "notting", "elephant", "bethnal", "angel"] #have to update
+
+
+class WordFacts:
+    """Price, age and venue facts found in one loop over the lowercased words."""
+
+    def __init__(self, prices, age, postcode, area):
+        self.prices = prices #every price mentioned, in order (free = 0.0)
+        self.age = age #'18+', '21+' or None
+        self.postcode = postcode #last postcode-like word, uppercased
+        self.area = area #last London area mentioned
+
+
+class AnalyzedCaption:
+    """One caption, tokenized and lowercased once and shared by all the extractors."""
+
+    def __init__(self, text):
+        self.text = text
+        self.lowered = text.lower()
+        self.token_spans = [m.span() for m in _TOKEN_RX.finditer(text)]
+        self.words = [text[start:end] for start, end in self.token_spans]
+        self.lower_words = [w.lower() for w in self.words]
+
+    def __repr__(self):
+        return f"AnalyzedCaption({self.text[:30]!r})"
+
+    @cached_property
+    def stripped_lower(self):
+        "The caption stripped and lowercased, which is what the date search looks at."
+        return self.lowered.strip()
+
+    @cached_property
+    def month_date(self):
+        "Match for a date like '12 Oct', or None."
+        return MONTH_DATE_RX.search(self.stripped_lower)
+
+    @cached_property
+    def numeric_date(self):
+        "Match for a date like '12/10/24', or None. A dash with no year ('9-5') isn't a date."
+        for m in NUMERIC_DATE_RX.finditer(self.stripped_lower):
+            if m.group("year") or m.group("sep") == "/":
+                return m
+        return None
+
+    @cached_property
+    def time_range(self):
+        "Match for a time range like '10pm-4am', or None."
+        return TIME_RANGE_RX.search(self.text)
+
+    @cached_property
+    def single_time(self):
+        "Match for a single time like '10pm', or None."
+        return SINGLE_TIME_RX.search(self.text)
+
+    @cached_property
+    def word_facts(self):
+        "Prices, age, postcode and area, all found in a single pass over the words."
+
+        prices = []
+        age = None
+        postcode = None
+        area = None
+
+        for w in self.lower_words:
+
+            #Price Checker
+            if "£" in w:
+
+                #builds event price
+                num = ""
+                for ch in w:
+                    if ch.isdigit() or ch == ".":
+                        num += ch
+
+                #A word with two dots, like '£10.00.', would make float() fail, so skip it rather than lose the whole caption
+                try:
+                    if num:
+                        prices.append(float(num))
+                except ValueError:
+                    pass
+
+            #British monetary slang
+            elif "fiver" in w:
+                prices.append(5.0)
+
+            elif "tenner" in w:
+                prices.append(10.0)
+
+            elif "free" in w:
+                prices.append(0.0)
+
+            #Age checker
+            if "18+" in w:
+                age = "18+"
+
+            elif "21+" in w:
+                age = "21+"
+
+            #Postcode
+            #Any word with a number as its second character (extract_venue has never checked
+            #the first character: its isalpha test was missing the brackets, so it was always true)
+            if len(w) >= 2 and w[1].isdigit():
+                postcode = w.upper()
+
+            for areaName in LONDON_AREAS:
+                if areaName in w:
+                    area = areaName
+                    break
+
+        return WordFacts(prices, age, postcode, area)
+
+
+def analyze_caption(text):
+    "Returns an AnalyzedCaption for text (or text itself if it has already been analyzed)."
+    if isinstance(text, AnalyzedCaption):
+        return text
+    return AnalyzedCaption(text)
@@ -0,0 +1,193 @@
+import platform
+import random
+import time
+from datetime import datetime
+
+from classification import services
+
+#Offline throughput benchmark for the classification extractors.
+#Builds a reproducible corpus of made-up London event captions (same seed = same captions) and times
+#each extractor and the whole chain per caption. Nothing here touches the database, so it can run
+#anywhere Django settings load. Use the bench_classification command to run it and save the JSON.
+
+GENRES = [
+    "techno", "hard techno", "deep house", "afro house", "amapiano", "drum and bass", "garage",
+    "disco", "jazz", "live music", "classical", "opera", "choir", "poetry", "spoken word",
+    "comedy", "improv", "film screening", "art exhibition", "street food", "food market",
+    "wine tasting", "craft fair", "book launch", "panel talk", "workshop", "charity run",
+]
+
+FORMATS = ["night", "all nighter", "rave", "party", "session", "showcase", "festival", "social", "afterparty"]
+
+VENUES = [
+    ("Dalston", "E8 3BH"), ("Peckham", "SE15 4ST"), ("Brixton", "SW9 8HE"), ("Shoreditch", "EC2A 3AY"),
+    ("Camden", "NW1 8AH"), ("Deptford", "SE8 4NS"), ("Hackney Wick", "E9 5LN"), ("Soho", "W1D 3QU"),
+    ("Islington", "N1 2UN"), ("Clapham", "SW4 7AA"), ("Stratford", "E15 1DA"), ("Bethnal Green", "E2 0HL"),
+    ("Tottenham", "N17 9LR"), ("Walthamstow", "E17 7JN"), ("Kentish Town", "NW5 1HB"),
+]
+
+PLACES = ["a warehouse", "a railway arch", "the basement", "a rooftop", "the community hall", "a pub back room"]
+
+PRICES = ["£5", "£8", "£10", "£12.50", "£15", "£20", "£25", "free entry", "free before 11pm", "a fiver", "a tenner", "£5-£10"]
+
+TIMES = ["10pm-4am", "22:00-04:00", "7pm-11pm", "7:30pm", "8pm", "2pm-6pm", "11pm-6am", "doors 9pm", "12-5pm"]
+
+AGES = ["18+", "21+", "", "", ""]
+
+MONTHS = ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
+
+EXTRAS = ["", "", "link in bio", "limited tickets", "bring a friend", "DM for guestlist", "last one sold out", "🔥🔥"]
+
+TEMPLATES = [
+    "{genre} {fmt} in {area} {postcode} | {time} | {price}, {age} {extra}",
+    "{Genre} {fmt} at {place}, {area}. {date} {time}. {price} {extra}",
+    "This {date}: {genre} {fmt} - {place} in {area} ({postcode}) {time} {price} {age}",
+    "{area}'s favourite {genre} {fmt} returns! {date}, {time}, {price}. {extra}",
+    "{Genre} all day at {place} {postcode}. {price}. {age}",
+    "{genre} {fmt} {extra}",
+]
+
+EXTRACTORS = ["suggest_tags", "extract_price_and_age", "extract_datetime", "extract_venue", "score_candidate_quality"]
+
+
+def random_date(rng):
+    "A date written the way posts write them: '14 Nov', '14 november' or '14/11(/25)'."
+    day = rng.randint(1, 28)
+    month = rng.randint(1, 12)
+    style = rng.randrange(3)
+    if style == 0:
+        return f"{day} {MONTHS[month - 1]}"
+    if style == 1:
+        return f"{day} {datetime(2000, month, 1):%B}".lower()
+    return f"{day}/{month}/{rng.choice(['25', '2026'])}"
+
+
+def generate_captions(count, seed=0):
+    "Returns count synthetic London event captions; the same seed always gives the same list."
+
+    rng = random.Random(seed)
+    captions = []
+
+    for _ in range(count):
+        genre = rng.choice(GENRES)
+        area, postcode = rng.choice(VENUES)
+        caption = rng.choice(TEMPLATES).format(
+            genre = genre,
+            Genre = genre.title(),
+            fmt = rng.choice(FORMATS),
+            area = area,
+            postcode = postcode,
+            place = rng.choice(PLACES),
+            time = rng.choice(TIMES),
+            price = rng.choice(PRICES),
+            age = rng.choice(AGES),
+            date = random_date(rng),
+            extra = rng.choice(EXTRAS),
+        )
+        captions.append(" ".join(caption.split()))
+
+    return captions
+
+
+def time_calls(func, inputs):
+    """Calls func once per input and returns (latencies in seconds, number of calls that raised).
+    A caption that crashes an extractor is counted rather than stopping the run."""
+    latencies = []
+    errors = 0
+    clock = time.perf_counter
+    for item in inputs:
+        start = clock()
+        try:
+            func(item)
+        except Exception:
+            errors += 1
+        latencies.append(clock() - start)
+    return latencies, errors
+
+
+def percentile(sortedValues, pct):
+    "Nearest-rank percentile of an already sorted list."
+    if not sortedValues:
+        return 0.0
+    rank = max(1, -(-len(sortedValues) * pct // 100))
+    return sortedValues[int(rank) - 1]
+
+
+def summarize(latencies, errors=0):
+    "Turns per-call latencies into throughput and p50/p99 (microseconds)."
+    ordered = sorted(latencies)
+    total = sum(ordered)
+    return {
+        "calls": len(ordered),
+        "errors": errors,
+        "captions_per_sec": round(len(ordered) / total, 1) if total > 0 else 0.0,
+        "mean_us": round(total / len(ordered) * 1e6, 2) if ordered else 0.0,
+        "p50_us": round(percentile(ordered, 50) * 1e6, 2),
+        "p99_us": round(percentile(ordered, 99) * 1e6, 2),
+    }
+
+
+def run_benchmark(size=2000, seed=0, repeat=3, cached=False):
+    """Times every extractor and the end-to-end chain over a synthetic corpus.
+    Each measurement is the best (fastest mean) of repeat passes, to cut noise.
+    Captions that make an extractor raise are timed anyway and counted under "errors".
+    The end-to-end figure skips the extraction cache unless cached is True.
+    Returns a JSON-serializable dict."""
+
+    captions = generate_captions(size, seed)
+    ruleSet = services.current_rule_set()
+
+    #score_candidate_quality works on extractions, so build those once outside the timer
+    extractions = []
+    for c in captions:
+        try:
+            extractions.append(services._compute_extractions(c, ruleSet)[0])
+        except Exception:
+            pass
+
+    if cached:
+        services._EXTRACTION_CACHE.clear()
+        endToEnd = lambda c: services.run_extractors(c, ruleSet)
+    else:
+        endToEnd = lambda c: services._compute_extractions(c, ruleSet)
+
+    benches = {
+        "suggest_tags": (lambda c: services.suggest_tags(c, ruleSet), captions),
+        "extract_price_and_age": (services.extract_price_and_age, captions),
+        "extract_datetime": (services.extract_datetime, captions),
+        "extract_venue": (services.extract_venue, captions),
+        "score_candidate_quality": (services.score_candidate_quality, extractions),
+        "end_to_end": (endToEnd, captions),
+    }
+
+    results = {}
+    for name, (func, inputs) in benches.items():
+        best = None
+        for _ in range(max(1, repeat)):
+            summary = summarize(*time_calls(func, inputs))
+            if best is None or summary["mean_us"] < best["mean_us"]:
+                best = summary
+        results[name] = best
+
+    return {
+        "created_at": datetime.now().isoformat(timespec = "seconds"),
+        "size": size,
+        "seed": seed,
+        "repeat": repeat,
+        "cached": cached,
+        "rules_version": ruleSet.version,
+        "rule_count": len(ruleSet.rules),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+
+def compare(baseline, current):
+    "Returns {bench name: current/baseline mean latency} for benches in both runs (above 1.0 = slower)."
+    ratios = {}
+    for name, result in current.get("results", {}).items():
+        before = baseline.get("results", {}).get(name)
+        if before and before.get("mean_us"):
+            ratios[name] = round(result["mean_us"] / before["mean_us"], 3)
+    return ratios
@@ -0,0 +1,114 @@
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import date
+
+#Cache of extractor results keyed by a hash of the caption and the rules version.
+#The same caption comes back a lot (re-scrapes, re-imports, repeated previews), so instead of
+#rerunning the whole extractor chain we keep the result in an in-process LRU and, if turned on,
+#in the ExtractionCacheEntry table so other workers can reuse it too.
+
+
+def caption_cache_key(text, rules_version, day=None):
+    """
+    Returns the cache key for a caption.
+    The caption is stripped first (leading/trailing spaces don't change any extractor output).
+    The day is part of the key because extract_datetime resolves dates against today.
+    """
+    normalized = (text or "").strip()
+    day = day or date.today()
+    raw = f"{rules_version}\n{day.isoformat()}\n{normalized}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ExtractionCache:
+    """Bounded LRU of extraction results with an optional database tier behind it."""
+
+    def __init__(self, max_size=4096, use_db=False):
+        self.max_size = max_size
+        self.use_db = use_db
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0 #found in memory
+        self.db_hits = 0 #found in the database tier
+        self.misses = 0 #had to run the extractors
+
+    def get(self, key):
+        "Returns a copy of the cached value for key, or None."
+
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(value)
+
+        if self.use_db:
+            from classification.models import ExtractionCacheEntry
+
+            row = ExtractionCacheEntry.objects.filter(key = key).values_list("payload", flat = True).first()
+            if row is not None:
+                self._remember(key, row)
+                with self._lock:
+                    self.db_hits += 1
+                return copy.deepcopy(row)
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, value, rules_version=""):
+        "Stores value (a JSON-serializable dict) under key."
+
+        self._remember(key, copy.deepcopy(value))
+
+        if self.use_db:
+            from classification.models import ExtractionCacheEntry
+
+            ExtractionCacheEntry.objects.bulk_create(
+                [ExtractionCacheEntry(key = key, rules_version = rules_version, payload = value)],
+                ignore_conflicts = True,
+            )
+
+    def set_many(self, entries):
+        "Stores (key, value, rules_version) triples, with one insert into the database tier."
+
+        entries = list(entries)
+        for key, value, _ in entries:
+            self._remember(key, copy.deepcopy(value))
+
+        if self.use_db and entries:
+            from classification.models import ExtractionCacheEntry
+
+            ExtractionCacheEntry.objects.bulk_create(
+                [ExtractionCacheEntry(key = key, rules_version = version, payload = value) for key, value, version in entries],
+                ignore_conflicts = True,
+            )
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last = False)
+
+    def clear(self):
+        "Empties the in-memory tier and resets the counters."
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.db_hits = self.misses = 0
+
+    def stats(self):
+        "Returns hit/miss counters and size, to check the cache is paying off."
+        with self._lock:
+            lookups = self.hits + self.db_hits + self.misses
+            return {
+                "hits": self.hits,
+                "db_hits": self.db_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.db_hits) / lookups, 3) if lookups else 0.0,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "db_tier": self.use_db,
+            }
@@ -0,0 +1,80 @@
+import hashlib
+import random
+import re
+import zlib
+
+#Near-duplicate detection for events with MinHash signatures and LSH banding.
+#Each event's normalized title + description is cut into word shingles and reduced to a short
+#MinHash signature. The signature is split into bands; every band (plus the event's start day)
+#becomes one blocking key. Two events that share a blocking key are likely duplicates, so a new
+#candidate only has to be compared with the few events that share one of its keys, never the whole table.
+#Pure Python (no Django) so it can be tested and benchmarked on its own.
+
+NUM_PERM = 32 #MinHash values per signature
+BANDS = 8 #blocking keys per event
+ROWS = NUM_PERM // BANDS #values per band; with 8x4 a pair with ~0.6 similarity shares a key half the time
+
+#Mersenne prime for the hash permutations h(x) = (a*x + b) mod P
+_PRIME = (1 << 61) - 1
+_rng = random.Random(1729) #fixed seed: signatures are stored, so they must be the same in every process
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+_NON_WORD_RX = re.compile(r"[^a-z0-9£]+")
+
+
+def normalize_text(text):
+    "Lowercases and replaces punctuation with spaces, so 'Jazz Night!!' and 'jazz night' look the same."
+    return _NON_WORD_RX.sub(" ", (text or "").lower()).strip()
+
+
+def shingles(text):
+    "Set of word pairs (single words for one-word texts) from the normalized text."
+    words = normalize_text(text).split()
+    if len(words) < 2:
+        return set(words)
+    return {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+
+def minhash_signature(shingleSet):
+    "MinHash signature (NUM_PERM ints) of a set of shingles, or an empty list for an empty set."
+
+    if not shingleSet:
+        return []
+
+    hashed = [zlib.crc32(s.encode("utf-8")) for s in shingleSet]
+    return [min((a * x + b) % _PRIME for x in hashed) for a, b in _PERMUTATIONS]
+
+
+def estimate_similarity(sigA, sigB):
+    "Estimated Jaccard similarity of the two shingle sets behind two signatures."
+    if not sigA or not sigB or len(sigA) != len(sigB):
+        return 0.0
+    same = sum(1 for x, y in zip(sigA, sigB) if x == y)
+    return same / len(sigA)
+
+
+def date_bucket(dateStart):
+    "Start day ('2025-11-18') of an ISO date string, or '' when the date is unknown."
+    if not dateStart:
+        return ""
+    return str(dateStart)[:10]
+
+
+def blocking_keys(signature, bucket=""):
+    "One key per LSH band, prefixed with the date bucket so only events on the same day collide."
+
+    keys = []
+    for band in range(BANDS):
+        values = signature[band * ROWS:(band + 1) * ROWS]
+        if not values:
+            break
+        digest = hashlib.blake2b(",".join(map(str, values)).encode("ascii"), digest_size = 8).hexdigest()
+        keys.append(f"{bucket}|{band}|{digest}")
+    return keys
+
+
+def event_fingerprint(title, description, dateStart):
+    "Returns (signature, date bucket, blocking keys) for an event's text and start date."
+    signature = minhash_signature(shingles(f"{title or ''} {description or ''}"))
+    bucket = date_bucket(dateStart)
+    return signature, bucket, blocking_keys(signature, bucket)
@@ -0,0 +1,54 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from classification.bench import compare, run_benchmark
+
+
+class Command(BaseCommand):
+    help = "Benchmark the classification extractors on a synthetic London caption corpus and write the results as JSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size", type=int, default=2000, help="Number of synthetic captions")
+        parser.add_argument("--seed", type=int, default=0, help="Corpus seed (same seed = same captions)")
+        parser.add_argument("--repeat", type=int, default=3, help="Passes per bench; the fastest is kept")
+        parser.add_argument(
+            "--cached",
+            action="store_true",
+            help="Let the end-to-end bench use the extraction cache (off by default so it measures the extractors)",
+        )
+        parser.add_argument("--output", default=None, help="Write the JSON results to this file")
+        parser.add_argument(
+            "--compare",
+            default=None,
+            help="JSON results from an earlier run to compare against (ratio above 1.0 = slower now)",
+        )
+
+    def handle(self, *args, **options):
+        if options["size"] < 1 or options["repeat"] < 1:
+            raise CommandError("--size and --repeat must be at least 1")
+
+        report = run_benchmark(options["size"], options["seed"], options["repeat"], options["cached"])
+
+        if options["compare"]:
+            try:
+                with open(options["compare"], encoding="utf-8") as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Couldn't read {options['compare']}: {e}")
+            report["compared_to"] = options["compare"]
+            report["mean_ratio"] = compare(baseline, report)
+
+        ratios = report.get("mean_ratio", {})
+        self.stdout.write(f"{report['size']} captions, seed {report['seed']}, rules {report['rules_version']}")
+        self.stdout.write(f"{'bench':<26}{'captions/s':>12}{'p50 µs':>10}{'p99 µs':>10}{'errors':>8}")
+        for name, result in report["results"].items():
+            line = f"{name:<26}{result['captions_per_sec']:>12.0f}{result['p50_us']:>10.1f}{result['p99_us']:>10.1f}{result['errors']:>8}"
+            if name in ratios:
+                line += f"  x{ratios[name]}"
+            self.stdout.write(line)
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
@@ -0,0 +1,84 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from classification.services import extraction_cache_stats, prune_extraction_cache
+from classification.tasks import default_worker_id, run_pending_jobs
+
+
+class Command(BaseCommand):
+    help = "Work through queued ClassificationJobs (run as many of these as you like, on any node)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=20,
+            help="Jobs claimed per round trip to the queue",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=2.0,
+            help="Seconds to wait when the queue is empty",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit when there are no due jobs left instead of waiting for more",
+        )
+        parser.add_argument(
+            "--worker-id",
+            default=None,
+            help="Name recorded on claimed jobs (default: hostname:pid)",
+        )
+        parser.add_argument(
+            "--prune-every",
+            type=float,
+            default=3600.0,
+            help="Seconds between prunes of the extraction cache's database tier (0 turns pruning off)",
+        )
+        parser.add_argument(
+            "--cache-days",
+            type=int,
+            default=7,
+            help="Age in days after which extraction cache rows are pruned",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be at least 1")
+
+        worker_id = options["worker_id"] or default_worker_id()
+        succeeded = failed = 0
+
+        # The database tier of the extraction cache (CLASSIFICATION_CACHE_DB) only grows on its own,
+        # so the workers prune it: once on start and then every --prune-every seconds
+        prune_every = options["prune_every"] if extraction_cache_stats()["db_tier"] else 0
+        last_prune = None
+
+        self.stdout.write(f"Classification worker {worker_id} started")
+        try:
+            while True:
+                if prune_every > 0 and (last_prune is None or time.monotonic() - last_prune >= prune_every):
+                    pruned = prune_extraction_cache(options["cache_days"])
+                    last_prune = time.monotonic()
+                    if pruned:
+                        self.stdout.write(f"Pruned {pruned} extraction cache entries")
+
+                ok, bad = run_pending_jobs(batch_size, worker_id)
+                succeeded += ok
+                failed += bad
+
+                if ok or bad:
+                    self.stdout.write(f"Jobs done: {succeeded} ok, {failed} failed")
+                    continue
+
+                if options["once"]:
+                    break
+                time.sleep(options["sleep"])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f"Worker {worker_id} finished: {succeeded} ok, {failed} failed"))
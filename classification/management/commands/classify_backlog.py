@@ -0,0 +1,131 @@
+import os
+import time
+from collections import deque
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from classification.pipeline import get_checkpoint, reset_checkpoint, save_batch, unprocessed_batches
+from classification.services import extract_batch
+
+
+def _init_worker():
+    "Sets Django up in worker processes started with 'spawn' (forked workers already have it)."
+    if not apps.ready:
+        django.setup()
+
+
+def _extract_chunk(rows, now):
+    """Runs in a worker process: extracts one chunk of (id, caption) rows without touching the database.
+    The extraction cache is skipped (its database tier would use the connection inherited through fork);
+    the parent fills it when it saves the chunk."""
+    return extract_batch(rows, now=now, use_cache=False)
+
+
+class Command(BaseCommand):
+    help = (
+        "Classify every RawPost that hasn't been processed yet (processed_at is NULL) with a pool of worker "
+        "processes, carrying on from the last checkpoint if a previous run was interrupted"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of worker processes running the extractors (1 = run in this process)",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="RawPosts per chunk sent to a worker and written back with one bulk insert",
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=None,
+            help="Stop after this many RawPosts",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            default="classify_backlog",
+            help="Name of the PipelineCheckpoint recording how far this backlog has got",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore the checkpoint and scan from the first RawPost (e.g. after clearing processed_at)",
+        )
+
+    def handle(self, *args, **options):
+        workers = options["workers"]
+        chunk_size = options["chunk_size"]
+        limit = options["limit"]
+        self.checkpoint = options["checkpoint"]
+
+        if workers < 1 or chunk_size < 1:
+            raise CommandError("--workers and --chunk-size must be at least 1")
+
+        if options["restart"]:
+            reset_checkpoint(self.checkpoint)
+        start_id = get_checkpoint(self.checkpoint).last_id
+        if start_id:
+            self.stdout.write(f"Resuming after RawPost {start_id}")
+
+        self.posts = 0
+        self.created = 0
+        started = time.monotonic()
+        # Every worker resolves relative dates against the same reference time
+        self.now = datetime.now()
+
+        chunks = unprocessed_batches(start_id, chunk_size, limit)
+
+        if workers == 1:
+            for rows in chunks:
+                self.save(rows, _extract_chunk(rows, self.now))
+        else:
+            self.run_pool(chunks, workers)
+
+        elapsed = time.monotonic() - started
+        rate = self.posts / elapsed if elapsed > 0 else 0.0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Classified {self.posts} RawPosts into {self.created} EventCandidates "
+                f"in {elapsed:.1f}s ({rate:.0f} posts/s, {workers} worker(s))"
+            )
+        )
+
+    def run_pool(self, chunks, workers):
+        first = next(chunks, None)
+        if first is None:
+            return
+
+        # Workers are forked on the first submit, so they must not inherit an open connection
+        connections.close_all()
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            pending = deque([(first, pool.submit(_extract_chunk, first, self.now))])
+
+            for rows in chunks:
+                pending.append((rows, pool.submit(_extract_chunk, rows, self.now)))
+
+                # Keep a couple of chunks per worker in flight so memory stays bounded.
+                # Chunks are saved in id order, so the checkpoint never jumps past unsaved work.
+                if len(pending) >= workers * 2:
+                    done_rows, future = pending.popleft()
+                    self.save(done_rows, future.result())
+
+            while pending:
+                done_rows, future = pending.popleft()
+                self.save(done_rows, future.result())
+
+    def save(self, rows, results):
+        # Candidates, processed_at and the checkpoint are written in one transaction per chunk
+        self.created += len(save_batch(self.checkpoint, rows, results, now=self.now, cache=True))
+        self.posts += len(rows)
+        self.stdout.write(f"Processed {self.posts} RawPosts ({self.created} candidates)")
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import Event
+from classification.services import index_events
+
+
+class Command(BaseCommand):
+    help = "Build the duplicate-matching index (fingerprints and blocking keys) for existing Events"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Events indexed per transaction",
+        )
+        parser.add_argument(
+            "--missing-only",
+            action="store_true",
+            help="Only index Events that have no fingerprint yet",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be at least 1")
+
+        events = Event.objects.only("id", "title", "description", "date_start").order_by("id")
+        if options["missing_only"]:
+            events = events.filter(fingerprint__isnull=True)
+
+        done = 0
+        last_id = 0
+        while True:
+            batch = list(events.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            index_events(batch, batch_size)
+            last_id = batch[-1].id
+            done += len(batch)
+            self.stdout.write(f"Indexed {done} Events")
+
+        self.stdout.write(self.style.SUCCESS(f"Indexed {done} Events for duplicate matching"))
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("classification", "0003_classificationjob"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PipelineCheckpoint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=50, unique=True)),
+                ("last_id", models.BigIntegerField(default=0)),
+                ("processed", models.BigIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0002_event_ai_tags"),
+        ("classification", "0004_pipelinecheckpoint"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EventFingerprint",
+            fields=[
+                (
+                    "event",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="fingerprint",
+                        serialize=False,
+                        to="api.event",
+                    ),
+                ),
+                ("signature", models.JSONField(default=list)),
+                ("date_bucket", models.CharField(blank=True, max_length=10)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="EventBlockKey",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("key", models.CharField(max_length=48)),
+                (
+                    "event",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="block_keys",
+                        to="api.event",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["key", "event"], name="classificat_key_1bd848_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0002_event_ai_tags"),
+        ("classification", "0005_eventfingerprint_eventblockkey"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="eventcandidate",
+            name="promoted_event",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="candidates",
+                to="api.event",
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-17 20:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0002_event_ai_tags"),
+        ("classification", "0006_eventcandidate_promoted_event"),
+        ("ingestion", "0002_rawpost_processed_id_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="eventcandidate",
+            index=models.Index(
+                fields=["needs_review", "score", "id"], name="candidate_review_idx"
+            ),
+        ),
+    ]
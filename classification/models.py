@@ -1,5 +1,7 @@
 from django.db import models
+from django.utils import timezone
 from ingestion.models import RawPost
+from api.models import Event
 
 # Create your models here.
 
@@ -9,6 +11,100 @@ class EventCandidate(models.Model):
     score = models.FloatField(default = 0)
     needs_review = models.BooleanField(default = True)
     created_at = models.DateTimeField(auto_now_add = True)
+    #Event this candidate was promoted to (a new one, or an existing duplicate); null until promoted
+    promoted_event = models.ForeignKey(Event, on_delete = models.SET_NULL, null = True, blank = True, related_name = "candidates")
+
+    class Meta:
+        indexes = [
+            #review queue: flagged candidates first, lowest score first (see classification/selectors.py)
+            models.Index(fields = ["needs_review", "score", "id"], name = "candidate_review_idx"),
+        ]
+
+    def __str__(self):
+        #Only uses raw_post if it was already loaded (select_related), so printing a list of
+        #candidates never runs one RawPost query per row
+        if EventCandidate.raw_post.field.is_cached(self):
+            source = self.raw_post.source
+        else:
+            source = f"RawPost {self.raw_post_id}"
+        return f" Event Candidate from {source} ({self.score:.2f})"
+
+
+class ExtractionCacheEntry(models.Model):
+    #Database tier of the extraction cache (see classification/cache.py)
+    key = models.CharField(max_length = 64, unique = True) #sha256 of rules version, day and caption
+    rules_version = models.CharField(max_length = 32, db_index = True)
+    payload = models.JSONField() #extractions, score and needs_review
+    created_at = models.DateTimeField(auto_now_add = True)
+
+    def __str__(self):
+        return f"Cached extraction {self.key[:12]} (rules {self.rules_version})"
+
+
+class ClassificationJob(models.Model):
+    #Work queue for building EventCandidates off the RawPost save path (see classification/tasks.py)
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    raw_post = models.ForeignKey(RawPost, on_delete = models.CASCADE, related_name = "classification_jobs")
+    status = models.CharField(max_length = 10, choices = STATUS_CHOICES, default = PENDING)
+    attempts = models.PositiveIntegerField(default = 0) #how many times a worker has picked it up
+    run_after = models.DateTimeField(default = timezone.now) #pushed back after each failure
+    locked_at = models.DateTimeField(null = True, blank = True) #when a worker claimed it
+    locked_by = models.CharField(max_length = 100, blank = True) #which worker claimed it
+    last_error = models.TextField(blank = True)
+    created_at = models.DateTimeField(auto_now_add = True)
+    updated_at = models.DateTimeField(auto_now = True)
+
+    class Meta:
+        indexes = [
+            #workers look for pending jobs that are due
+            models.Index(fields = ["status", "run_after"]),
+        ]
+
+    def __str__(self):
+        return f"Classification job {self.id} for RawPost {self.raw_post_id} ({self.status})"
+
+
+class PipelineCheckpoint(models.Model):
+    #How far a classification pipeline run has got, so a restart carries on from there (see classification/pipeline.py)
+    name = models.CharField(max_length = 50, unique = True)
+    last_id = models.BigIntegerField(default = 0) #every RawPost up to this id has been processed
+    processed = models.BigIntegerField(default = 0) #RawPosts processed by this pipeline so far
+    updated_at = models.DateTimeField(auto_now = True)
+
+    def __str__(self):
+        return f"Pipeline {self.name} at RawPost {self.last_id}"
+
+
+class EventFingerprint(models.Model):
+    #MinHash signature of an Event's title + description, used to confirm duplicates (see classification/dedupe.py)
+    event = models.OneToOneField(Event, on_delete = models.CASCADE, primary_key = True, related_name = "fingerprint")
+    signature = models.JSONField(default = list)
+    date_bucket = models.CharField(max_length = 10, blank = True) #start day, '' if unknown
+
+    def __str__(self):
+        return f"Fingerprint of Event {self.event_id}"
+
+
+class EventBlockKey(models.Model):
+    #One row per LSH band of an Event's signature; events sharing a key are likely duplicates
+    event = models.ForeignKey(Event, on_delete = models.CASCADE, related_name = "block_keys")
+    key = models.CharField(max_length = 48)
+
+    class Meta:
+        indexes = [
+            #lookups filter on key and only need event_id back
+            models.Index(fields = ["key", "event"]),
+        ]
 
     def __str__(self):
-        return f" Event Candidate from {self.raw_post.source} ({self.score:.2f})"
\ No newline at end of file
+        return f"{self.key} -> Event {self.event_id}"
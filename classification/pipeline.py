@@ -0,0 +1,93 @@
+from datetime import datetime
+
+from django.db import transaction
+
+from classification.models import PipelineCheckpoint
+from classification.services import extract_batch, save_extracted_batch
+from ingestion.models import RawPost
+
+#Incremental, resumable classification of RawPosts.
+#Unprocessed posts (processed_at IS NULL) are read in keyset-paginated batches ordered by id,
+#using the (processed_at, id) index on RawPost. Each batch's candidates, processed_at stamps and the
+#checkpoint are saved in one transaction, so after a crash a re-run starts at the checkpoint and
+#never redoes or duplicates a finished batch.
+#The checkpoint only decides where a run starts: ids are allocated before their transaction commits, so a
+#post can appear below the checkpoint after a run has passed it. Every run therefore ends with a sweep of
+#the ids below its starting checkpoint; processed_at, not the checkpoint, is what marks a post as done.
+
+
+def get_checkpoint(name):
+    "Returns the PipelineCheckpoint called name, creating it at the start if needed."
+    checkpoint, _ = PipelineCheckpoint.objects.get_or_create(name = name)
+    return checkpoint
+
+
+def reset_checkpoint(name):
+    "Moves a pipeline back to the start (e.g. after clearing processed_at to reprocess posts)."
+    PipelineCheckpoint.objects.filter(name = name).update(last_id = 0)
+
+
+def advance_checkpoint(name, last_id, processed):
+    "Moves the checkpoint forward to last_id (never backwards) and adds processed to its count."
+    checkpoint = PipelineCheckpoint.objects.select_for_update().get(name = name)
+    if last_id > checkpoint.last_id:
+        checkpoint.last_id = last_id
+    checkpoint.processed += processed
+    checkpoint.save(update_fields = ["last_id", "processed", "updated_at"])
+
+
+def unprocessed_batches(after_id=0, batch_size=500, limit=None):
+    """Yields lists of (id, caption) for unprocessed RawPosts, one indexed range query per batch:
+    first those with id > after_id, then a sweep of the ids up to after_id for posts committed late."""
+
+    remaining = [limit]
+    yield from _range_batches(after_id, None, batch_size, remaining)
+    if after_id:
+        yield from _range_batches(0, after_id, batch_size, remaining)
+
+
+def _range_batches(after_id, up_to_id, batch_size, remaining):
+    #remaining is a one-item list shared by both scans of unprocessed_batches
+    last_id = after_id
+
+    while remaining[0] is None or remaining[0] > 0:
+        size = batch_size if remaining[0] is None else min(batch_size, remaining[0])
+        posts = RawPost.objects.filter(processed_at__isnull = True, id__gt = last_id)
+        if up_to_id is not None:
+            posts = posts.filter(id__lte = up_to_id)
+        rows = list(posts.order_by("id").values_list("id", "caption")[:size])
+        if not rows:
+            return
+
+        last_id = rows[-1][0]
+        if remaining[0] is not None:
+            remaining[0] -= len(rows)
+        yield rows
+
+
+def save_batch(name, rows, results, now=None, cache=False):
+    """Saves one batch: candidates, processed_at stamps and the checkpoint together.
+    cache=True also puts results extracted without the cache (in worker processes, against the
+    reference time now) into the extraction cache.
+    Returns the ids of the new EventCandidates."""
+    with transaction.atomic():
+        createdIDs = save_extracted_batch(
+            results, processedIDs = [rawPostID for rawPostID, _ in rows], rows = rows if cache else None, now = now,
+        )
+        advance_checkpoint(name, rows[-1][0], len(rows))
+    return createdIDs
+
+
+def run_pipeline(name="default", batch_size=500, limit=None):
+    """Classifies unprocessed RawPosts in this process, starting from the checkpoint called name.
+    Returns (posts processed, candidates created)."""
+
+    checkpoint = get_checkpoint(name)
+    now = datetime.now() #one reference time for relative dates across the run
+    posts = created = 0
+
+    for rows in unprocessed_batches(checkpoint.last_id, batch_size, limit):
+        created += len(save_batch(name, rows, extract_batch(rows, now=now)))
+        posts += len(rows)
+
+    return posts, created
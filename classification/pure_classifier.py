@@ -1,36 +1,104 @@
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import islice
+
+# Keyword table for the tagger: tag -> needles (plain lowercase substrings).
+# Order matters, tags come out in this order.
+TAG_RULES = {
+    "techno": ["techno"],
+    "house": ["house music", "house"],
+    "dnb": ["dnb", "drum and bass", "drum & bass"],
+    "jazz": ["jazz", "ensemble", "quartet"],
+    "film": ["film", "screening", "cinema", "movie", "documentary", "banff"],
+    "festival": ["festival"],
+    "comedy": ["comedy", "stand-up", "standup"],
+    "theatre": ["theatre", "theater", "play"],
+    "art": ["art show", "exhibition", "gallery"],
+    "market": ["market", "fair", "flea"],
+    "food": ["food", "street food", "supper club"],
+    "talk": ["talk", "lecture", "panel", "q&a", "q & a"],
+    "workshop": ["workshop", "class", "course"],
+    "family": ["family", "kids", "child-friendly", "all ages"],
+    "live": ["live band", "live music", "gig"],
+    "club": ["club night", "dj set", "rave"],
+    "networking": ["networking", "meetup", "mixer"],
+    "free": ["free entry", "free event", "free"],
+    "18+": ["18+", "18 plus"],
+    "21+": ["21+", "21 plus"],
+}
+
+# Built once at import: every needle with the bit of the tag it belongs to.
+# A caption's matches are collected as one int (bit i set = tag i found).
+_TAGS = list(TAG_RULES)
+_NEEDLES = [
+    (needle, 1 << i)
+    for i, tag in enumerate(_TAGS)
+    for needle in TAG_RULES[tag]
+]
+
+# Captions are joined with this before a batch scan; no needle contains it,
+# so a match can never run from one caption into the next
+_SEPARATOR = "\x00"
+
+
+@lru_cache(maxsize=4096)
+def _decode(mask: int):
+    """Tag bitmask -> (tags, score)."""
+    tags = tuple(tag for i, tag in enumerate(_TAGS) if mask >> i & 1)
+    score = min(len(tags) / 4.0, 1.0)
+    return tags, round(score, 3)
+
+
+def _result(mask: int):
+    tags, score = _decode(mask)
+    return list(tags), score
+
+
 def classify_caption(text: str):
     """Keyword-based tagger for events."""
     t = (text or "").lower()
 
-    TAG_RULES = {
-        "techno": ["techno"],
-        "house": ["house music", "house"],
-        "dnb": ["dnb", "drum and bass", "drum & bass"],
-        "jazz": ["jazz", "ensemble", "quartet"],
-        "film": ["film", "screening", "cinema", "movie", "documentary", "banff"],
-        "festival": ["festival"],
-        "comedy": ["comedy", "stand-up", "standup"],
-        "theatre": ["theatre", "theater", "play"],
-        "art": ["art show", "exhibition", "gallery"],
-        "market": ["market", "fair", "flea"],
-        "food": ["food", "street food", "supper club"],
-        "talk": ["talk", "lecture", "panel", "q&a", "q & a"],
-        "workshop": ["workshop", "class", "course"],
-        "family": ["family", "kids", "child-friendly", "all ages"],
-        "live": ["live band", "live music", "gig"],
-        "club": ["club night", "dj set", "rave"],
-        "networking": ["networking", "meetup", "mixer"],
-        "free": ["free entry", "free event", "free"],
-        "18+": ["18+", "18 plus"],
-        "21+": ["21+", "21 plus"],
-    }
-
-    tags = []
-    for tag, needles in TAG_RULES.items():
-        for n in needles:
-            if n in t:
-                tags.append(tag)
-                break
+    mask = 0
+    for needle, bit in _NEEDLES:
+        # one hit per tag is enough
+        if not mask & bit and needle in t:
+            mask |= bit
 
-    score = min(len(tags) / 4.0, 1.0)
-    return list(dict.fromkeys(tags)), round(score, 3)
+    return _result(mask)
+
+
+def _classify_chunk(texts):
+    """Tags a list of captions with one scan of the joined text per needle."""
+    lowered = [(t or "").lower() for t in texts]
+    joined = _SEPARATOR.join(lowered)
+
+    # where each caption starts in joined (plus an end marker)
+    starts = []
+    pos = 0
+    for t in lowered:
+        starts.append(pos)
+        pos += len(t) + 1
+    starts.append(pos)
+
+    masks = [0] * len(lowered)
+    for needle, bit in _NEEDLES:
+        hit = joined.find(needle)
+        while hit != -1:
+            i = bisect_right(starts, hit) - 1
+            masks[i] |= bit
+            # skip the rest of this caption, it already has the tag
+            hit = joined.find(needle, starts[i + 1])
+
+    return [_result(mask) for mask in masks]
+
+
+def classify_captions(texts, chunk_size: int = 1000):
+    """Batch version of classify_caption.
+    Takes any iterable of captions and yields (tags, score) for each one, in order.
+    Captions are read chunk_size at a time, so a huge CSV never has to be in memory at once."""
+    it = iter(texts)
+    while True:
+        chunk = list(islice(it, chunk_size))
+        if not chunk:
+            return
+        yield from _classify_chunk(chunk)
@@ -0,0 +1,246 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+#Compiled form of the keyword rules in data/keyword_rules.json
+#The rules are compiled once when they are loaded. Scoring a caption lowercases it once,
+#checks which rule "anchors" (the literal text every match of a rule has to start with)
+#are in it, and only runs the full regex for the rules whose anchor was found
+#RuleStore keeps the current compiled rules and reloads them when the JSON file changes
+
+#Characters that end the literal start of a pattern
+_REGEX_META = set(".^$*+?{}[]|()")
+_QUANTIFIERS = set("*+?{")
+
+#Non-ASCII characters that re.IGNORECASE treats as equal to an ASCII letter (e.g. the Kelvin sign and 'k')
+#If a caption has one of these, plain lowercasing is not enough so every rule is checked instead
+_ASCII_FOLD_RX = re.compile(r"[a-z]", re.IGNORECASE)
+
+
+def literal_anchor(pattern):
+    """
+    Returns the lowercase literal text that every match of a regex pattern starts with,
+    or '' if no safe anchor can be worked out (the rule is then always checked).
+    e.g. '\\bdeep\\s+house\\b' -> 'deep', '\\bshort films?\\b' -> 'short film'
+    """
+    #Alternations can match more than one prefix
+    if "|" in pattern:
+        return ""
+
+    i = 0
+    #Leading word boundaries don't use up any characters
+    while pattern.startswith("\\b", i):
+        i += 2
+
+    anchor = []
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch == "\\":
+            #Escaped punctuation (like '\\+') is a literal, escaped letters are classes (like '\\s')
+            if i + 1 >= len(pattern) or pattern[i + 1].isalnum():
+                break
+            literal, step = pattern[i + 1], 2
+        elif ch in _REGEX_META:
+            break
+        else:
+            literal, step = ch, 1
+
+        #A character followed by a quantifier might repeat or be missing
+        if pattern[i + step:i + step + 1] in _QUANTIFIERS:
+            break
+
+        #Only keep characters whose case-insensitive match is the same as a lowercase substring check
+        if not (literal.isascii() or literal.lower() == literal == literal.upper()):
+            break
+
+        anchor.append(literal)
+        i += step
+
+    return "".join(anchor).lower()
+
+
+class CompiledRules:
+    """Keyword rules compiled once and scored against a caption in a few passes."""
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.always = [] #rules with no anchor, checked for every caption
+        self.by_anchor = {} #anchor -> rules that start with it
+
+        for index, rule in enumerate(rules):
+            pattern = rule["pattern"]
+            tag = rule["tag"]
+            weight = float(rule.get("weight", 1.0))
+
+            # If a pattern is invalid (e.g. unbalanced parenthesis), skip it
+            try:
+                regex = re.compile(pattern, flags=re.IGNORECASE)
+            except re.error as e:
+                print(f"[suggest_tags] Skipping bad regex for tag {tag!r}: {pattern!r} ({e})")
+                continue
+
+            entry = (index, regex, tag, weight)
+            anchor = literal_anchor(pattern)
+            if anchor:
+                self.by_anchor.setdefault(anchor, []).append(entry)
+            else:
+                self.always.append(entry)
+
+        self.anchors = list(self.by_anchor)
+
+    def matching_rules(self, text, lowered=None):
+        "Returns the compiled rules that could match text, in the same order as the JSON file."
+
+        if lowered is None:
+            lowered = text.lower()
+
+        #Rare captions with special case-folding characters skip the anchor check
+        if not text.isascii():
+            for ch in set(text):
+                if not ch.isascii() and _ASCII_FOLD_RX.match(ch):
+                    return sorted(self.always + [e for entries in self.by_anchor.values() for e in entries])
+
+        candidates = list(self.always)
+        for anchor in self.anchors:
+            if anchor in lowered:
+                candidates.extend(self.by_anchor[anchor])
+
+        candidates.sort()
+        return candidates
+
+    def score(self, text, lowered=None):
+        "Returns (tag, score) pairs sorted by score descending, same as suggest_tags."
+
+        tag_scores = {}
+        for _, regex, tag, weight in self.matching_rules(text, lowered):
+            if regex.search(text):
+                tag_scores[tag] = tag_scores.get(tag, 0.0) + weight
+
+        return sorted(tag_scores.items(), key=lambda kv: kv[1], reverse=True)
+
+
+class RuleSet:
+    """One loaded version of the keyword rules: the rule dicts, their compiled form and a version id."""
+
+    def __init__(self, rules, version, stamp=None):
+        self.rules = rules
+        self.compiled = CompiledRules(rules)
+        self.version = version #short content hash, stamped on extraction results
+        self.stamp = stamp #(mtime_ns, size) of the file these rules were read from
+
+
+def read_rule_file(path):
+    "Reads and validates a keyword rules JSON file, returning (rules, version)."
+
+    with open(path, "rb") as f:
+        raw = f.read()
+
+    data = json.loads(raw.decode("utf-8"))
+
+    for i, ruleDict in enumerate(data):
+        for key in ("pattern", "tag", "weight", "category"):
+            if key not in ruleDict:
+                raise ValueError(f"Rule at index {i} is missing the key: {key}")
+
+    return data, hashlib.sha1(raw).hexdigest()[:12]
+
+
+def file_stamp(path):
+    "Returns (mtime_ns, size) for path, or None if it can't be read."
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class RuleStore:
+    """
+    Keeps the current RuleSet for a rules file and picks up edits without a restart.
+    At most once every check_interval seconds get() stats the file; if its mtime or size
+    changed, the new rules are compiled in a background thread and swapped in when ready.
+    Callers keep using the old rules until then.
+    """
+
+    def __init__(self, path, check_interval=2.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._current = None
+        self._lock = threading.Lock()
+        self._reloading = False
+        self._next_check = 0.0
+
+    def get(self):
+        "Returns the current RuleSet, loading it on first use."
+        current = self._current
+        if current is None:
+            return self.reload()
+
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + self.check_interval
+            stamp = file_stamp(self.path)
+            if stamp != current.stamp:
+                self._start_background_reload()
+
+        return current
+
+    def reload(self):
+        """
+        Loads the rules file right away and swaps it in.
+        If the file can't be read or parsed the previous rules are kept
+        (or an empty rule set is used if nothing has been loaded yet).
+        """
+        with self._lock:
+            stamp = file_stamp(self.path)
+            current = self._current
+
+            try:
+                rules, version = read_rule_file(self.path)
+            except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                #Both are ValueErrors, but a file that isn't valid JSON is a read error, not an invalid rule
+                return self._read_error(stamp, e)
+            except ValueError:
+                #A rule missing a key is a mistake in the file, not a read error
+                if current is None:
+                    raise
+                print(f"[load_keyword_rules] Keeping rules {current.version}: {self.path} has an invalid rule")
+                current.stamp = stamp
+                return current
+            except Exception as e:
+                return self._read_error(stamp, e)
+
+            if current is not None and current.version == version:
+                #Touched but not changed, no need to recompile
+                current.stamp = stamp
+                return current
+
+            self._current = RuleSet(rules, version, stamp)
+            return self._current
+
+    def _read_error(self, stamp, error):
+        "Keeps the previous rules (or an empty rule set if nothing has been loaded yet) after a failed read."
+        print(f"[load_keyword_rules] ERROR reading {self.path}: {error}")
+        current = self._current
+        if current is None:
+            current = RuleSet([], "empty")
+            self._current = current
+        current.stamp = stamp
+        return current
+
+    def _start_background_reload(self):
+        with self._lock:
+            if self._reloading:
+                return
+            self._reloading = True
+
+        def run():
+            try:
+                self.reload()
+            finally:
+                self._reloading = False
+
+        threading.Thread(target=run, name="keyword-rules-reload", daemon=True).start()
@@ -0,0 +1,59 @@
+from classification.models import EventCandidate
+
+#Read-side queries for classification.
+#The review queue is ordered flagged candidates first (needs_review=True), then by ascending score and id,
+#and paged with a keyset cursor instead of OFFSET: every page is a range scan on the
+#(needs_review, score, id) index starting where the last page stopped, so page 1000 costs the same as page 1.
+
+REVIEW_PAGE_SIZE = 50
+
+
+def encode_review_cursor(candidate):
+    "Cursor pointing just after candidate: 'needs_review:score:id'."
+    return f"{int(candidate.needs_review)}:{candidate.score!r}:{candidate.id}"
+
+
+def decode_review_cursor(cursor):
+    "Returns (needs_review, score, id) from a cursor, or raises ValueError if it's malformed."
+    flag, score, candidateID = cursor.split(":")
+    if flag not in ("0", "1"):
+        raise ValueError(f"Bad review cursor {cursor!r}")
+    return flag == "1", float(score), int(candidateID)
+
+
+def review_segment(needsReview, score=None, candidateID=None):
+    "Candidates with one needs_review value, ordered by (score, id), starting after (score, candidateID) if given."
+
+    #needs_review__in rather than needs_review=: Django writes the latter as a bare boolean
+    #column in the WHERE clause, which SQLite won't match against the index
+    rows = EventCandidate.objects.select_related("raw_post").filter(needs_review__in = [needsReview])
+    if score is not None:
+        rows = rows.filter(score__gte = score).exclude(score = score, id__lte = candidateID)
+    return rows.order_by("score", "id")
+
+
+def review_queue_page(cursor=None, limit=REVIEW_PAGE_SIZE):
+    """One page of the review queue.
+    Returns (candidates with raw_post loaded, cursor for the next page or None at the end)."""
+
+    if cursor:
+        needsReview, score, candidateID = decode_review_cursor(cursor)
+    else:
+        needsReview, score, candidateID = True, None, None
+
+    page = []
+    #needs_review=True segment first, then the rest; each one is a single index range scan
+    for flag in ([True, False] if needsReview else [False]):
+        if flag == needsReview:
+            rows = review_segment(flag, score, candidateID)
+        else:
+            rows = review_segment(flag)
+        page.extend(rows[:limit + 1 - len(page)])
+
+        if len(page) > limit:
+            break
+
+    if len(page) > limit:
+        page = page[:limit]
+        return page, encode_review_cursor(page[-1])
+    return page, None
@@ -1,13 +1,33 @@
-import json #to read keyword_rules.json
-import re
+import json
 from pathlib import Path
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import QuerySet
 from django.utils import timezone
 from ingestion.models import RawPost
-from classification.models import EventCandidate
+from classification.models import EventBlockKey, EventCandidate, EventFingerprint, ExtractionCacheEntry
 from datetime import datetime, timedelta
-from api.models import Event
-
-_RULES_CACHE = None
+from api.models import Event, parse_event_datetime
+from api.services import sync_event_tags
+from api.signals import events_created
+from api.spatial import coordinates_from_raw_json, geocell
+from classification.rule_engine import RuleStore
+from classification.cache import ExtractionCache, caption_cache_key
+from classification.analysis import (
+    AnalyzedCaption, analyze_caption, TIME_FRAGMENT_RX
+)
+from classification.dedupe import estimate_similarity, event_fingerprint
+
+#Keyword rules live in data/keyword_rules.json. The store reloads them in the background
+#when the file changes, so editing rules doesn't need a restart of every worker
+RULES_PATH = Path(__file__).resolve().parent / "data" / "keyword_rules.json"
+_RULE_STORE = RuleStore(RULES_PATH)
+
+#Extraction results for captions we've already seen (in-process LRU, plus a shared DB table if turned on)
+_EXTRACTION_CACHE = ExtractionCache(
+    max_size = getattr(settings, "CLASSIFICATION_CACHE_SIZE", 4096),
+    use_db = getattr(settings, "CLASSIFICATION_CACHE_DB", False),
+)
 
 #load_keyword_rules() and suggest_tags(text) power the AI keyword filtering 
 #Weight ranks events by relevance, filters out weak signals, and combines scores from genres, locations, and keywords
@@ -16,103 +36,62 @@ _RULES_CACHE = None
 def load_keyword_rules():
     """
     Returns a list of rule dicts from JSON.
-    Caches rules in memory after first load.
+    Rules are cached in memory and reloaded when keyword_rules.json changes.
     """
-    global _RULES_CACHE
-    if _RULES_CACHE is not None:
-        return _RULES_CACHE
+    return _RULE_STORE.get().rules
 
-    rules_path = Path(__file__).resolve().parent / "data" / "keyword_rules.json"
+def load_compiled_rules():
+    "Returns the CompiledRules built from the current keyword rules."
+    return _RULE_STORE.get().compiled
 
-    try:
-        with open(rules_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-    except Exception as e:
-        print(f"[load_keyword_rules] ERROR reading {rules_path}: {e}")
-        _RULES_CACHE = []
-        return _RULES_CACHE
+def current_rule_set():
+    "Returns the current RuleSet (rules, compiled rules and version id) as one consistent snapshot."
+    return _RULE_STORE.get()
 
-    for i, ruleDict in enumerate(data):
-        for key in ("pattern", "tag", "weight", "category"):
-            if key not in ruleDict:
-                raise ValueError(f"Rule at index {i} is missing the key: {key}")
+def get_rules_version():
+    "Returns the version id of the keyword rules currently in use, for stamping on results."
+    return _RULE_STORE.get().version
 
-    _RULES_CACHE = data
-    return _RULES_CACHE
+def reload_keyword_rules():
+    "Re-reads keyword_rules.json right away instead of waiting for the background check."
+    return _RULE_STORE.reload()
 
-def suggest_tags(text):
+def suggest_tags(text, rule_set=None):
     """
     Takes event text, applies regex-based keyword rules, and returns a list of
     (tag, score) pairs sorted by score descending.
+    text can be a string or an AnalyzedCaption shared with the other extractors.
+    Pass rule_set (from current_rule_set()) to tag with the same rules you stamp on the result.
     """
+    caption = text if isinstance(text, AnalyzedCaption) else None
+    if caption is not None:
+        text = caption.text
+
     if not text:
         return []
 
-    rules = load_keyword_rules()
-    tag_scores = {}
-
-    for rule in rules:
-        pattern = rule["pattern"]
-        tag = rule["tag"]
-        weight = float(rule.get("weight", 1.0))
-
-        # Case-insensitive regex search with safety
-        try:
-            if re.search(pattern, text, flags=re.IGNORECASE):
-                tag_scores[tag] = tag_scores.get(tag, 0.0) + weight
-        except re.error as e:
-            # If a pattern is invalid (e.g. unbalanced parenthesis), skip it
-            print(f"[suggest_tags] Skipping bad regex for tag {tag!r}: {pattern!r} ({e})")
-            continue
+    if rule_set is None:
+        rule_set = _RULE_STORE.get()
 
-    # Convert dict to sorted list of (tag, score)
-    return sorted(tag_scores.items(), key=lambda kv: kv[1], reverse=True)
+    #Only the rules whose literal start appears in the text are run as regexes
+    if caption is not None:
+        return rule_set.compiled.score(text, caption.lowered)
+    return rule_set.compiled.score(text)
 
 def extract_price_and_age(text):
-    "Extracts price and age information from website event information."
+    """Extracts price and age information from website event information.
+    text can be a string or an AnalyzedCaption shared with the other extractors."""
+
+    caption = analyze_caption(text)
 
     #if there is no text
-    if text == '':
+    if caption.text == '':
         return {"price_min": None, "price_max": None, "age": None}
 
-    words = text.split() #splits event information (seperates by words)
-    prices = [] #initialize list that stores all prices listed for event
-    age = None #initialize age variable that will store age requirement for event
-
-    #loop reads event information
-    for word in words:
-        w = word.lower()
-
-        #Price Checker
-        if "£" in w:
-
-            #builds event price
-            num = ""
-           
-            for ch in w:
-                if ch.isdigit() or ch == ".":
-                    num += ch
-            
-            if num:
-                prices.append(float(num))
-
-        #British monetary slang
-        elif "fiver" in w:
-            prices.append(5.0)
-        
-        elif "tenner" in w:
-            prices.append(10.0)
-        
-        elif "free" in w:
-            prices.append(0.0)
-        
-        #Age checker
-        if "18+" in w:
-            age = "18+"
-        
-        elif "21+" in w:
-            age = "21+"
-    
+    #Prices and age are picked out of the words in the caption's single word pass
+    facts = caption.word_facts
+    prices = facts.prices
+
     #Min and max price checker if more than one price is listed
     if prices != []:
         price_min = min(prices)
@@ -122,7 +101,7 @@ def extract_price_and_age(text):
         price_min = None
         price_max = None
    
-    return {"price_min": price_min, "price_max": price_max, "age": age}
+    return {"price_min": price_min, "price_max": price_max, "age": facts.age}
 
 #For extract_datetime
 MONTHS = {
@@ -150,7 +129,7 @@ def parse_time_fragment(text):
     #(\d{1,2}) finds 1 or 2 digits for the hour (like '10' or '22')
     #(?::(\d{2}))? finds colon + 2 digits for minutes (like ':30')
     #\s*(am|pm)?$ finds 'am' or 'pm'
-    m = re.match(r"(\d{1,2})(?::(\d{2}))?\s*(am|pm)?$",text)
+    m = TIME_FRAGMENT_RX.match(text)
 
     #If no match then no time is returned
     if not m:
@@ -173,46 +152,56 @@ def parse_time_fragment(text):
     
     return (hour, minute)
 
-def guess_base_date(text):
-    "Picks a base calender date from the event information."
+def _date_without_year(day, mon, now):
+    "Date for a day and month with no year: this year, or next year if that is more than 2 months ago."
 
-    text = text.strip().lower()
-    now = datetime.now() #gets the current date and time as the default
-
-    #Uses regex to find a date like '12 Oct' or '12 October'
-    #(\d{1,2}) finds the day (1-31)
-    #Then regex lookds for the month (abbreviation or full name)
-        # Find a date like '12 Oct' or '12 October'
-    # Group 1 = day, Group 2 = month name/abbrev
-    m = re.search(
-        r"\b(\d{1,2})\s*"
-        r"(jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec|"
-        r"january|february|march|april|may|june|july|august|september|october|november|december)\b",
-        text,
-        flags=re.IGNORECASE,
-    )
+    year = now.year #assumes current year
+    try_date = datetime(year, mon, day)
+
+    #if the date is more than 2 months in the past, it is next year
+    if (try_date - now).days <-60:
+        year += 1
+    return datetime(year, mon, day)
+
+def guess_base_date(text, now=None):
+    """Picks a base calender date from the event information (a string or an AnalyzedCaption).
+    Dates without a year and words like 'tonight' are resolved against now (default: the current time);
+    pass the same now for a whole batch to get the same answers every run."""
+
+    caption = analyze_caption(text)
+    text = caption.stripped_lower
+    now = now or datetime.now() #gets the current date and time as the default
+
+    #Looks for a date like '12 Oct' or '12 October'
+    #Group 1 = day, Group 2 = month name/abbrev
+    m = caption.month_date
 
     if m:
         day = int(m.group(1))
         mon = MONTHS[m.group(2).lower()] #month mapped to number
-        year = now.year #assumes current year
-        try_date = datetime(year, mon, day)
-
-        #if the date is more than 2 months in the past, it is next year
-        if (try_date - now).days <-60:
-            year += 1
-        return datetime(year, mon, day)
+        #Impossible dates like '31 feb' are ignored rather than crashing the whole caption
+        try:
+            return _date_without_year(day, mon, now)
+        except ValueError:
+            pass
     
-    #Uses regex to find date in numeric format like '12/10' or '12-10' or '12/10/24'
-    m = re.search(r"\b(\d{1,2})[/-](\d{1,2})(?:[/-](\d{2,4}))?\b", text)
+    #Looks for a date in numeric format like '12/10' or '12/10/24' (never a time range like '7:30-10:30pm')
+    m = caption.numeric_date
 
     if m:
-        d = int(m.group(1))
-        mon = int(m.group(2))
-        year = int(m.group(3)) #year or current year
-        if year <100: #if 2-digit year like '21' add 2000 so it is converted to '2021'
-            year += 2000
-        return datetime(year, mon, d)
+        d = int(m.group("day"))
+        mon = int(m.group("month"))
+        try:
+            if m.group("year"):
+                year = int(m.group("year"))
+                if year <100: #if 2-digit year like '21' add 2000 so it is converted to '2021'
+                    year += 2000
+                return datetime(year, mon, d)
+            #no year, e.g. '12/10' (same rule as '12 Oct')
+            return _date_without_year(d, mon, now)
+        except ValueError:
+            #Not a real date (e.g. '31/02')
+            pass
     
     if "tonight" in text:
         return now
@@ -224,11 +213,7 @@ def guess_base_date(text):
 def find_time_range(text):
     "Finds '10pm-4am' or '22:00-04:00' and returns ((h1,m1), (h2, m2)) or None"
 
-    m = re.search(
-        r"(\d{1,2}(?::\d{2})?\s*(?:am|pm)?)\s*[-–]\s*(\d{1,2}(?::\d{2})?\s*(?:am|pm)?)",
-        text,
-        flags=re.IGNORECASE,
-    )
+    m = analyze_caption(text).time_range
     if not m:
         return None
 
@@ -244,7 +229,7 @@ def find_single_time(text):
     "Finds a single time like '10pm' or '22:30' and returns (h,m) or None."
 
     #Regex searches for a single time
-    m = re.search(r"\b(\d{1,2}(?::\d{2})?\s*(?:am|pm)?)\b", text, flags=re.IGNORECASE )
+    m = analyze_caption(text).single_time
 
     #If no match found returns none
     if not m:
@@ -252,16 +237,20 @@ def find_single_time(text):
     
     return parse_time_fragment(m.group(1))
 
-def extract_datetime(text): 
-    "Extracts date and time information from website event information."
+def extract_datetime(text, now=None): 
+    """Extracts date and time information from website event information.
+    now is the reference time for dates without a year, 'tonight' and 'tomorrow' (default: the current time)."""
+
+    caption = analyze_caption(text)
 
-    if text == '':
+    if caption.text == '':
         return None
     
-    base = guess_base_date(text)
+    #Seconds are dropped so the result only depends on the reference day, not the exact moment it ran
+    base = guess_base_date(caption, now).replace(second = 0, microsecond = 0)
 
     #Finds a time range if there is a time range stated for event
-    range = find_time_range(text)
+    range = find_time_range(caption)
     if range:
         (hour1, minute1), (hour2,minute2) = range
         start = base.replace(hour = hour1, minute = minute1)
@@ -273,7 +262,7 @@ def extract_datetime(text):
         return (start, end)
 
     #Finds a single time if there is a single time stated for event
-    singleTime = find_single_time(text)
+    singleTime = find_single_time(caption)
     if singleTime:
         h, m = singleTime
         start = base.replace(hour=h, minute=m)
@@ -284,36 +273,28 @@ def extract_datetime(text):
 
     return None
 
+def extract_datetime_many(texts, now=None):
+    """Batch version of extract_datetime: one reference time (now, or the current time when the batch starts)
+    is used for every caption, so the whole batch resolves relative dates the same way.
+    Returns a list with one (start, end) or None per caption."""
+
+    now = now or datetime.now()
+    return [extract_datetime(text, now) for text in texts]
+
 def extract_venue(text):
     "Extracts venue(address) information from website event information."
 
+    caption = analyze_caption(text)
+
     #if there is no text
-    if text == '':
+    if caption.text == '':
         return {"postcode": None, "area": None, "name": None}
 
-    words = text.split() #splits event information (seperates by words)
-    postcode = None
-    area = None
+    #Postcode and area come from the same word pass as price and age
+    facts = caption.word_facts
     name = None
 
-    londonAreas = ["dalston", "peckham", "brixton", "shoreditch", 
-                   "camden", "deptford", "hackney", "soho", "islington", 
-                   "clapham", "stratford", "notting", "elephant", "bethnal", "angel"] #have to update
-
-    for word in words:
-        w = word.lower()
-
-        #Postcode
-        #If the word has at least 2 characters and the first is a letter and the second is a number
-        if len(w) >= 2 and w[0].isalpha and w[1].isdigit():
-            postcode = w.upper()
-
-        for areaName in londonAreas:
-            if areaName in w:
-                area = areaName
-                break
-
-    return {"postcode": postcode, "area": area, "name": name}
+    return {"postcode": facts.postcode, "area": facts.area, "name": name}
 
 
 def score_candidate_quality(extractions): 
@@ -380,23 +361,58 @@ def score_candidate_quality(extractions):
 
     return score
 
-def build_event_candidate(rawPostID): 
-    """Function pulls a a raw event by its ID, runs all AI extractors, builds a JSON-like dictionary"
-    of extracted data, calculates the confidence score, and saves everythign as a new EventCandidate object in the database."""
+def run_extractors(text, rule_set=None, now=None):
+    """Runs all AI extractors over one caption and returns (extractions, score, needsReview).
+    extractions is the JSON-like dictionary stored on EventCandidate.extracted_json.
+    now is the reference time for relative dates (default: the current time).
+    Results are cached by caption hash, rules version and reference day, so a caption seen before is not re-extracted."""
 
-    #Gets the raw event 
-    raw = RawPost.objects.get(pk = rawPostID)
-    text = raw.caption or ""
+    ruleSet = rule_set or current_rule_set()
+    key = caption_cache_key(text, ruleSet.version, now.date() if now else None)
+
+    cached = _EXTRACTION_CACHE.get(key)
+    if cached is not None:
+        return cached["extractions"], cached["score"], cached["needs_review"]
+
+    extractions, score, needsReview = _compute_extractions(text, ruleSet, now)
+    _EXTRACTION_CACHE.set(
+        key,
+        {"extractions": extractions, "score": score, "needs_review": needsReview},
+        rules_version = ruleSet.version,
+    )
+    return extractions, score, needsReview
+
+def extraction_cache_stats():
+    "Returns hit/miss counters for the extraction cache."
+    return _EXTRACTION_CACHE.stats()
 
-    #Extracts keywords/tags
-    tagPairs = suggest_tags(text)
+def prune_extraction_cache(days=7):
+    """Keeps the database tier of the extraction cache bounded: deletes entries made with
+    other rule versions or older than days (their dates were resolved against an old 'today').
+    Returns how many rows were deleted. `manage.py classification_worker` runs it (see --prune-every)."""
+
+    cutoff = timezone.now() - timedelta(days = days)
+    stale = ExtractionCacheEntry.objects.exclude(rules_version = get_rules_version())
+    old = ExtractionCacheEntry.objects.filter(created_at__lt = cutoff)
+    deleted, _ = (stale | old).delete()
+    return deleted
+
+def _compute_extractions(text, rule_set=None, now=None):
+    "run_extractors without the cache."
+
+    #Splits and lowercases the caption once for all of the extractors below
+    caption = analyze_caption(text)
+
+    #Extracts keywords/tags (with one snapshot of the rules so the version stamp matches)
+    ruleSet = rule_set or current_rule_set()
+    tagPairs = suggest_tags(caption, ruleSet)
     tagScores = dict(tagPairs)
     tags = [t for t, _ in tagPairs] #list of tag names
 
     #Extracts structured data
-    pa = extract_price_and_age(text)
-    dt = extract_datetime(text)
-    venue = extract_venue(text)
+    pa = extract_price_and_age(caption)
+    dt = extract_datetime(caption, now)
+    venue = extract_venue(caption)
 
     #Formats dateime fields for JSON storage
     startISO = dt[0].isoformat() if dt else None
@@ -412,34 +428,259 @@ def build_event_candidate(rawPostID):
         "start": startISO,
         "end": endISO,
         "venue": venue,
+        "rules_version": ruleSet.version,
     }
 
     #Computes the candidate's overall guality score
     score = score_candidate_quality(extractions)
 
     #Decides if human review is needed 
-    hasPlace = bool(venue.get("postcode") or venue.get("area")) #If score is high, found both date/time and venue then AI approved
-    needsReview = not(score >= 0.75 and startISO and hasPlace) #flagged if needs review
-
-    #Creates EventCandidate record
-    candidate = EventCandidate.objects.create(
-        raw_post = raw, #link to original event
-        extracted_json = extractions, #All AI data stored in JSON field
-        score = score, #confidence level (0-1)
-        needs_review = needsReview, #does it need a manual check?
-    )
+    needsReview = _review_rule(score, extractions, AUTO_APPROVE_SCORE) #flagged if needs review
+
+    return extractions, score, needsReview
+
+def build_event_candidate(rawPostID): 
+    """Function pulls a a raw event by its ID, runs all AI extractors, builds a JSON-like dictionary"
+    of extracted data, calculates the confidence score, and saves everythign as a new EventCandidate object in the database."""
+
+    #Gets the raw event 
+    raw = RawPost.objects.get(pk = rawPostID)
+    text = raw.caption or ""
+
+    extractions, score, needsReview = run_extractors(text)
+
+    #Creates EventCandidate record and marks the raw post as processed (so classify_backlog skips it)
+    with transaction.atomic():
+        candidate = EventCandidate.objects.create(
+            raw_post = raw, #link to original event
+            extracted_json = extractions, #All AI data stored in JSON field
+            score = score, #confidence level (0-1)
+            needs_review = needsReview, #does it need a manual check?
+        )
+        RawPost.objects.filter(pk = raw.pk).update(processed_at = timezone.now())
 
     return candidate.id
 
+def _iter_raw_post_batches(rawPosts, batch_size):
+    "Yields lists of RawPost rows (only id and caption loaded), one query per batch."
+
+    if isinstance(rawPosts, QuerySet):
+        batch = []
+        for raw in rawPosts.only("id", "caption").order_by("id").iterator(chunk_size = batch_size):
+            batch.append(raw)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+        return
+
+    ids = list(rawPosts)
+    for i in range(0, len(ids), batch_size):
+        chunk = ids[i:i + batch_size]
+        yield list(RawPost.objects.filter(pk__in = chunk).only("id", "caption").order_by("id"))
+
+def extract_batch(rows, rule_set=None, now=None, use_cache=True):
+    """Runs the extractors over a list of (rawPostID, caption) pairs and returns a list of
+    (rawPostID, extractions, score, needsReview) for every post that has a caption.
+    Every caption's relative dates are resolved against one reference time (now, or the current time).
+    With use_cache=False the extraction cache (and so its database tier) is skipped and nothing touches
+    the database, so it can run in a worker process; the parent caches the results when it saves them
+    (see save_extracted_batch and classify_backlog)."""
+
+    ruleSet = rule_set or current_rule_set()
+    now = now or datetime.now()
+    extract = run_extractors if use_cache else _compute_extractions
+    results = []
+
+    for rawPostID, caption in rows:
+        text = caption or ""
+        if text.strip() == "":
+            continue
+
+        extractions, score, needsReview = extract(text, ruleSet, now)
+        results.append((rawPostID, extractions, score, needsReview))
+
+    return results
+
+def cache_extracted_batch(rows, results, now=None):
+    """Puts extract_batch results in the extraction cache, for batches extracted with use_cache=False.
+    rows are the (rawPostID, caption) pairs they came from and now the reference time they used."""
+
+    captions = dict(rows)
+    day = now.date() if now else None
+    _EXTRACTION_CACHE.set_many(
+        (
+            caption_cache_key(captions[rawPostID] or "", extractions.get("rules_version", ""), day),
+            {"extractions": extractions, "score": score, "needs_review": needsReview},
+            extractions.get("rules_version", ""),
+        )
+        for rawPostID, extractions, score, needsReview in results
+    )
+
+def save_extracted_batch(results, processedIDs=None, batch_size=500, rows=None, now=None):
+    """Saves extract_batch results as EventCandidates with one bulk_create.
+    If processedIDs is given, those RawPosts get processed_at stamped in the same transaction,
+    so a batch is either fully saved and marked done or not at all. Posts among them that were
+    processed in the meantime are skipped.
+    If rows (the (rawPostID, caption) pairs) is given, the results also go into the extraction cache
+    (see cache_extracted_batch).
+    Returns the ids of the new EventCandidates."""
+
+    with transaction.atomic():
+        if processedIDs:
+            #Locks the posts that are still unprocessed: one classified meanwhile by a classification_worker
+            #job (or another run) already has its candidate, so it is skipped instead of getting a second one
+            processedIDs = set(
+                RawPost.objects.select_for_update()
+                .filter(pk__in = processedIDs, processed_at__isnull = True)
+                .values_list("id", flat = True)
+            )
+            results = [r for r in results if r[0] in processedIDs]
+
+        candidates = [
+            EventCandidate(
+                raw_post_id = rawPostID,
+                extracted_json = extractions,
+                score = score,
+                needs_review = needsReview,
+            )
+            for rawPostID, extractions, score, needsReview in results
+        ]
+        created = EventCandidate.objects.bulk_create(candidates, batch_size = batch_size)
+        if processedIDs:
+            RawPost.objects.filter(pk__in = processedIDs).update(processed_at = timezone.now())
+
+    if rows is not None:
+        cache_extracted_batch(rows, results, now)
+
+    return [c.id for c in created]
+
+def classify_many(rawPosts, batch_size=500):
+    """Batch version of build_event_candidate.
+    Takes a list of RawPost ids or a RawPost queryset, loads captions in one query per batch,
+    runs the extractors over the whole batch and saves the EventCandidates with bulk_create.
+    Posts with an empty caption are skipped (same as the post_save signal).
+    Every post in a batch gets processed_at stamped with its candidates.
+    Returns the ids of the new EventCandidates."""
+
+    #One rule snapshot and one reference time for the whole run, so every candidate has
+    #the same rules_version and relative dates resolve the same way in every batch
+    ruleSet = current_rule_set()
+    now = datetime.now()
+    createdIDs = []
+
+    for batch in _iter_raw_post_batches(rawPosts, batch_size):
+        results = extract_batch([(raw.id, raw.caption) for raw in batch], ruleSet, now)
+        createdIDs.extend(save_extracted_batch(results, [raw.id for raw in batch], batch_size = batch_size))
+
+    return createdIDs
+
+#Extractions scoring at least this (with a start time and a place) are AI approved when a candidate is built
+AUTO_APPROVE_SCORE = 0.75
+
+def _review_rule(score, extractions, threshold):
+    "True unless the score is high enough and both a start time and a venue (postcode or area) were found."
+    venue = extractions.get("venue") or {}
+    hasPlace = bool(venue.get("postcode") or venue.get("area"))
+    return not(score >= threshold and extractions.get("start") and hasPlace)
+
 def needs_human_review(candidate, threshold=0.6):
-    return 
+    """Whether a candidate should go to a reviewer: same rule the extractors use when flagging new
+    candidates (see AUTO_APPROVE_SCORE), with threshold as the score cut-off."""
+    return _review_rule(candidate.score, candidate.extracted_json or {}, threshold)
+
+#Duplicate matching: how similar (estimated Jaccard of title + description shingles) an event has to be,
+#and how many blocking-key collisions are looked at per lookup
+DEDUPE_THRESHOLD = getattr(settings, "DEDUPE_THRESHOLD", 0.6)
+DEDUPE_SHORTLIST = 20
+
+def index_event(event):
+    "(Re)builds the duplicate-matching fingerprint and blocking keys of one Event. Called on every Event save."
+    index_events([event])
+
+def index_events(events, batch_size=1000, fingerprints=None):
+    """Bulk version of index_event, for events saved with bulk_create (which skips signals) and for backfills.
+    fingerprints can map event position -> event_fingerprint() result when the caller has already worked them out."""
+
+    events = list(events)
+    if not events:
+        return
+
+    rows = []
+    keys = []
+    for position, ev in enumerate(events):
+        if fingerprints and position in fingerprints:
+            signature, bucket, blockKeys = fingerprints[position]
+        else:
+            signature, bucket, blockKeys = event_fingerprint(ev.title, ev.description, ev.date_start)
+        rows.append(EventFingerprint(event_id = ev.id, signature = signature, date_bucket = bucket))
+        keys.extend(EventBlockKey(event_id = ev.id, key = k) for k in blockKeys)
+
+    ids = [ev.id for ev in events]
+    with transaction.atomic():
+        EventBlockKey.objects.filter(event_id__in = ids).delete()
+        EventFingerprint.objects.filter(event_id__in = ids).delete()
+        EventFingerprint.objects.bulk_create(rows, batch_size = batch_size)
+        EventBlockKey.objects.bulk_create(keys, batch_size = batch_size)
+
+def _block_key_collisions(keys):
+    """(event id, signature) of every indexed event sharing one of keys, once per shared key.
+    This is the hot path of duplicate matching, so it's one hand-written indexed join: building
+    the same query through the ORM costs several times more than running it."""
+
+    qn = connection.ops.quote_name
+    keyTable = qn(EventBlockKey._meta.db_table)
+    fingerprintTable = qn(EventFingerprint._meta.db_table)
+    placeholders = ", ".join(["%s"] * len(keys))
+    sql = (
+        f"SELECT f.{qn('event_id')}, f.{qn('signature')} FROM {keyTable} k "
+        f"INNER JOIN {fingerprintTable} f ON f.{qn('event_id')} = k.{qn('event_id')} "
+        f"WHERE k.{qn('key')} IN ({placeholders})"
+    )
 
-def match_to_existing_event(candidate_id):
-    return
+    with connection.cursor() as cursor:
+        cursor.execute(sql, list(keys))
+        rows = cursor.fetchall()
 
-def promote_candidate_to_event(candidate_id):
+    #sqlite hands JSON back as text, postgres already decodes it
+    return [(eventID, json.loads(sig) if isinstance(sig, str) else sig) for eventID, sig in rows]
+
+def _best_match(signature, collisions, threshold):
+    """Picks the most similar of collisions ((id, signature) once per shared blocking key) at or above threshold.
+    Returns its id or None."""
+
+    hits = {}
+    signatures = {}
+    for eventID, other in collisions:
+        hits[eventID] = hits.get(eventID, 0) + 1
+        signatures[eventID] = other
+
+    #Only the events colliding on the most bands are compared
+    shortlist = sorted(hits, key = lambda eventID: (-hits[eventID], eventID))[:DEDUPE_SHORTLIST]
+    matches = [(estimate_similarity(signature, signatures[eventID]), eventID) for eventID in shortlist]
+    matches = [m for m in matches if m[0] >= threshold]
+    if not matches:
+        return None
+
+    #most similar first, the oldest event on ties
+    return min(matches, key = lambda m: (-m[0], m[1]))[1]
+
+def find_duplicate_event(title, description, dateStart, threshold=None):
+    """Returns the id of an existing Event that is (almost) the same event, or None.
+    Only events sharing an LSH blocking key on the same start day are compared, so this is one
+    indexed lookup however big the Event table is."""
+
+    threshold = DEDUPE_THRESHOLD if threshold is None else threshold
+    signature, _, keys = event_fingerprint(title, description, dateStart)
+    if not keys:
+        return None
+
+    return _best_match(signature, _block_key_collisions(keys), threshold)
+
+def candidate_event_fields(cand):
+    "The Event fields a candidate would be promoted to (title, description, dates, venue, price, tags...)."
 
-    cand = EventCandidate.objects.get(pk=candidate_id)
     data = cand.extracted_json or {}
     venue = data.get("venue") or {}
     location = venue.get("area") or venue.get("postcode")
@@ -447,6 +688,9 @@ def promote_candidate_to_event(candidate_id):
     # tags from the extraction
     tags = data.get("tags") or []
 
+    # scraped rows carry the venue's coordinates
+    lat, lon = coordinates_from_raw_json(cand.raw_post.raw_json)
+
     # nicer title: join tags into readable words, e.g. "Film Festival London"
     if tags:
         title_parts = [t.replace("-", " ").title() for t in tags]
@@ -455,18 +699,113 @@ def promote_candidate_to_event(candidate_id):
         # fallback: use first part of caption or default
         title = (cand.raw_post.caption or "").split("|")[0] or "Untitled Event"
 
-    ev = Event.objects.create(
+    return dict(
         title=title,
         description=cand.raw_post.caption or "",
         date_start=data.get("start"),
         date_end=data.get("end"),
+        starts_at=parse_event_datetime(data.get("start")),
+        ends_at=parse_event_datetime(data.get("end")),
         location=location,
         price_min=data.get("price_min"),
         price_max=data.get("price_max"),
         age_restriction=data.get("age"),
         ai_score=cand.score,
         ai_tags=tags, 
+        latitude=lat,
+        longitude=lon,
+        geocell=geocell(lat, lon),
     )
 
-    return ev.id
+def match_to_existing_event(candidate_id, threshold=None):
+    "Returns the id of an existing Event this candidate duplicates, or None."
 
+    cand = EventCandidate.objects.select_related("raw_post").get(pk=candidate_id)
+    fields = candidate_event_fields(cand)
+    return find_duplicate_event(fields["title"], fields["description"], fields["date_start"], threshold)
+
+def promote_candidate_to_event(candidate_id):
+    """Turns a candidate into an Event and returns its id.
+    If the same event already exists (see match_to_existing_event) that Event is reused instead of adding a duplicate,
+    and a candidate that was already promoted just returns its Event."""
+
+    cand = EventCandidate.objects.select_related("raw_post").get(pk=candidate_id)
+    if cand.promoted_event_id is not None:
+        return cand.promoted_event_id
+
+    fields = candidate_event_fields(cand)
+
+    with transaction.atomic():
+        eventID = find_duplicate_event(fields["title"], fields["description"], fields["date_start"])
+        if eventID is None:
+            #post_save on Event adds it to the duplicate-matching index
+            eventID = Event.objects.create(**fields).id
+
+        #Promoting is the review, so the candidate leaves the review queue
+        cand.promoted_event_id = eventID
+        cand.needs_review = False
+        cand.save(update_fields = ["promoted_event", "needs_review"])
+
+    return eventID
+
+def promote_candidates(candidates, batch_size=500):
+    """Bulk version of promote_candidate_to_event for a queryset (or list of ids) of EventCandidates.
+    Candidates and their RawPosts are loaded in one query, new Events are saved with bulk_create and
+    everything happens in one transaction.
+    Returns (created, matched, skipped): new Events, candidates matched to an existing (or earlier
+    in the batch) Event, and candidates skipped because they were already promoted."""
+
+    if not isinstance(candidates, QuerySet):
+        candidates = EventCandidate.objects.filter(pk__in = list(candidates))
+
+    with transaction.atomic():
+        cands = list(candidates.select_related("raw_post").order_by("id"))
+        pending = [c for c in cands if c.promoted_event_id is None]
+        skipped = len(cands) - len(pending)
+
+        newEvents = [] #Events to create
+        newFingerprints = {} #position in newEvents -> fingerprint, so index_events doesn't redo them
+        newIndex = {} #blocking key -> [(position in newEvents, signature)], to catch duplicates inside the batch
+        links = [] #(candidate, existing Event id or position in newEvents)
+        matched = 0
+
+        for cand in pending:
+            fields = candidate_event_fields(cand)
+            signature, bucket, keys = event_fingerprint(fields["title"], fields["description"], fields["date_start"])
+
+            existingID = _best_match(signature, _block_key_collisions(keys), DEDUPE_THRESHOLD) if keys else None
+            if existingID is not None:
+                links.append((cand, existingID, None))
+                matched += 1
+                continue
+
+            position = _best_match(signature, [m for k in keys for m in newIndex.get(k, [])], DEDUPE_THRESHOLD)
+            if position is not None:
+                links.append((cand, None, position))
+                matched += 1
+                continue
+
+            position = len(newEvents)
+            newEvents.append(Event(**fields))
+            newFingerprints[position] = (signature, bucket, keys)
+            for k in keys:
+                newIndex.setdefault(k, []).append((position, signature))
+            links.append((cand, None, position))
+
+        #bulk_create skips post_save, so the new Events are added to the duplicate and tag indexes
+        #(and announced to other apps) here
+        created = Event.objects.bulk_create(newEvents, batch_size = batch_size)
+        index_events(created, batch_size, newFingerprints)
+        sync_event_tags(created)
+        if created:
+            events_created.send(sender = Event, events = created)
+
+        #One UPDATE per target Event (bulk_update's CASE expression gets slow with thousands of rows)
+        byEvent = {}
+        for cand, existingID, position in links:
+            eventID = existingID if existingID is not None else created[position].id
+            byEvent.setdefault(eventID, []).append(cand.id)
+        for eventID, candIDs in byEvent.items():
+            EventCandidate.objects.filter(pk__in = candIDs).update(promoted_event_id = eventID, needs_review = False)
+
+    return len(created), matched, skipped
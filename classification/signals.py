@@ -1,14 +1,22 @@
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from ingestion.models import RawPost
-from classification.services import build_event_candidate
+from api.models import Event
+from classification.tasks import enqueue_raw_post
 
+#Saving a RawPost only queues it; `manage.py classification_worker` builds the candidate
+#so ingest doesn't wait on (or lose errors from) the extractors
 @receiver(post_save, sender=RawPost)
 
 def make_candidate_on_rawpost_save(sender, instance, created, **kwargs):
     if created and (instance.caption or "").strip() != "":
-        try:
-            build_event_candidate(instance.id)
-        except Exception:
-            pass
-    
\ No newline at end of file
+        enqueue_raw_post(instance.id)
+
+#Keeps the duplicate-matching index in step with Event (deletes cascade to it)
+@receiver(post_save, sender=Event)
+
+def index_event_on_save(sender, instance, raw=False, **kwargs):
+    if raw: #loaddata
+        return
+    from classification.services import index_event
+    index_event(instance)
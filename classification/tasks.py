@@ -0,0 +1,138 @@
+import logging
+import os
+import socket
+import traceback
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from classification.models import ClassificationJob
+from classification.services import build_event_candidate
+from ingestion.models import RawPost
+
+#Database-backed work queue for classification.
+#The RawPost post_save signal only enqueues a ClassificationJob; one or more
+#`manage.py classification_worker` processes (on any node using the same database)
+#claim jobs with select_for_update(skip_locked=True) and build the candidates.
+
+logger = logging.getLogger("classification")
+
+MAX_ATTEMPTS = 5 #a job that fails this many times is marked failed
+BACKOFF_SECONDS = 30 #wait after the first failure, doubled after each one
+LOCK_TIMEOUT = timedelta(minutes = 10) #a running job older than this is treated as abandoned
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def enqueue_raw_post(rawPostID):
+    "Queues a RawPost for classification and returns the new ClassificationJob."
+    return ClassificationJob.objects.create(raw_post_id = rawPostID)
+
+
+def backoff_delay(attempts):
+    "How long to wait before retrying a job that has failed attempts times."
+    return timedelta(seconds = BACKOFF_SECONDS * 2 ** max(attempts - 1, 0))
+
+
+def claim_jobs(limit=10, worker_id=None):
+    """
+    Claims up to limit due jobs for this worker and returns them.
+    Rows locked by other workers are skipped (SKIP LOCKED) instead of waited on.
+    Each claim is also a conditional update on the row's status, so two workers can never
+    claim the same job even on databases without row locks (SQLite ignores select_for_update).
+    """
+    worker_id = worker_id or default_worker_id()
+    now = timezone.now()
+
+    due = (
+        Q(status = ClassificationJob.PENDING, run_after__lte = now)
+        | Q(status = ClassificationJob.RUNNING, locked_at__lt = now - LOCK_TIMEOUT)
+    )
+
+    claimed = []
+    with transaction.atomic():
+        jobs = list(
+            ClassificationJob.objects.select_for_update(skip_locked = True)
+            .filter(due)
+            .order_by("run_after", "id")[:limit]
+        )
+
+        for job in jobs:
+            won = ClassificationJob.objects.filter(
+                pk = job.pk, status = job.status, locked_at = job.locked_at
+            ).update(
+                status = ClassificationJob.RUNNING,
+                locked_at = now,
+                locked_by = worker_id,
+                attempts = job.attempts + 1,
+                updated_at = now,
+            )
+            if won:
+                job.status = ClassificationJob.RUNNING
+                job.locked_at = now
+                job.locked_by = worker_id
+                job.attempts += 1
+                claimed.append(job)
+
+    return claimed
+
+
+def process_job(job):
+    """
+    Builds the EventCandidate for a claimed job.
+    On failure the job goes back to pending with an exponential backoff, or to failed
+    once it has used up MAX_ATTEMPTS. Returns True if the job succeeded.
+    """
+    try:
+        with transaction.atomic():
+            #Claims the post with a conditional update, so it gets one candidate even when classify_backlog
+            #or the pipeline works on it at the same time; a post classified some other way is left alone
+            claimed = RawPost.objects.filter(pk = job.raw_post_id, processed_at__isnull = True).update(
+                processed_at = timezone.now()
+            )
+            if claimed:
+                build_event_candidate(job.raw_post_id)
+
+            #Only while this worker still holds the job: after LOCK_TIMEOUT another worker may have re-claimed it
+            if not _update_own_job(job, status = ClassificationJob.DONE, last_error = "", updated_at = timezone.now()):
+                logger.warning("Classification job %s was re-claimed while %s ran it", job.pk, job.locked_by)
+        return True
+
+    except Exception:
+        error = traceback.format_exc()
+        now = timezone.now()
+
+        if job.attempts >= MAX_ATTEMPTS:
+            status = ClassificationJob.FAILED
+            run_after = now
+            logger.error("Classification job %s failed for good after %s attempts", job.pk, job.attempts)
+        else:
+            status = ClassificationJob.PENDING
+            run_after = now + backoff_delay(job.attempts)
+            logger.warning("Classification job %s failed (attempt %s), retrying after %s", job.pk, job.attempts, run_after)
+
+        if not _update_own_job(job, status = status, run_after = run_after, locked_at = None, last_error = error, updated_at = now):
+            logger.warning("Classification job %s was re-claimed while %s ran it", job.pk, job.locked_by)
+        return False
+
+
+def _update_own_job(job, **fields):
+    "Updates a claimed job only if this worker still holds it. Returns whether it did."
+    return ClassificationJob.objects.filter(pk = job.pk, locked_by = job.locked_by).update(**fields) == 1
+
+
+def run_pending_jobs(limit=10, worker_id=None):
+    "Claims and processes one batch of jobs. Returns (succeeded, failed) counts."
+    succeeded = failed = 0
+
+    for job in claim_jobs(limit, worker_id):
+        if process_job(job):
+            succeeded += 1
+        else:
+            failed += 1
+
+    return succeeded, failed
@@ -0,0 +1,36 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from classification.bench import EXTRACTORS, compare, generate_captions, percentile, run_benchmark
+
+
+class BenchTests(SimpleTestCase):
+    def test_corpus_is_reproducible(self):
+        self.assertEqual(generate_captions(50, seed=3), generate_captions(50, seed=3))
+        self.assertNotEqual(generate_captions(50, seed=3), generate_captions(50, seed=4))
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual((percentile(values, 50), percentile(values, 99)), (50, 99))
+
+    def test_report_covers_every_extractor(self):
+        report = run_benchmark(size=20, repeat=1)
+        results = report["results"]
+        self.assertEqual(set(results), set(EXTRACTORS) | {"end_to_end"})
+        self.assertEqual(results["suggest_tags"]["calls"], 20)
+        self.assertEqual(results["end_to_end"]["calls"], 20)
+        for result in results.values():
+            self.assertLessEqual(result["p50_us"], result["p99_us"])
+        self.assertEqual(compare(report, report)["end_to_end"], 1.0)
+
+    def test_command_writes_json(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bench.json")
+            call_command("bench_classification", size=10, repeat=1, output=path, stdout=StringIO())
+            with open(path, encoding="utf-8") as f:
+                self.assertEqual(json.load(f)["size"], 10)
@@ -0,0 +1,66 @@
+from datetime import date
+
+from django.test import SimpleTestCase, TestCase
+
+from classification import services
+from classification.cache import ExtractionCache, caption_cache_key
+from classification.models import ExtractionCacheEntry
+
+
+class CaptionCacheKeyTests(SimpleTestCase):
+    def test_key_ignores_outer_whitespace_only(self):
+        day = date(2025, 11, 17)
+        self.assertEqual(caption_cache_key(" Jazz night ", "v1", day), caption_cache_key("Jazz night", "v1", day))
+        self.assertNotEqual(caption_cache_key("Jazz  night", "v1", day), caption_cache_key("Jazz night", "v1", day))
+
+    def test_key_changes_with_rules_version_and_day(self):
+        day = date(2025, 11, 17)
+        key = caption_cache_key("Jazz night", "v1", day)
+        self.assertNotEqual(key, caption_cache_key("Jazz night", "v2", day))
+        self.assertNotEqual(key, caption_cache_key("Jazz night", "v1", date(2025, 11, 18)))
+
+
+class ExtractionCacheTests(SimpleTestCase):
+    def test_lru_eviction_and_counters(self):
+        cache = ExtractionCache(max_size=2)
+        cache.set("a", {"n": 1})
+        cache.set("b", {"n": 2})
+        self.assertEqual(cache.get("a"), {"n": 1}) # a is now most recent
+        cache.set("c", {"n": 3}) # evicts b
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+        self.assertEqual(cache.stats()["size"], 2)
+
+    def test_returned_value_is_a_copy(self):
+        cache = ExtractionCache()
+        cache.set("a", {"tags": ["jazz"]})
+        cache.get("a")["tags"].append("techno")
+        self.assertEqual(cache.get("a"), {"tags": ["jazz"]})
+
+    def test_run_extractors_uses_cache(self):
+        services._EXTRACTION_CACHE.clear()
+        first = services.run_extractors("Jazz quartet, N1 2UN, 7:30pm, £12")
+        second = services.run_extractors("  Jazz quartet, N1 2UN, 7:30pm, £12  ")
+        self.assertEqual(first, second)
+        stats = services.extraction_cache_stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+
+class ExtractionCacheDatabaseTierTests(TestCase):
+    def test_database_tier_is_shared_between_processes(self):
+        writer = ExtractionCache(use_db=True)
+        writer.set("k", {"score": 0.5}, rules_version="v1")
+        self.assertEqual(ExtractionCacheEntry.objects.get(key="k").rules_version, "v1")
+
+        # a fresh in-memory tier (like another worker) still finds it
+        reader = ExtractionCache(use_db=True)
+        self.assertEqual(reader.get("k"), {"score": 0.5})
+        self.assertEqual(reader.get("k"), {"score": 0.5})
+        self.assertEqual((reader.db_hits, reader.hits), (1, 1))
+
+    def test_prune_drops_other_rule_versions(self):
+        ExtractionCacheEntry.objects.create(key="old", rules_version="not-current", payload={})
+        ExtractionCacheEntry.objects.create(key="new", rules_version=services.get_rules_version(), payload={})
+        self.assertEqual(services.prune_extraction_cache(), 1)
+        self.assertEqual(list(ExtractionCacheEntry.objects.values_list("key", flat=True)), ["new"])
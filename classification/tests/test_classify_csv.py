@@ -0,0 +1,75 @@
+import csv
+import tempfile
+from pathlib import Path
+
+from django.test import SimpleTestCase
+
+from classification.pure_classifier import classify_caption
+from data_scripts.event_scraping.classify_csv import caption_text, classify_file
+
+CAPTIONS = [
+    "Techno rave in a warehouse",
+    "FREE entry jazz quartet",
+    "",
+    "Supper club with a live band",
+    "house music all night long, 18+",
+    "Q&A after the screening",
+    "kids craft fair",
+]
+
+
+class ClassifyFileTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.input = Path(tmp.name) / "events.csv"
+        self.output = Path(tmp.name) / "events_classified.csv"
+
+    def write_input(self, rows, fieldnames=("event_title", "description")):
+        with self.input.open("w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(rows)
+
+    def read_output(self):
+        with self.output.open(newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            return reader.fieldnames, list(reader)
+
+    def expected(self, rows):
+        results = []
+        for row in rows:
+            tags, score = classify_caption(caption_text(row, "description"))
+            results.append(dict(row, tags=", ".join(tags), score=str(score)))
+        return results
+
+    def test_rows_keep_their_order(self):
+        rows = [{"event_title": f"Event {i}", "description": CAPTIONS[i % len(CAPTIONS)]} for i in range(23)]
+        self.write_input(rows)
+        expected = self.expected(rows)
+
+        # chunks smaller than the file, including a short last chunk, in this process and in a pool
+        for workers, chunk_size in ((1, 1), (1, 5), (2, 3), (3, 4), (2, 100)):
+            with self.subTest(workers=workers, chunk_size=chunk_size):
+                self.assertEqual(classify_file(self.input, self.output, workers=workers, chunk_size=chunk_size), 23)
+                fieldnames, written = self.read_output()
+                self.assertEqual(fieldnames, ["event_title", "description", "tags", "score"])
+                self.assertEqual(written, expected)
+
+    def test_header_only_input(self):
+        self.write_input([])
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                self.assertEqual(classify_file(self.input, self.output, workers=workers, chunk_size=2), 0)
+                self.assertEqual(self.read_output(), (["event_title", "description", "tags", "score"], []))
+
+    def test_empty_input(self):
+        self.input.write_text("", encoding="utf-8")
+        with self.assertRaises(SystemExit):
+            classify_file(self.input, self.output, workers=2)
+
+    def test_existing_tags_column_is_overwritten(self):
+        rows = [{"description": "jazz night", "tags": "stale"}]
+        self.write_input(rows, fieldnames=("description", "tags"))
+        classify_file(self.input, self.output, chunk_size=1)
+        self.assertEqual(self.read_output(), (["description", "tags", "score"], self.expected(rows)))
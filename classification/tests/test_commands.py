@@ -0,0 +1,65 @@
+from datetime import datetime
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from classification import services
+from classification.models import EventCandidate, ExtractionCacheEntry
+from ingestion.models import RawPost
+
+
+class ClassifyBacklogCommandTests(TestCase):
+    def setUp(self):
+        # bulk_create skips the post_save signal, so these are an unprocessed backlog
+        RawPost.objects.bulk_create(
+            [RawPost(source="test", caption=f"Techno night {i} in Dalston, 10pm-4am, £{i}") for i in range(7)]
+            + [RawPost(source="test", caption="")]
+        )
+
+    def run_command(self, **options):
+        out = StringIO()
+        call_command("classify_backlog", stdout=out, **options)
+        return out.getvalue()
+
+    def test_single_process(self):
+        output = self.run_command(workers=1, chunk_size=3)
+        self.assertIn("Classified 8 RawPosts into 7 EventCandidates", output)
+        self.assertFalse(RawPost.objects.filter(processed_at__isnull=True).exists())
+        self.assertEqual(EventCandidate.objects.count(), 7)
+
+    def test_process_pool(self):
+        self.run_command(workers=2, chunk_size=2)
+        self.assertFalse(RawPost.objects.filter(processed_at__isnull=True).exists())
+        self.assertEqual(EventCandidate.objects.count(), 7)
+
+    def test_database_cache_is_filled_by_the_parent(self):
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                RawPost.objects.update(processed_at=None)
+                EventCandidate.objects.all().delete()
+                ExtractionCacheEntry.objects.all().delete()
+                services._EXTRACTION_CACHE.clear()
+
+                with mock.patch.object(services._EXTRACTION_CACHE, "use_db", True):
+                    self.run_command(workers=workers, chunk_size=3, restart=True)
+                    self.assertEqual(EventCandidate.objects.count(), 7)
+                    # one row per caption, usable by run_extractors in any process
+                    self.assertEqual(ExtractionCacheEntry.objects.count(), 7)
+                    services._EXTRACTION_CACHE.clear()
+                    caption = RawPost.objects.exclude(caption="").first().caption
+                    services.run_extractors(caption, now=datetime.now())
+                    self.assertEqual(services.extraction_cache_stats()["db_hits"], 1)
+
+    def test_processed_posts_are_not_redone(self):
+        self.run_command(workers=1, limit=5)
+        self.assertEqual(RawPost.objects.filter(processed_at__isnull=True).count(), 3)
+        self.run_command(workers=1)
+        self.assertEqual(EventCandidate.objects.count(), 7)
+        self.assertEqual(EventCandidate.objects.values("raw_post").distinct().count(), 7)
+
+    def test_signal_created_candidates_are_not_duplicated(self):
+        RawPost.objects.create(source="test", caption="Jazz at the Union Chapel, 7pm")
+        self.run_command(workers=1)
+        self.assertEqual(EventCandidate.objects.count(), 8)
@@ -0,0 +1,75 @@
+from django.test import SimpleTestCase, TestCase
+
+from api.models import Event
+from classification.dedupe import (
+    BANDS, NUM_PERM, blocking_keys, estimate_similarity, minhash_signature, normalize_text, shingles,
+)
+from classification.models import EventBlockKey, EventCandidate, EventFingerprint
+from classification.services import find_duplicate_event, match_to_existing_event, promote_candidate_to_event
+from ingestion.models import RawPost
+
+CAPTION = "Techno all nighter in Dalston E8 3BH with resident DJs and special guests | 10pm-4am | £10, 18+"
+
+
+class MinHashTests(SimpleTestCase):
+    def test_normalize_and_shingles(self):
+        self.assertEqual(normalize_text("Jazz Night!!  £5"), "jazz night £5")
+        self.assertEqual(shingles("Jazz night, live"), {"jazz night", "night live"})
+        self.assertEqual(shingles("Jazz"), {"jazz"})
+
+    def test_signatures_are_stable_and_estimate_similarity(self):
+        sig = minhash_signature(shingles(CAPTION))
+        self.assertEqual(len(sig), NUM_PERM)
+        self.assertEqual(sig, minhash_signature(shingles(CAPTION)))
+        self.assertEqual(estimate_similarity(sig, sig), 1.0)
+        other = minhash_signature(shingles("Brunch and bottomless mimosas in Clapham every Sunday"))
+        self.assertLess(estimate_similarity(sig, other), 0.2)
+        self.assertEqual(minhash_signature(set()), [])
+
+    def test_blocking_keys_include_date_bucket(self):
+        keys = blocking_keys(minhash_signature(shingles(CAPTION)), "2025-11-18")
+        self.assertEqual(len(keys), BANDS)
+        self.assertTrue(all(k.startswith("2025-11-18|") for k in keys))
+
+
+class DuplicateMatchingTests(TestCase):
+    def make_event(self, description=CAPTION, date_start="2025-11-18T22:00:00", title="Techno"):
+        return Event.objects.create(title=title, description=description, date_start=date_start)
+
+    def make_candidate(self, caption, start="2025-11-18T22:00:00"):
+        raw = RawPost.objects.create(source="test", caption=caption)
+        return EventCandidate.objects.create(
+            raw_post=raw, extracted_json={"tags": ["techno"], "start": start}, score=0.8
+        )
+
+    def test_event_save_maintains_index(self):
+        ev = self.make_event()
+        self.assertEqual(EventBlockKey.objects.filter(event=ev).count(), BANDS)
+        self.assertEqual(EventFingerprint.objects.get(event=ev).date_bucket, "2025-11-18")
+
+        ev.date_start = "2025-11-19T22:00:00"
+        ev.save()
+        keys = list(EventBlockKey.objects.filter(event=ev).values_list("key", flat=True))
+        self.assertEqual(len(keys), BANDS)
+        self.assertTrue(all(k.startswith("2025-11-19|") for k in keys))
+
+    def test_near_duplicate_is_found_on_same_day_only(self):
+        ev = self.make_event()
+        self.make_event(description="Brunch and bottomless mimosas in Clapham every Sunday")
+        reposted = CAPTION.replace("special guests", "very special guests") + " link in bio"
+        self.assertEqual(find_duplicate_event("Techno", reposted, "2025-11-18T23:00:00"), ev.id)
+        self.assertIsNone(find_duplicate_event("Techno", reposted, "2025-11-25T22:00:00"))
+        self.assertIsNone(find_duplicate_event("Jazz", "Jazz quartet at the Union Chapel, N1 2UN", "2025-11-18T19:00:00"))
+
+    def test_promote_reuses_matching_event(self):
+        first = self.make_candidate(CAPTION)
+        eventID = promote_candidate_to_event(first.id)
+
+        repost = self.make_candidate(CAPTION + " (last few tickets)")
+        self.assertEqual(match_to_existing_event(repost.id), eventID)
+        self.assertEqual(promote_candidate_to_event(repost.id), eventID)
+        self.assertEqual(Event.objects.count(), 1)
+
+        other = self.make_candidate("Jazz quartet at the Union Chapel, N1 2UN, 7:30pm, free entry")
+        self.assertNotEqual(promote_candidate_to_event(other.id), eventID)
+        self.assertEqual(Event.objects.count(), 2)
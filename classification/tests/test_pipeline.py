@@ -0,0 +1,65 @@
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from classification import pipeline
+from classification.models import EventCandidate, PipelineCheckpoint
+from ingestion.models import RawPost
+
+
+class RunPipelineTests(TestCase):
+    def setUp(self):
+        # bulk_create skips the post_save signal, so these are an unprocessed backlog
+        self.posts = RawPost.objects.bulk_create(
+            [RawPost(source="test", caption=f"Jazz night {i} in Hackney, 8pm, £{i}") for i in range(6)]
+        )
+
+    def test_processes_everything_and_records_checkpoint(self):
+        self.assertEqual(pipeline.run_pipeline("test", batch_size=4), (6, 6))
+        checkpoint = PipelineCheckpoint.objects.get(name="test")
+        self.assertEqual((checkpoint.last_id, checkpoint.processed), (self.posts[-1].id, 6))
+        self.assertFalse(RawPost.objects.filter(processed_at__isnull=True).exists())
+        self.assertEqual(pipeline.run_pipeline("test"), (0, 0))
+
+    def test_restarts_from_checkpoint_after_crash(self):
+        real_save = pipeline.save_extracted_batch
+        calls = []
+
+        def crash_on_second_batch(*args, **kwargs):
+            calls.append(1)
+            if len(calls) == 2:
+                raise RuntimeError("worker killed")
+            return real_save(*args, **kwargs)
+
+        with mock.patch.object(pipeline, "save_extracted_batch", side_effect=crash_on_second_batch):
+            with self.assertRaises(RuntimeError):
+                pipeline.run_pipeline("test", batch_size=2)
+
+        # the first batch is saved and checkpointed, the failed one left no trace
+        self.assertEqual(PipelineCheckpoint.objects.get(name="test").last_id, self.posts[1].id)
+        self.assertEqual(EventCandidate.objects.count(), 2)
+
+        self.assertEqual(pipeline.run_pipeline("test", batch_size=2), (4, 4))
+        self.assertEqual(EventCandidate.objects.values("raw_post").distinct().count(), 6)
+
+    def test_batches_start_after_checkpoint_then_sweep_below_it(self):
+        RawPost.objects.filter(id__in=[self.posts[0].id, self.posts[2].id]).update(processed_at=timezone.now())
+        batches = list(pipeline.unprocessed_batches(self.posts[2].id, batch_size=2))
+        self.assertEqual(
+            [[row[0] for row in rows] for rows in batches],
+            [[p.id for p in self.posts[3:5]], [self.posts[5].id], [self.posts[1].id]],
+        )
+        batches = list(pipeline.unprocessed_batches(self.posts[2].id, batch_size=2, limit=3))
+        self.assertEqual(sum(len(rows) for rows in batches), 3)
+
+    def test_post_committed_below_checkpoint_is_processed(self):
+        # a post whose id was allocated before the last run but committed after it
+        late = self.posts[2]
+        RawPost.objects.filter(id=late.id).delete()
+        self.assertEqual(pipeline.run_pipeline("test"), (5, 5))
+
+        RawPost.objects.bulk_create([RawPost(id=late.id, source="test", caption=late.caption)])
+        self.assertEqual(pipeline.run_pipeline("test"), (1, 1))
+        self.assertFalse(RawPost.objects.filter(processed_at__isnull=True).exists())
+        self.assertEqual(PipelineCheckpoint.objects.get(name="test").last_id, self.posts[-1].id)
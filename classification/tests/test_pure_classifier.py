@@ -0,0 +1,31 @@
+from django.test import SimpleTestCase
+
+from classification.pure_classifier import classify_caption, classify_captions
+
+
+class ClassifyCaptionTests(SimpleTestCase):
+    def test_tags_come_out_in_table_order(self):
+        self.assertEqual(
+            classify_caption("FREE entry jazz quartet, Q&A after the screening"),
+            (["jazz", "film", "talk", "free"], 1.0),
+        )
+        self.assertEqual(classify_caption(None), ([], 0.0))
+
+    def test_batch_matches_single(self):
+        captions = [
+            "Techno rave in a warehouse",
+            "",
+            None,
+            "Supper club with a live band",
+            "kids\x00craft fair",
+            "house music all night long, 18+",
+        ]
+        expected = [classify_caption(c) for c in captions]
+        for chunk_size in (1, 2, 1000):
+            self.assertEqual(list(classify_captions(captions, chunk_size)), expected)
+
+    def test_results_are_independent_lists(self):
+        first, second = classify_captions(["jazz night", "jazz night"])
+        first[0].append("mutated")
+        self.assertEqual(second[0], ["jazz"])
+        self.assertEqual(classify_caption("jazz night")[0], ["jazz"])
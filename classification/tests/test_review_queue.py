@@ -0,0 +1,83 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+
+from classification.models import EventCandidate
+from classification.selectors import review_queue_page, review_segment
+from classification.services import needs_human_review
+from ingestion.models import RawPost
+
+
+class ReviewQueueTests(TestCase):
+    def setUp(self):
+        raw = RawPost.objects.create(source="test", caption="Techno in Dalston, 10pm-4am")
+        scores = [(True, 0.5), (True, 0.1), (False, 0.2), (True, 0.5), (False, 0.9), (True, 0.3)]
+        self.cands = [
+            EventCandidate.objects.create(raw_post=raw, extracted_json={}, score=score, needs_review=flag)
+            for flag, score in scores
+        ]
+
+    def walk(self, limit):
+        seen = []
+        cursor = None
+        while True:
+            page, cursor = review_queue_page(cursor, limit)
+            seen.extend(c.id for c in page)
+            if cursor is None:
+                return seen
+
+    def test_order_is_flagged_first_then_lowest_score(self):
+        c = self.cands
+        expected = [c[1].id, c[5].id, c[0].id, c[3].id, c[2].id, c[4].id]
+        for limit in (1, 2, 4, 50):
+            self.assertEqual(self.walk(limit), expected)
+
+    def test_page_loads_raw_post_in_one_query(self):
+        with self.assertNumQueries(1):
+            page, cursor = review_queue_page(limit=3)
+            [str(c) for c in page]
+        self.assertIsNotNone(cursor)
+
+    def test_query_uses_composite_index(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("checks the SQLite query plan")
+        for rows in (review_segment(True), review_segment(False, 0.3, self.cands[5].id)):
+            sql, params = rows[:3].query.sql_with_params()
+            with connection.cursor() as db:
+                db.execute("EXPLAIN QUERY PLAN " + sql, params)
+                plan = " ".join(str(row) for row in db.fetchall())
+            self.assertIn("candidate_review_idx", plan)
+            self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_bad_cursor(self):
+        with self.assertRaises(ValueError):
+            review_queue_page("nonsense")
+
+    def test_needs_human_review(self):
+        cand = EventCandidate(
+            score=0.65, extracted_json={"start": "2025-11-18T22:00:00", "venue": {"area": "dalston"}}
+        )
+        self.assertFalse(needs_human_review(cand))
+        self.assertTrue(needs_human_review(cand, threshold=0.75))
+        cand.extracted_json = {"start": None, "venue": {"area": "dalston"}}
+        self.assertTrue(needs_human_review(cand))
+
+
+class ReviewQueueViewTests(TestCase):
+    def test_staff_only_json_pages(self):
+        raw = RawPost.objects.create(source="test", caption="Jazz at the Union Chapel")
+        for score in (0.2, 0.4, 0.6):
+            EventCandidate.objects.create(raw_post=raw, extracted_json={"tags": ["jazz"]}, score=score)
+
+        self.assertEqual(self.client.get("/classification/review/").status_code, 302)
+
+        self.client.force_login(User.objects.create_user("reviewer", password="x", is_staff=True))
+        first = self.client.get("/classification/review/", {"limit": 2}).json()
+        self.assertEqual([r["score"] for r in first["results"]], [0.2, 0.4])
+        self.assertEqual(first["results"][0]["caption"], "Jazz at the Union Chapel")
+
+        second = self.client.get("/classification/review/", {"cursor": first["next"]}).json()
+        self.assertEqual([r["score"] for r in second["results"]], [0.6])
+        self.assertIsNone(second["next"])
+
+        self.assertEqual(self.client.get("/classification/review/", {"cursor": "x"}).status_code, 400)
@@ -0,0 +1,123 @@
+import json
+import os
+import re
+import tempfile
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from classification.rule_engine import CompiledRules, RuleStore, literal_anchor
+from classification.services import load_keyword_rules, suggest_tags
+
+
+def regex_per_rule(rules, text):
+    "The old suggest_tags loop: one re.search per rule."
+    tag_scores = {}
+    for rule in rules:
+        if re.search(rule["pattern"], text, flags=re.IGNORECASE):
+            tag_scores[rule["tag"]] = tag_scores.get(rule["tag"], 0.0) + float(rule["weight"])
+    return sorted(tag_scores.items(), key=lambda kv: kv[1], reverse=True)
+
+
+class LiteralAnchorTests(SimpleTestCase):
+    def test_anchor_stops_at_regex_syntax(self):
+        self.assertEqual(literal_anchor(r"\bdeep\s+house\b"), "deep")
+        self.assertEqual(literal_anchor(r"\bshort films?\b"), "short film")
+        self.assertEqual(literal_anchor(r"\b18\+\b"), "18+")
+        self.assertEqual(literal_anchor(r"\bFilm Festival\b"), "film festival")
+
+    def test_no_anchor_for_alternation_or_class(self):
+        self.assertEqual(literal_anchor(r"\b(jazz|blues)\b"), "")
+        self.assertEqual(literal_anchor(r"\btechno|house"), "")
+        self.assertEqual(literal_anchor(r"\d+pm"), "")
+
+
+class CompiledRulesTests(SimpleTestCase):
+    def test_suggest_tags_matches_regex_per_rule(self):
+        rules = load_keyword_rules()
+        captions = [
+            "Techno all nighter at a Dalston warehouse | 10pm-4am | £10 on the door, 18+",
+            "DEEP  HOUSE and Afrohouse in East LDN, no cover",
+            "Banff Mountain Film Festival - short films and a film screening in London",
+            "Street food market and craft fair, free entry for kids",
+            "ſhoreditch (long s) and the Kelvin sign in Kelvin",
+            "nothing to see here",
+        ]
+        for caption in captions:
+            self.assertEqual(suggest_tags(caption), regex_per_rule(rules, caption), caption)
+
+    def test_bad_regex_is_skipped(self):
+        rules = [
+            {"pattern": r"\bjazz(\b", "tag": "broken", "weight": 1.0, "category": "music"},
+            {"pattern": r"\bjazz\b", "tag": "jazz", "weight": 1.0, "category": "music"},
+        ]
+        self.assertEqual(CompiledRules(rules).score("Late jazz"), [("jazz", 1.0)])
+
+    def test_weights_add_up_per_tag(self):
+        rules = [
+            {"pattern": r"\bdnb\b", "tag": "drum-and-bass", "weight": 0.8, "category": "genre"},
+            {"pattern": r"\bdrum\s+and\s+bass\b", "tag": "drum-and-bass", "weight": 1.0, "category": "genre"},
+        ]
+        self.assertEqual(CompiledRules(rules).score("DnB / drum and bass"), [("drum-and-bass", 1.8)])
+
+
+class RuleStoreTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.NamedTemporaryFile("w", suffix=".json", delete=False)
+        tmp.close()
+        self.path = tmp.name
+        self.addCleanup(os.remove, self.path)
+        self.write([{"pattern": r"\bjazz\b", "tag": "jazz", "weight": 1.0, "category": "music"}])
+
+    def write(self, rules):
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(rules, f)
+        #make sure the mtime moves even on filesystems with coarse timestamps
+        st = os.stat(self.path)
+        os.utime(self.path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+    def test_edit_is_picked_up_in_background(self):
+        store = RuleStore(self.path, check_interval=0)
+        first = store.get()
+        self.assertEqual(first.compiled.score("jazz and techno"), [("jazz", 1.0)])
+
+        self.write([{"pattern": r"\btechno\b", "tag": "techno", "weight": 1.0, "category": "genre"}])
+        deadline = time.monotonic() + 5
+        while store.get() is first and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        second = store.get()
+        self.assertNotEqual(second.version, first.version)
+        self.assertEqual(second.compiled.score("jazz and techno"), [("techno", 1.0)])
+
+    def test_broken_edit_keeps_previous_rules(self):
+        store = RuleStore(self.path)
+        first = store.get()
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("[{not json")
+        self.assertIs(store.reload(), first)
+
+    def test_malformed_file_on_first_load_gives_empty_rules(self):
+        for content in (b"[{not json", b"\xff\xfe[]"):
+            with open(self.path, "wb") as f:
+                f.write(content)
+            with mock.patch("builtins.print") as printed:
+                rules = RuleStore(self.path).get()
+            self.assertEqual(rules.version, "empty")
+            self.assertEqual(rules.compiled.score("jazz"), [])
+            self.assertIn("ERROR reading", printed.call_args[0][0])
+
+    def test_malformed_edit_is_reported_as_a_read_error(self):
+        store = RuleStore(self.path)
+        first = store.get()
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("[{not json")
+        with mock.patch("builtins.print") as printed:
+            self.assertIs(store.reload(), first)
+        self.assertIn("ERROR reading", printed.call_args[0][0])
+
+    def test_missing_key_raises_on_first_load(self):
+        self.write([{"pattern": r"\bjazz\b", "tag": "jazz"}])
+        with self.assertRaises(ValueError):
+            RuleStore(self.path).get()
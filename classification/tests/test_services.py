@@ -0,0 +1,164 @@
+from datetime import datetime
+
+from django.test import SimpleTestCase, TestCase
+
+from api.models import Event
+from api.spatial import geocell
+from classification.analysis import analyze_caption
+from classification.models import EventCandidate
+from classification.services import (
+    build_event_candidate, classify_many, extract_batch, extract_datetime, extract_datetime_many, extract_price_and_age,
+    extract_venue, promote_candidate_to_event, promote_candidates, suggest_tags,
+)
+from ingestion.models import RawPost
+
+
+CAPTIONS = [
+    "Techno all nighter in Dalston E8 3BH | 10pm-4am | £10, 18+",
+    "Jazz quartet at the Union Chapel, N1 2UN, 7:30pm, free entry",
+    "Street food market in Peckham this weekend",
+]
+
+
+class ClassifyManyTests(TestCase):
+    def setUp(self):
+        # bulk_create skips the post_save signal, so no candidates exist yet
+        self.posts = RawPost.objects.bulk_create(
+            [RawPost(source="test", caption=c) for c in CAPTIONS] + [RawPost(source="test", caption="   ")]
+        )
+
+    def test_matches_build_event_candidate(self):
+        ids = classify_many([p.id for p in self.posts])
+        self.assertEqual(len(ids), 3)
+
+        for post in self.posts[:3]:
+            batch = EventCandidate.objects.get(pk__in=ids, raw_post=post)
+            single = EventCandidate.objects.get(pk=build_event_candidate(post.id))
+            self.assertEqual(batch.score, single.score)
+            self.assertEqual(batch.needs_review, single.needs_review)
+            for key in ("tags", "tag_scores", "price_min", "price_max", "age", "venue", "rules_version"):
+                self.assertEqual(batch.extracted_json[key], single.extracted_json[key])
+
+    def test_queryset_input_uses_one_select_and_one_insert(self):
+        # SELECT captions, SAVEPOINT, lock unprocessed posts, INSERT candidates, UPDATE processed_at, RELEASE SAVEPOINT
+        with self.assertNumQueries(6):
+            ids = classify_many(RawPost.objects.filter(source="test"))
+        self.assertEqual(EventCandidate.objects.filter(pk__in=ids).count(), 3)
+        self.assertFalse(RawPost.objects.filter(source="test", processed_at__isnull=True).exists())
+
+    def test_empty_input(self):
+        self.assertEqual(classify_many([]), [])
+
+
+class AnalyzedCaptionTests(SimpleTestCase):
+    def test_extractors_accept_string_or_analyzed_caption(self):
+        for text in CAPTIONS + ["", "Free before 11pm, then a fiver"]:
+            caption = analyze_caption(text)
+            self.assertEqual(suggest_tags(caption), suggest_tags(text))
+            self.assertEqual(extract_price_and_age(caption), extract_price_and_age(text))
+            self.assertEqual(extract_venue(caption), extract_venue(text))
+            self.assertEqual(extract_datetime(caption) is None, extract_datetime(text) is None)
+
+    def test_tokens_match_str_split(self):
+        caption = analyze_caption(" Jazz\tnight \u00a0£5 ")
+        self.assertEqual(caption.words, " Jazz\tnight \u00a0£5 ".split())
+        self.assertEqual(caption.token_spans[0], (1, 5))
+
+    def test_price_age_and_venue(self):
+        text = "Techno in Dalston E8 3BH | £10 or a fiver before 11, 18+"
+        self.assertEqual(extract_price_and_age(text), {"price_min": 5.0, "price_max": 10.0, "age": "18+"})
+        self.assertEqual(extract_venue(text), {"postcode": "18+", "area": "dalston", "name": None})
+
+    def test_bad_price_is_skipped(self):
+        self.assertEqual(extract_price_and_age("Tickets £10.00. on the door")["price_min"], None)
+
+
+class ExtractDatetimeTests(SimpleTestCase):
+    NOW = datetime(2025, 11, 17, 15, 42, 9)
+
+    def test_relative_words_use_reference_time(self):
+        self.assertEqual(
+            extract_datetime("Rave tomorrow 10pm-4am", now=self.NOW),
+            (datetime(2025, 11, 18, 22, 0), datetime(2025, 11, 19, 4, 0)),
+        )
+        self.assertEqual(extract_datetime("Jazz tonight 8pm", now=self.NOW)[0], datetime(2025, 11, 17, 20, 0))
+
+    def test_dates_without_year(self):
+        # more than two months in the past rolls over to next year
+        self.assertEqual(extract_datetime("Market 3 Jan, 11am-4pm", now=self.NOW)[0], datetime(2026, 1, 3, 11, 0))
+        self.assertEqual(extract_datetime("Market 3/1 11am-4pm", now=self.NOW)[0], datetime(2026, 1, 3, 11, 0))
+        self.assertEqual(extract_datetime("Gig 20/11 8pm-11pm", now=self.NOW)[0], datetime(2025, 11, 20, 20, 0))
+
+    def test_impossible_dates_fall_back_to_reference_day(self):
+        for text in ("Open 22:00-04:00", "Party 31 feb 9pm-1am", "Fair 12-5pm"):
+            start, _ = extract_datetime(text, now=self.NOW)
+            self.assertEqual(start.date(), self.NOW.date(), text)
+
+    def test_time_ranges_are_not_dates(self):
+        self.assertEqual(
+            extract_datetime("Jazz 7:30-10:30pm", now=self.NOW),
+            (datetime(2025, 11, 17, 7, 30), datetime(2025, 11, 17, 22, 30)),
+        )
+        self.assertEqual(extract_datetime("Talk 6:15-8:15pm tonight", now=self.NOW)[0].date(), self.NOW.date())
+        self.assertEqual(extract_datetime("Open 9-5 every day", now=self.NOW)[0].date(), self.NOW.date())
+        self.assertEqual(extract_datetime("Rave 10-4 on 21/11", now=self.NOW)[0].date(), datetime(2025, 11, 21).date())
+        self.assertEqual(extract_datetime("Gig 21-11-25", now=self.NOW)[0].date(), datetime(2025, 11, 21).date())
+
+    def test_batch_pins_one_reference_time(self):
+        texts = ["Rave tomorrow 10pm-4am", "Gig 20/11 8pm-11pm", "no time here", ""]
+        self.assertEqual(extract_datetime_many(texts, now=self.NOW), [extract_datetime(t, self.NOW) for t in texts])
+        rows = list(enumerate(texts))
+        self.assertEqual(extract_batch(rows, now=self.NOW), extract_batch(rows, now=self.NOW))
+        self.assertEqual(extract_batch(rows, now=self.NOW)[0][1]["start"], "2025-11-18T22:00:00")
+
+
+class PromoteCandidatesTests(TestCase):
+    def make_candidate(self, caption, tags=("techno",), start="2025-11-18T22:00:00"):
+        raw = RawPost.objects.create(source="test", caption=caption)
+        return EventCandidate.objects.create(
+            raw_post=raw, extracted_json={"tags": list(tags), "start": start, "venue": {"area": "dalston"}}, score=0.8
+        )
+
+    def test_counts_and_links(self):
+        techno = "Techno all nighter in Dalston E8 3BH with resident DJs and special guests | 10pm-4am | £10"
+        jazz = "Jazz quartet at the Union Chapel, N1 2UN, 7:30pm, free entry, doors at seven"
+        existing = self.make_candidate("Street food market in Peckham all weekend with twenty traders", ("market",))
+        existingEventID = promote_candidate_to_event(existing.id)
+
+        cands = [
+            self.make_candidate(techno),
+            self.make_candidate(techno + " (repost)"), # duplicate inside the batch
+            self.make_candidate(jazz, ("jazz",), "2025-11-20T19:30:00"),
+            self.make_candidate("Street food market in Peckham all weekend with twenty traders!", ("market",)),
+        ]
+
+        created, matched, skipped = promote_candidates(EventCandidate.objects.all())
+        self.assertEqual((created, matched, skipped), (2, 2, 1))
+        self.assertEqual(Event.objects.count(), 3)
+
+        links = {c.id: c.promoted_event_id for c in EventCandidate.objects.all()}
+        self.assertEqual(links[cands[0].id], links[cands[1].id])
+        self.assertEqual(links[cands[3].id], existingEventID)
+        self.assertTrue(all(links.values()))
+        jazzEvent = Event.objects.get(pk=links[cands[2].id])
+        self.assertEqual((jazzEvent.date_start, jazzEvent.starts_at.replace(tzinfo=None)), ("2025-11-20T19:30:00", datetime(2025, 11, 20, 19, 30)))
+
+        # new events went into the duplicate index even though bulk_create skips signals
+        self.assertEqual(promote_candidate_to_event(self.make_candidate(jazz + "!", ("jazz",), "2025-11-20T19:30:00").id), links[cands[2].id])
+
+        # running it again promotes nothing
+        self.assertEqual(promote_candidates(EventCandidate.objects.all()), (0, 0, 6))
+
+    def test_ids_and_empty_input(self):
+        cand = self.make_candidate("Comedy open mic in Camden, 8pm, £5", ("comedy",))
+        self.assertEqual(promote_candidates([cand.id]), (1, 0, 0))
+        self.assertEqual(promote_candidates([]), (0, 0, 0))
+
+    def test_coordinates_come_from_the_scraped_row(self):
+        raw = RawPost.objects.create(
+            source="event_scraper", caption="Jazz night in Soho, 8pm", raw_json='{"latitude": "51.5136", "longitude": "-0.1365"}'
+        )
+        cand = EventCandidate.objects.create(raw_post=raw, extracted_json={"tags": ["jazz"]}, score=0.8)
+        promote_candidates([cand.id])
+        event = Event.objects.get()
+        self.assertEqual((event.latitude, event.longitude, event.geocell), (51.5136, -0.1365, geocell(51.5136, -0.1365)))
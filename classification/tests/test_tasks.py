@@ -0,0 +1,112 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from classification import services, tasks
+from classification.models import ClassificationJob, EventCandidate, ExtractionCacheEntry
+from ingestion.models import RawPost
+
+
+class ClassificationQueueTests(TestCase):
+    def test_saving_a_raw_post_only_enqueues(self):
+        post = RawPost.objects.create(source="test", caption="Jazz at the Union Chapel, 7pm")
+        self.assertFalse(EventCandidate.objects.exists())
+        job = ClassificationJob.objects.get(raw_post=post)
+        self.assertEqual(job.status, ClassificationJob.PENDING)
+
+    def test_blank_caption_is_not_enqueued(self):
+        RawPost.objects.create(source="test", caption="  ")
+        self.assertFalse(ClassificationJob.objects.exists())
+
+    def test_worker_drains_queue(self):
+        for i in range(3):
+            RawPost.objects.create(source="test", caption=f"Techno night {i}, Dalston, 10pm-4am")
+
+        out = StringIO()
+        call_command("classification_worker", once=True, batch_size=2, stdout=out)
+
+        self.assertIn("3 ok, 0 failed", out.getvalue())
+        self.assertEqual(EventCandidate.objects.count(), 3)
+        self.assertFalse(ClassificationJob.objects.exclude(status=ClassificationJob.DONE).exists())
+        self.assertFalse(RawPost.objects.filter(processed_at__isnull=True).exists())
+
+    def test_worker_prunes_extraction_cache(self):
+        ExtractionCacheEntry.objects.create(key="old", rules_version="not-current", payload={})
+
+        with mock.patch.object(services._EXTRACTION_CACHE, "use_db", False):
+            call_command("classification_worker", once=True, stdout=StringIO())
+        self.assertTrue(ExtractionCacheEntry.objects.exists())
+
+        out = StringIO()
+        with mock.patch.object(services._EXTRACTION_CACHE, "use_db", True):
+            call_command("classification_worker", once=True, stdout=out)
+        self.assertIn("Pruned 1 extraction cache entries", out.getvalue())
+        self.assertFalse(ExtractionCacheEntry.objects.exists())
+
+    def test_post_processed_meanwhile_gets_no_second_candidate(self):
+        post = RawPost.objects.create(source="test", caption="Jazz at 7pm")
+        [job] = tasks.claim_jobs(10, "a")
+        # classify_backlog got there first
+        services.save_extracted_batch(services.extract_batch([(post.id, post.caption)]), [post.id])
+
+        self.assertTrue(tasks.process_job(job))
+        self.assertEqual(EventCandidate.objects.filter(raw_post=post).count(), 1)
+        self.assertEqual(ClassificationJob.objects.get(pk=job.pk).status, ClassificationJob.DONE)
+
+        # and the other way round: the backlog skips a post the worker already classified
+        self.assertEqual(services.save_extracted_batch(services.extract_batch([(post.id, post.caption)]), [post.id]), [])
+        self.assertEqual(EventCandidate.objects.filter(raw_post=post).count(), 1)
+
+    def test_stale_worker_does_not_overwrite_reclaimed_job(self):
+        RawPost.objects.create(source="test", caption="Jazz at 7pm")
+        [stale] = tasks.claim_jobs(10, "a")
+        ClassificationJob.objects.update(locked_at=timezone.now() - tasks.LOCK_TIMEOUT - timedelta(seconds=1))
+        tasks.claim_jobs(10, "b")
+
+        with mock.patch("classification.tasks.build_event_candidate", side_effect=RuntimeError("boom")):
+            self.assertFalse(tasks.process_job(stale))
+        job = ClassificationJob.objects.get()
+        self.assertEqual((job.status, job.locked_by, job.attempts, job.last_error), (ClassificationJob.RUNNING, "b", 2, ""))
+
+        RawPost.objects.update(processed_at=None)
+        self.assertTrue(tasks.process_job(stale))
+        self.assertEqual(ClassificationJob.objects.get().status, ClassificationJob.RUNNING)
+
+    def test_claimed_job_is_not_claimed_twice(self):
+        RawPost.objects.create(source="test", caption="Jazz at 7pm")
+        self.assertEqual(len(tasks.claim_jobs(10, "a")), 1)
+        self.assertEqual(tasks.claim_jobs(10, "b"), [])
+
+    def test_abandoned_job_is_reclaimed(self):
+        RawPost.objects.create(source="test", caption="Jazz at 7pm")
+        tasks.claim_jobs(10, "a")
+        ClassificationJob.objects.update(locked_at=timezone.now() - tasks.LOCK_TIMEOUT - timedelta(seconds=1))
+        self.assertEqual([job.locked_by for job in tasks.claim_jobs(10, "b")], ["b"])
+
+    def test_failure_backs_off_then_fails(self):
+        post = RawPost.objects.create(source="test", caption="Jazz at 7pm")
+
+        with mock.patch("classification.tasks.build_event_candidate", side_effect=RuntimeError("boom")):
+            for attempt in range(1, tasks.MAX_ATTEMPTS + 1):
+                ClassificationJob.objects.update(run_after=timezone.now())
+                self.assertEqual(tasks.run_pending_jobs(), (0, 1))
+                job = ClassificationJob.objects.get(raw_post=post)
+                self.assertEqual(job.attempts, attempt)
+                self.assertIn("boom", job.last_error)
+
+                if attempt < tasks.MAX_ATTEMPTS:
+                    self.assertEqual(job.status, ClassificationJob.PENDING)
+                    self.assertGreater(job.run_after, timezone.now() + tasks.backoff_delay(attempt) - timedelta(seconds=5))
+                    # not due yet, so nothing to claim
+                    self.assertEqual(tasks.claim_jobs(), [])
+
+        self.assertEqual(job.status, ClassificationJob.FAILED)
+        self.assertFalse(EventCandidate.objects.exists())
+
+    def test_backoff_doubles(self):
+        self.assertEqual(tasks.backoff_delay(1), timedelta(seconds=tasks.BACKOFF_SECONDS))
+        self.assertEqual(tasks.backoff_delay(3), timedelta(seconds=tasks.BACKOFF_SECONDS * 4))
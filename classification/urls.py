@@ -0,0 +1,6 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path("review/", views.review_queue, name="review_queue"),
+]
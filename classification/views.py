@@ -1,3 +1,45 @@
-from django.shortcuts import render
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponseBadRequest, JsonResponse
+from django.views.decorators.http import require_GET
 
-# Create your views here.
+from classification.selectors import REVIEW_PAGE_SIZE, review_queue_page
+
+MAX_REVIEW_PAGE_SIZE = 200
+
+
+@staff_member_required
+@require_GET
+def review_queue(request):
+    """
+        GET ?cursor=...&limit=50 --> JSON page of EventCandidates to review (flagged and lowest score first)
+        and the cursor for the next page ("next" is null on the last page)
+    """
+
+    try:
+        limit = int(request.GET.get("limit", REVIEW_PAGE_SIZE))
+    except ValueError:
+        return HttpResponseBadRequest("'limit' must be a number")
+    limit = max(1, min(limit, MAX_REVIEW_PAGE_SIZE))
+
+    try:
+        candidates, nextCursor = review_queue_page(request.GET.get("cursor") or None, limit)
+    except ValueError:
+        return HttpResponseBadRequest("Invalid 'cursor'")
+
+    results = []
+    for cand in candidates:
+        data = cand.extracted_json or {}
+        results.append({
+            "id": cand.id,
+            "raw_post_id": cand.raw_post_id,
+            "source": cand.raw_post.source,
+            "caption": cand.raw_post.caption,
+            "score": cand.score,
+            "needs_review": cand.needs_review,
+            "promoted_event_id": cand.promoted_event_id,
+            "tags": data.get("tags") or [],
+            "start": data.get("start"),
+            "venue": data.get("venue") or {},
+        })
+
+    return JsonResponse({"results": results, "next": nextCursor})
@@ -1,12 +1,74 @@
+import argparse
 import csv
+import os
 import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 from pathlib import Path
 
 # Adjust this import if your function/module name differs
-from classification.pure_classifier import classify_caption
+from classification.pure_classifier import classify_captions
+
+# Large scrape exports are streamed: rows are read chunk_size at a time, each chunk is tagged
+# (in this process or by a pool of workers) and written back in the original order.
+# At most a couple of chunks per worker are in flight, so memory doesn't grow with the file.
+
+
+def caption_text(row, text_col):
+    return " ".join([
+        row.get(text_col, "") or "",
+        row.get("event_title", "") or row.get("title", "") or "",
+        row.get("category", "") or ""
+    ])
+
+
+def read_chunks(reader, text_col, chunk_size):
+    """Yields (rows, texts) for each chunk of chunk_size rows."""
+    while True:
+        rows = list(islice(reader, chunk_size))
+        if not rows:
+            return
+        yield rows, [caption_text(row, text_col) for row in rows]
+
+
+def classify_chunk(texts):
+    """Runs in a worker: (tags, score) for every text in the chunk."""
+    return list(classify_captions(texts, chunk_size=max(len(texts), 1)))
+
+
+class Progress:
+    """Prints rows done and rows/sec to stderr every `every` rows."""
+
+    def __init__(self, every=50000, enabled=True):
+        self.every = every
+        self.enabled = enabled
+        self.rows = 0
+        self.started = time.monotonic()
+        self._next = every
+
+    def rate(self):
+        elapsed = time.monotonic() - self.started
+        return self.rows / elapsed if elapsed > 0 else 0.0
+
+    def add(self, count):
+        self.rows += count
+        if self.enabled and self.rows >= self._next:
+            print(f"{self.rows:,} rows ({self.rate():,.0f} rows/s)", file=sys.stderr, flush=True)
+            self._next = self.rows + self.every
+
+    def done(self):
+        if self.enabled:
+            elapsed = time.monotonic() - self.started
+            print(f"Done: {self.rows:,} rows in {elapsed:.1f}s ({self.rate():,.0f} rows/s)", file=sys.stderr, flush=True)
+
 
 def classify_file(input_csv: Path, output_csv: Path,
-                  text_col_candidates=("text", "description", "caption")):
+                  text_col_candidates=("text", "description", "caption"),
+                  workers: int = 1, chunk_size: int = 5000, progress: Progress = None):
+    progress = progress or Progress(enabled=False)
+
     with input_csv.open(newline="", encoding="utf-8") as infile, \
          output_csv.open("w", newline="", encoding="utf-8") as outfile:
 
@@ -27,24 +89,59 @@ def classify_file(input_csv: Path, output_csv: Path,
         writer = csv.DictWriter(outfile, fieldnames=fieldnames)
         writer.writeheader()
 
-        for row in reader:
-            text = " ".join([
-            row.get(text_col, "") or "",
-            row.get("event_title", "") or row.get("title", "") or "",
-            row.get("category", "") or ""
-        ])
-            tags, score = classify_caption(text)
-            row["tags"] = ", ".join(tags)
-            row["score"] = score
-            writer.writerow(row)
+        def write_chunk(rows, results):
+            for row, (tags, score) in zip(rows, results):
+                row["tags"] = ", ".join(tags)
+                row["score"] = score
+            writer.writerows(rows)
+            progress.add(len(rows))
 
-if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        raise SystemExit("Usage: classify_csv.py <input.csv> [output.csv]")
+        chunks = read_chunks(reader, text_col, chunk_size)
+
+        if workers <= 1:
+            for rows, texts in chunks:
+                write_chunk(rows, classify_chunk(texts))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pending = deque()
+                for rows, texts in chunks:
+                    pending.append((rows, pool.submit(classify_chunk, texts)))
+
+                    # Bounded: wait for the oldest chunk (which also keeps the output in order)
+                    if len(pending) >= workers * 2:
+                        done_rows, future = pending.popleft()
+                        write_chunk(done_rows, future.result())
+
+                while pending:
+                    done_rows, future = pending.popleft()
+                    write_chunk(done_rows, future.result())
+
+    progress.done()
+    return progress.rows
 
-    input_csv = Path(sys.argv[1]).resolve()
+
+def main():
+    ap = argparse.ArgumentParser(description="Tag every row of a scraped events CSV with classify_caption.")
+    ap.add_argument("input", help="Input CSV")
+    ap.add_argument("output", nargs="?", default=None, help="Output CSV (default: <input>_classified.csv)")
+    ap.add_argument("--workers", type=int, default=1,
+                    help=f"Worker processes (1 = run in this process; this machine has {os.cpu_count()} CPUs)")
+    ap.add_argument("--chunk-size", type=int, default=5000, help="Rows read and sent to a worker at a time")
+    ap.add_argument("--progress-every", type=int, default=50000, help="Report progress every N rows")
+    ap.add_argument("--quiet", action="store_true", help="No progress output")
+    args = ap.parse_args()
+
+    if args.workers < 1 or args.chunk_size < 1:
+        raise SystemExit("--workers and --chunk-size must be at least 1")
+
+    input_csv = Path(args.input).resolve()
     default_out = input_csv.with_name(input_csv.stem + "_classified.csv")
-    output_csv = Path(sys.argv[2]).resolve() if len(sys.argv) > 2 else default_out
+    output_csv = Path(args.output).resolve() if args.output else default_out
 
-    classify_file(input_csv, output_csv)
+    progress = Progress(every=args.progress_every, enabled=not args.quiet)
+    classify_file(input_csv, output_csv, workers=args.workers, chunk_size=args.chunk_size, progress=progress)
     print(f"✅ Wrote {output_csv}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ingestion", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="rawpost",
+            index=models.Index(
+                fields=["processed_at", "id"], name="rawpost_processed_id_idx"
+            ),
+        ),
+    ]
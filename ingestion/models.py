@@ -19,6 +19,12 @@ class RawPost(models.Model):
     created_at = models.DateTimeField(auto_now_add = True) #records when row was created
     processed_at = models.DateTimeField(null = True, blank = True) #records when classifier finished processing post
 
+    class Meta:
+        indexes = [
+            #the classification pipeline pages through "processed_at IS NULL AND id > last checkpoint"
+            models.Index(fields = ["processed_at", "id"], name = "rawpost_processed_id_idx"),
+        ]
+
     def __str__(self):
         
         return f"{self.source}: {self.caption[:30]}..."
@@ -0,0 +1,21 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from accounts.services.feed import rebuild_user_feed
+
+
+class Command(BaseCommand):
+    help = "Rebuild every user's precomputed event feed from their current preferences"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", help="Only rebuild this username's feed")
+
+    def handle(self, *args, **options):
+        users = User.objects.select_related("profile").order_by("id")
+        if options["user"]:
+            users = users.filter(username=options["user"])
+
+        total = 0
+        for user in users.iterator():
+            total += rebuild_user_feed(user)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt feeds: {total} entries"))
@@ -61,3 +61,48 @@ class UserPreference(models.Model):
 
     # e.g: UserPreference.objects.filter(preferred_areas__contains=['Shoreditch'])
     # Scraped events can be filtered per-user and then pinned on a future map.
+
+
+class FeedEntry(models.Model):
+    """
+    One event in a user's precomputed feed, with how well it matches their preferences.
+    Kept up to date by accounts/services/feed.py, so reading a feed is a single indexed query.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='feed_entries')
+    event = models.ForeignKey('api.Event', on_delete=models.CASCADE, related_name='feed_entries')
+    score = models.FloatField()
+    matched = JSONField(default=list, blank=True)  # preference tokens the event matched, e.g. ["club", "indie"]
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'event'], name='feedentry_user_event_uniq'),
+        ]
+        indexes = [
+            # a feed read is "this user's entries by score, newest event first": a walk down this index
+            models.Index(fields=['user', 'score', 'event'], name='feed_user_score_idx'),
+        ]
+
+    def __str__(self):
+        return f"Feed({self.user_id}) -> Event {self.event_id} ({self.score})"
+
+
+class FeedPreference(models.Model):
+    """
+    One tag a user's preferences match, with the preference tokens it satisfies.
+    The index add_events_to_feeds reads: the users a new event matches are found by its tags,
+    without reading every profile. Rewritten with the user's feed (services/feed.py).
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='feed_preferences')
+    tag = models.CharField(max_length=64)  # an api.Tag name
+    tokens = JSONField(default=list, blank=True)  # preference tokens this tag satisfies, e.g. ["club", "party"]
+    token_count = models.PositiveIntegerField()  # how many preference tokens the user has (the score's denominator)
+
+    class Meta:
+        constraints = [
+            # tag first: lookups are "who wants these tags"
+            models.UniqueConstraint(fields=['tag', 'user'], name='feedpref_tag_user_uniq'),
+        ]
+
+    def __str__(self):
+        return f"FeedPreference({self.user_id}) {self.tag} -> {self.tokens}"
@@ -0,0 +1,159 @@
+# accounts/services/feed.py
+"""
+Precomputed per-user event feeds.
+
+Every user has FeedEntry rows (user, event, score) for the events that match their
+preferences, so the feed endpoint reads one indexed query instead of
+scoring every event on every request.
+
+The feed is maintained incrementally:
+    rebuild_user_feed(user)         -- when the user's preferences change
+    add_events_to_feeds(events)     -- when events are created or promoted (api.signals.events_created)
+    refresh_events_in_feeds(events) -- when saved events get different tags (api.signals.events_retagged)
+
+rebuild_user_feed also rewrites the user's FeedPreference rows (tag -> preference tokens), the index
+add_events_to_feeds looks new events' tags up in. `manage.py rebuild_feeds` fills both for existing users.
+
+Matching: a preference token matches an event when one of the event's tags is the token
+itself or one of the tags it stands for in PREFERENCE_TAGS (e.g. "party" -> club, techno ...).
+Score = share of the user's preference tokens the event matched (0-1].
+"""
+
+import heapq
+import logging
+from collections import defaultdict
+from typing import Dict, Iterable, Set
+
+from django.conf import settings
+from django.db import transaction
+
+from api.models import EventTag
+from api.services import MAX_TAG_LENGTH, event_tag_names, get_tag_ids, normalize_tag
+
+from accounts.models import FeedEntry, FeedPreference
+
+logger = logging.getLogger("accounts.feed")
+
+# Preset preferences (see forms.PRESET_PREFERENCES) -> the classifier tags they cover
+PREFERENCE_TAGS = {
+    'party': ['club', 'techno', 'house', 'dnb', 'festival'],
+    'club': ['club', 'techno', 'house', 'dnb'],
+    'concert': ['live', 'jazz'],
+    'festival': ['festival'],
+    'exhibition': ['art', 'film'],
+    'meetup': ['networking', 'talk', 'workshop'],
+}
+
+# Most entries written when a feed is rebuilt (best scores, newest events first).
+# New events are always added on top, so a feed can grow past this until the next rebuild.
+FEED_SIZE = getattr(settings, "FEED_SIZE", 500)
+
+
+def preference_tags(tokens: Iterable[str]) -> Dict[str, Set[str]]:
+    """{tag name: preference tokens it satisfies} for a user's preference tokens."""
+    by_tag = defaultdict(set)
+    for token in tokens:
+        for tag in [token] + PREFERENCE_TAGS.get(token, []):
+            tag = normalize_tag(tag)
+            if tag:
+                by_tag[tag].add(token)
+    return dict(by_tag)
+
+
+def score(matched: Set[str], token_count: int) -> float:
+    return round(len(matched) / token_count, 3) if token_count else 0.0
+
+
+def rebuild_user_feed(user, size: int = FEED_SIZE) -> int:
+    """
+    Replaces a user's feed with the events matching their current preferences.
+    Candidate events come from the tag index (api.EventTag), not from scanning events.
+    Returns the number of entries written.
+    """
+    profile = getattr(user, 'profile', None)
+    tokens = profile.export_preferences() if profile else []
+    by_tag = preference_tags(tokens)
+
+    matched = defaultdict(set)  # event id -> preference tokens it matched
+    tag_ids = get_tag_ids(by_tag)
+    if tag_ids:
+        tokens_by_id = {tag_id: by_tag[name] for name, tag_id in tag_ids.items()}
+        links = EventTag.objects.filter(tag_id__in=list(tokens_by_id)).values_list("event_id", "tag_id")
+        for event_id, tag_id in links.iterator(chunk_size=5000):
+            matched[event_id] |= tokens_by_id[tag_id]
+
+    best = heapq.nlargest(size, ((score(m, len(tokens)), event_id) for event_id, m in matched.items()))
+    entries = [
+        FeedEntry(user_id=user.pk, event_id=event_id, score=s, matched=sorted(matched[event_id]))
+        for s, event_id in best
+    ]
+
+    # longer names can't be tags (event_tag_names skips them too)
+    preferences = [
+        FeedPreference(user_id=user.pk, tag=tag, tokens=sorted(satisfied), token_count=len(tokens))
+        for tag, satisfied in by_tag.items() if len(tag) <= MAX_TAG_LENGTH
+    ]
+
+    with transaction.atomic():
+        FeedPreference.objects.filter(user_id=user.pk).delete()
+        FeedPreference.objects.bulk_create(preferences, batch_size=500)
+        FeedEntry.objects.filter(user_id=user.pk).delete()
+        FeedEntry.objects.bulk_create(entries, batch_size=500)
+
+    logger.debug("Rebuilt feed for user %s: %s entries", user.pk, len(entries))
+    return len(entries)
+
+
+def add_events_to_feeds(events) -> int:
+    """
+    Adds newly created events to the feed of every user whose preferences they match.
+    The users come from the FeedPreference index for the events' tags, so the cost follows the
+    number of matching users, not the number of profiles. Returns the number of entries added.
+    """
+    tags_by_event = {ev.pk: set(event_tag_names(ev)) for ev in events if ev.pk is not None}
+    wanted_tags = set().union(*tags_by_event.values()) if tags_by_event else set()
+    if not wanted_tags:
+        return 0
+
+    # tag -> [(user id, preference tokens)] for the tags these events carry
+    users_by_tag = defaultdict(list)
+    token_count = {}
+    rows = FeedPreference.objects.filter(tag__in=wanted_tags).values_list("tag", "user_id", "tokens", "token_count")
+    for tag, user_id, tokens, count in rows.iterator(chunk_size=5000):
+        users_by_tag[tag].append((user_id, tokens))
+        token_count[user_id] = count
+
+    entries = []
+    for event_id, tags in tags_by_event.items():
+        matched = defaultdict(set)
+        for tag in tags:
+            for user_id, tokens in users_by_tag.get(tag, ()):
+                matched[user_id].update(tokens)
+        entries += [
+            FeedEntry(user_id=user_id, event_id=event_id, score=score(m, token_count[user_id]), matched=sorted(m))
+            for user_id, m in matched.items()
+        ]
+
+    # ignore_conflicts: the event may already be in a feed rebuilt a moment ago
+    FeedEntry.objects.bulk_create(entries, batch_size=500, ignore_conflicts=True)
+    return len(entries)
+
+
+def refresh_events_in_feeds(events) -> int:
+    """
+    Re-matches events whose tags changed: drops their feed entries and adds them again for the users
+    their new tags match. Returns the number of entries written.
+    """
+    event_ids = [ev.pk for ev in events if ev.pk is not None]
+    with transaction.atomic():
+        FeedEntry.objects.filter(event_id__in=event_ids).delete()
+        return add_events_to_feeds(events)
+
+
+def user_feed(user, limit: int = 50):
+    """The user's best-matching events (FeedEntry with .event loaded), best first, newest first on ties."""
+    return list(
+        FeedEntry.objects.filter(user_id=user.pk)
+        .select_related("event")
+        .order_by("-score", "-event_id")[:limit]
+    )
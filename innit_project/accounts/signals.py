@@ -1,6 +1,10 @@
+import threading
+
+from django.db import transaction
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.contrib.auth.models import User
+from api.signals import events_created, events_retagged
 from .models import Profile
 
 # Will handle auto-creating a user profile among other things.
@@ -11,3 +15,37 @@ def create_or_update_user_profile(sender, instance, created, **kwargs):
     else:
         # ensure profile exists and save (defensive)
         Profile.objects.get_or_create(user=instance)
+
+
+# New (or newly promoted) events go into the feeds of users they match once their transaction commits.
+# Events saved one by one inside an atomic block are added together in one batch, and not at all if it
+# rolls back. Outside a transaction on_commit runs straight away.
+_pending = threading.local()
+
+
+@receiver(events_created)
+def add_new_events_to_feeds(sender, events, **kwargs):
+    if getattr(_pending, 'events', None) is None:
+        _pending.events = {}
+    _pending.events.update((ev.pk, ev) for ev in events if ev.pk is not None)
+    # every call registers a flush: the first one to run takes the whole batch, the rest find it empty
+    transaction.on_commit(flush_new_events)
+
+
+def flush_new_events():
+    from api.models import Event
+    from .services.feed import add_events_to_feeds
+
+    events, _pending.events = getattr(_pending, 'events', None), None
+    if not events:
+        return
+    # events queued in a savepoint or transaction that rolled back aren't there any more
+    saved = set(Event.objects.filter(pk__in=list(events)).values_list('pk', flat=True))
+    add_events_to_feeds([ev for pk, ev in events.items() if pk in saved])
+
+
+# An edited event's entries follow its tags, the same way api.signals keeps its EventTag links in step.
+@receiver(events_retagged)
+def refresh_retagged_events_in_feeds(sender, events, **kwargs):
+    from .services.feed import refresh_events_in_feeds
+    refresh_events_in_feeds(events)
@@ -136,3 +136,30 @@ class AccountsFlowTests(TestCase):
         client.logout()
         logged_in = client.login(username='existing', password='NewStrongPass!234')
         self.assertTrue(logged_in)
+
+
+class FindEventsTests(TestCase):
+    def setUp(self):
+        from api.models import Event
+
+        self.user = User.objects.create_user(username="raver", password="pass")
+        self.user.profile.presets = ['club']
+        self.user.profile.save()
+        self.client.login(username="raver", password="pass")
+        Event.objects.create(title="Techno night", ai_tags=["techno"], latitude=51.52, longitude=-0.08)
+        Event.objects.create(title="Book talk", ai_tags=["talk"], latitude=51.521, longitude=-0.081)
+        Event.objects.create(title="Far rave", ai_tags=["techno"], latitude=52.5, longitude=-1.9)
+
+    def test_events_follow_preferences_and_radius(self):
+        r = self.client.get(reverse('accounts:api_find_events'), {'lat': 51.52, 'lon': -0.08, 'radius': 2000})
+        self.assertEqual(r.status_code, 200)
+        data = r.json()
+        self.assertEqual(data['preferences'], ['club'])
+        # the matching indexed event and the scraper service's suggestion, nearest first
+        self.assertEqual([ev['title'] for ev in data['events']], ["Techno night", "Example placeholder event"])
+        self.assertEqual([ev['source'] for ev in data['events']], ["events", "placeholder"])
+        self.assertTrue(all('distance_km' in ev for ev in data['events']))
+
+    def test_k_nearest(self):
+        r = self.client.get(reverse('accounts:api_find_events'), {'lat': 51.52, 'lon': -0.08, 'k': 1})
+        self.assertEqual([ev['title'] for ev in r.json()['events']], ["Techno night"])
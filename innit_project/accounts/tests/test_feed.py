@@ -0,0 +1,117 @@
+from unittest import mock
+
+from django.db import transaction
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth.models import User
+from api.models import Event
+from accounts.models import FeedEntry, FeedPreference
+from accounts.services.feed import add_events_to_feeds, rebuild_user_feed, user_feed
+
+
+class FeedTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="raver", password="pass")
+        self.user.profile.presets = ['club']
+        self.user.profile.custom_preferences = ['jazz']
+        self.user.profile.save()
+        self.other = User.objects.create_user(username="reader", password="pass")
+        self.other.profile.presets = ['meetup']
+        self.other.profile.save()
+        # what the preference views do after saving a profile
+        rebuild_user_feed(self.user)
+        rebuild_user_feed(self.other)
+
+    def feed_titles(self, user):
+        return [entry.event.title for entry in user_feed(user)]
+
+    def test_new_events_are_added_to_matching_feeds(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Event.objects.create(title="Techno night", ai_tags=["techno"])
+            Event.objects.create(title="Jazz club", ai_tags=["jazz", "club"])
+            Event.objects.create(title="Book talk", ai_tags=["talk"])
+
+        # matching both preferences scores higher than matching one
+        self.assertEqual(self.feed_titles(self.user), ["Jazz club", "Techno night"])
+        self.assertEqual(user_feed(self.user)[0].score, 1.0)
+        self.assertEqual(user_feed(self.user)[0].matched, ["club", "jazz"])
+        self.assertEqual(self.feed_titles(self.other), ["Book talk"])
+
+    def test_bulk_created_events_via_add_events_to_feeds(self):
+        events = Event.objects.bulk_create([Event(title="House party", ai_tags=["house"])])
+        self.assertEqual(self.feed_titles(self.user), [])
+        self.assertEqual(add_events_to_feeds(events), 1)
+        self.assertEqual(self.feed_titles(self.user), ["House party"])
+
+    def test_matching_users_come_from_the_preference_index(self):
+        self.assertEqual(
+            sorted(FeedPreference.objects.filter(user=self.user).values_list("tag", flat=True)),
+            ["club", "dnb", "house", "jazz", "techno"],
+        )
+        for i in range(20):
+            User.objects.create_user(username=f"user{i}", password="pass")
+        events = Event.objects.bulk_create([Event(title="Jazz club", ai_tags=["jazz", "club"])])
+        # one lookup by tag and one insert, however many profiles there are
+        with self.assertNumQueries(2):
+            self.assertEqual(add_events_to_feeds(events), 1)
+
+    def test_events_saved_in_one_transaction_are_added_together(self):
+        with mock.patch("accounts.services.feed.add_events_to_feeds") as add:
+            with self.captureOnCommitCallbacks(execute=True):
+                with transaction.atomic():
+                    Event.objects.create(title="Techno night", ai_tags=["techno"])
+                    Event.objects.create(title="Book talk", ai_tags=["talk"])
+                    try:
+                        with transaction.atomic():
+                            Event.objects.create(title="Rolled back", ai_tags=["club"])
+                            raise RuntimeError
+                    except RuntimeError:
+                        pass
+        add.assert_called_once()
+        self.assertEqual([ev.title for ev in add.call_args.args[0]], ["Techno night", "Book talk"])
+
+    def test_entries_follow_edited_tags(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            event = Event.objects.create(title="Techno night", ai_tags=["techno"])
+        self.assertEqual(self.feed_titles(self.user), ["Techno night"])
+
+        event.ai_tags = ["talk"]
+        event.save(update_fields=["ai_tags"])
+        self.assertEqual(self.feed_titles(self.user), [])
+        self.assertEqual(self.feed_titles(self.other), ["Techno night"])
+
+        event.ai_tags = ["talk", "jazz"]
+        event.save()
+        self.assertEqual(self.feed_titles(self.user), ["Techno night"])
+        self.assertEqual(user_feed(self.user)[0].matched, ["jazz"])
+
+        # saves that leave the tags alone don't touch the feeds
+        with mock.patch("accounts.services.feed.refresh_events_in_feeds") as refresh:
+            event.title = "Talk and jazz"
+            event.save()
+        refresh.assert_not_called()
+
+    def test_rebuild_follows_preferences(self):
+        Event.objects.create(title="Techno night", ai_tags=["techno"])
+        Event.objects.create(title="Book talk", ai_tags=["talk"])
+        self.user.profile.presets = ['meetup']
+        self.user.profile.custom_preferences = []
+        self.user.profile.save()
+
+        self.assertEqual(rebuild_user_feed(self.user), 1)
+        self.assertEqual(self.feed_titles(self.user), ["Book talk"])
+        self.assertEqual(FeedEntry.objects.filter(user=self.user).count(), 1)
+
+    def test_edit_preferences_rebuilds_feed(self):
+        Event.objects.create(title="Gallery opening", ai_tags=["art"])
+        self.client.login(username="raver", password="pass")
+        self.client.post(reverse('accounts:edit_preferences'), {'presets': ['exhibition'], 'custom_preferences': ''})
+        self.assertEqual(self.feed_titles(self.user), ["Gallery opening"])
+
+    def test_feed_api(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Event.objects.create(title="Techno night", ai_tags=["techno"])
+        self.client.login(username="raver", password="pass")
+        data = self.client.get(reverse('accounts:api_feed')).json()
+        self.assertEqual([ev['title'] for ev in data['events']], ["Techno night"])
+        self.assertEqual(data['events'][0]['matched'], ["club"])
@@ -24,5 +24,7 @@ urlpatterns = [
 
     # Mapping + Home
     path('api/events/', views.api_find_events, name='api_find_events'),
+    path('api/feed/', views.api_feed, name='api_feed'),
+    path('api/scraped-clusters/', views.api_scraped_clusters, name='api_scraped_clusters'),
     path('home/', views.home_screen, name='home'),
 ]
@@ -14,18 +14,22 @@ from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.shortcuts import render, redirect
 from django.urls import reverse_lazy, reverse
-from .services.scraper import fetch_events_for_preferences
-import csv
 from pathlib import Path
 from django.conf import settings
 
 
 from .forms import AccountForm, DOBForm, PreferencesForm, CustomPasswordChangeForm, ProfileEditForm
 from .models import Profile
+from .services.feed import preference_tags, rebuild_user_feed, user_feed
+from .services.scraper import fetch_events_for_preferences
+from api.clusters import cluster_response
+from api.geo import bearing_deg, nearest_items
+from api.selectors import events_with_any_tag
+from api.snapshot import load_event_snapshot
+from api.spatial import events_within, haversine_km, nearest_events
 
 
 # Mapping API integration
-import math
 import requests
 from bs4 import BeautifulSoup
 from django.http import JsonResponse, HttpResponseBadRequest
@@ -88,50 +92,41 @@ def home_screen(request):
     profile = getattr(request.user, 'profile', None)
     prefs = normalize_preferences(profile)
 
-    # Load scraped events from the shared CSV (if present) so the homepage map
-    # can display them. This mirrors the approach used in the Mapping app.
-    scraped_events = []
+    # Scraped events aren't embedded in the page any more: the map asks api_scraped_clusters for the
+    # clusters and events inside its viewport. ?lat=&lng= centres the map there.
     try:
-        csv_path = Path(settings.BASE_DIR) / "data_scripts" / "event_scraping" / "events_out.csv"
-        if csv_path.exists():
-            with csv_path.open(newline="", encoding="utf-8") as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    name = row.get("event_title") or "Untitled event"
-                    address = row.get("address") or ""
-                    date = row.get("start_local") or ""
-                    city = row.get("city") or ""
-
-                    lat = row.get("latitude")
-                    lng = row.get("longitude")
-                    try:
-                        lat = float(lat) if lat not in (None, "", "NaN") else None
-                        lng = float(lng) if lng not in (None, "", "NaN") else None
-                    except ValueError:
-                        lat, lng = None, None
-
-                    # Only include events with coordinates (mapping without coords is not possible here)
-                    if lat is None or lng is None:
-                        continue
-
-                    scraped_events.append({
-                        "name": name,
-                        "address": address or f"{row.get('venue_name','')}, {city}",
-                        "date": date,
-                        "lat": lat,
-                        "lng": lng,
-                    })
-    except Exception:
-        # If anything goes wrong reading the CSV, just continue without scraped events
-        scraped_events = []
+        center = {'lat': float(request.GET['lat']), 'lng': float(request.GET['lng'])}
+    except (KeyError, ValueError):
+        center = None
 
     return render(request, 'home.html', {
         'profile': profile,
         'preferences': prefs,
-        'scraped_events': scraped_events,
+        'map_center': center,
     })
 
 
+def scraped_events_snapshot():
+    """The scraped events CSV, parsed once per version (api/snapshot.py), or None if it isn't there."""
+    return load_event_snapshot(Path(settings.BASE_DIR) / "data_scripts" / "event_scraping" / "events_out.csv")
+
+
+@require_GET
+@login_required
+def api_scraped_clusters(request):
+    """
+    Scraped events for the map at one zoom: ?zoom=Z&bbox=south,west,north,east.
+    Clusters (with event counts) and single events, precomputed per zoom (see api/clusters.py).
+    """
+    try:
+        snapshot = scraped_events_snapshot()
+    except Exception:
+        # If anything goes wrong reading the CSV, the map just shows no scraped events
+        logger.exception("Could not load scraped events for the home map")
+        snapshot = None
+    return cluster_response(request, snapshot)
+
+
 class CustomLoginView(LoginView):
     template_name = 'accounts/login.html'
     redirect_authenticated_user = True
@@ -268,6 +263,7 @@ def reg_step4(request):
             profile.presets = prefs.get('presets', [])
             profile.custom_preferences = prefs.get('custom', [])
             profile.save(update_fields=['date_of_birth', 'age_verified', 'presets', 'custom_preferences'])
+            rebuild_user_feed(user)
 
             login(request, user)
             clear_reg_session(request)
@@ -302,6 +298,7 @@ def profile(request):
             pwd_form = CustomPasswordChangeForm(user)
             if form.is_valid():
                 form.save(user=user)
+                rebuild_user_feed(user)
                 messages.success(request, "Profile updated successfully.")
                 logger.info("Profile updated for user %s", user.username)
                 return redirect('accounts:profile')
@@ -357,6 +354,7 @@ def edit_account(request):
         form = ProfileEditForm(request.POST, instance=profile, user=request.user)
         if form.is_valid():
             form.save(user=request.user)
+            rebuild_user_feed(request.user)  # the form also saves presets/custom preferences
             messages.success(request, "Account information updated.")
             logger.info("Account info updated for user %s", request.user.username)
             return redirect('accounts:profile')
@@ -398,6 +396,7 @@ def edit_preferences(request):
             profile.presets = presets
             profile.custom_preferences = custom_list
             profile.save()
+            rebuild_user_feed(request.user)
             messages.success(request, "Preferences updated.")
             logger.info("Preferences updated for user %s: presets=%s custom=%s", request.user.username, presets, custom_list)
             return redirect('accounts:profile')
@@ -415,13 +414,7 @@ def edit_preferences(request):
 
 def haversine_dist_km(lat1, lon1, lat2, lon2):
     """Return distance in km between two lat/lon points."""
-    R = 6371.0
-    phi1 = math.radians(lat1)
-    phi2 = math.radians(lat2)
-    dphi = math.radians(lat2 - lat1)
-    dlambda = math.radians(lon2 - lon1)
-    a = math.sin(dphi/2.0)**2 + math.cos(phi1)*math.cos(phi2)*math.sin(dlambda/2.0)**2
-    return R * 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
+    return haversine_km(lat1, lon1, lat2, lon2)
 
 
 def normalize_preferences(profile):
@@ -504,6 +497,28 @@ def build_overpass_query(interests, around_m=5000, lat=51.5074, lon=-0.1278, max
 
 
 # API
+MAX_FIND_RADIUS_M = 50000
+MAX_FIND_EVENTS = 500
+
+
+def map_event(ev, distance_km, center):
+    """An indexed Event in the shape the map expects (same keys as the scraper service's events)."""
+    return {
+        "id": ev.id,
+        "title": ev.title,
+        "lat": ev.latitude,
+        "lon": ev.longitude,
+        "venue_name": ev.location,
+        "type": (ev.ai_tags or ["event"])[0],
+        "snippet": (ev.description or "")[:200],
+        "url": None,
+        "date": ev.starts_at.date().isoformat() if ev.starts_at else ev.date_start,
+        "source": "events",
+        "distance_km": round(distance_km, 3),
+        "bearing": round(bearing_deg(center[0], center[1], ev.latitude, ev.longitude), 1),
+    }
+
+
 @require_GET
 @login_required
 def api_find_events(request):
@@ -517,13 +532,72 @@ def api_find_events(request):
         radius = int(request.GET.get('radius', 5000))
     except Exception:
         radius = 5000
+    radius = min(max(radius, 1), MAX_FIND_RADIUS_M)
+
+    # ?k=N asks for the N nearest events (within the radius) instead of every event in it
+    try:
+        k = int(request.GET['k']) if request.GET.get('k') else None
+    except ValueError:
+        return HttpResponseBadRequest("Invalid k")
+
+    limit = min(max(k, 1), MAX_FIND_EVENTS) if k is not None else MAX_FIND_EVENTS
 
     profile = getattr(request.user, 'profile', None)
-    events = fetch_events_for_preferences(profile, center=(lat, lon), radius_m=radius)
+    tokens = profile.export_preferences() if profile else []
+
+    # Indexed events with a tag the user asked for (every event if they have no preferences).
+    # Only the grid cells around the centre are read (see api/spatial.py)
+    matching = events_with_any_tag(preference_tags(tokens)) if tokens else None
+    if k is not None:
+        found = nearest_events(lat, lon, limit, queryset=matching, max_radius_km=radius / 1000)
+    else:
+        found = events_within(lat, lon, radius / 1000, queryset=matching, limit=limit)
+    events = [map_event(ev, km, (lat, lon)) for ev, km in found]
+
+    # Events from the scraper service for the same preferences, inside the same circle
+    scraped = fetch_events_for_preferences(profile, center=(lat, lon), radius_m=radius)
+    events += nearest_items(scraped, lat, lon, max_km=radius / 1000, latKey='lat', lonKey='lon')
+    events = sorted(events, key=lambda e: e['distance_km'])[:limit]
 
     return JsonResponse({
         'center': {'lat': lat, 'lon': lon, 'radius_m': radius},
-        'preferences': profile.export_preferences() if profile else [],
+        'preferences': tokens,
         'count': len(events),
         'events': events
     })
+
+
+FEED_PAGE_SIZE = 50
+MAX_FEED_PAGE_SIZE = 200
+
+
+def feed_item(entry):
+    """A FeedEntry (with its event loaded) as JSON for the feed API."""
+    ev = entry.event
+    return {
+        "id": ev.id,
+        "title": ev.title,
+        "location": ev.location,
+        "starts_at": ev.starts_at.isoformat() if ev.starts_at else None,
+        "lat": ev.latitude,
+        "lng": ev.longitude,
+        "tags": ev.ai_tags or [],
+        "score": entry.score,
+        "matched": entry.matched,
+    }
+
+
+@require_GET
+@login_required
+def api_feed(request):
+    """The user's precomputed feed (see services/feed.py), best match first. ?limit=N (default 50)."""
+    try:
+        limit = min(max(int(request.GET.get('limit', FEED_PAGE_SIZE)), 1), MAX_FEED_PAGE_SIZE)
+    except ValueError:
+        return HttpResponseBadRequest("Invalid limit")
+
+    entries = user_feed(request.user, limit)
+    return JsonResponse({
+        'count': len(entries),
+        'events': [feed_item(entry) for entry in entries],
+    })
@@ -8,9 +8,14 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
 
 import os
+import sys
+from pathlib import Path
 
 from django.core.asgi import get_asgi_application
 
+# The api, classification and ingestion apps live at the repository root (see manage.py)
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'innit_project.settings')
 
 application = get_asgi_application()
@@ -40,7 +40,10 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     #
     'accounts.apps.AccountsConfig',
-
+    # Events, their tag and grid indexes, and the classifier that fills them (repo root, see manage.py)
+    'ingestion',
+    'classification.apps.ClassificationConfig',
+    'api',
 ]
 
 MIDDLEWARE = [
@@ -7,6 +7,9 @@ import sys
 def main():
     """Run administrative tasks."""
     sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    # The api, classification and ingestion apps live at the repository root.
+    # Appended after this directory so innit_project.settings is still the one in here
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
     os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'innit_project.settings')
     try:
@@ -22,5 +22,6 @@ from django.contrib.staticfiles.urls import staticfiles_urlpatterns
 
 urlpatterns = [
     path('api/', include('api.urls')),
+    path('classification/', include('classification.urls')),
     path("admin/", admin.site.urls),
 ]